@@ -0,0 +1,101 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+Tables that already exist are left alone, so databases bootstrapped with
+``WarehouseLoader.create_tables`` can be brought under Alembic by simply
+running ``alembic upgrade head``.
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing(table: str) -> bool:
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade() -> None:
+    if _missing("crypto_prices_raw"):
+        op.create_table(
+            "crypto_prices_raw",
+            sa.Column("id", UUID(as_uuid=True), primary_key=True),
+            sa.Column("symbol", sa.String(20), nullable=False),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("current_price", sa.Float, nullable=False),
+            sa.Column("market_cap", sa.Float),
+            sa.Column("total_volume", sa.Float),
+            sa.Column("price_change_24h", sa.Float),
+            sa.Column("price_change_percentage_24h", sa.Float),
+            sa.Column("market_cap_rank", sa.Integer),
+            sa.Column("extracted_at", sa.DateTime, nullable=False),
+            sa.Column("created_at", sa.DateTime, nullable=False),
+            sa.Column("price_change_percentage_1h", sa.Float),
+            sa.Column("price_change_percentage_7d", sa.Float),
+            sa.Column("circulating_supply", sa.Float),
+            sa.Column("total_supply", sa.Float),
+            sa.Column("max_supply", sa.Float),
+            sa.Column("ath", sa.Float),
+            sa.Column("atl", sa.Float),
+            sa.Column("last_updated", sa.String(50)),
+            sa.UniqueConstraint(
+                "symbol", "extracted_at", name="uq_symbol_extracted_at"
+            ),
+        )
+        op.create_index("ix_crypto_prices_raw_symbol", "crypto_prices_raw", ["symbol"])
+        op.create_index(
+            "ix_crypto_prices_raw_extracted_at", "crypto_prices_raw", ["extracted_at"]
+        )
+        op.create_index(
+            "ix_crypto_prices_symbol_extracted_at",
+            "crypto_prices_raw",
+            ["symbol", "extracted_at"],
+        )
+
+    if _missing("pipeline_runs"):
+        op.create_table(
+            "pipeline_runs",
+            sa.Column("id", UUID(as_uuid=True), primary_key=True),
+            sa.Column("run_id", sa.String(100), nullable=False),
+            sa.Column("stage", sa.String(50), nullable=False),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("records_processed", sa.Integer),
+            sa.Column("error_message", sa.Text),
+            sa.Column("started_at", sa.DateTime, nullable=False),
+            sa.Column("completed_at", sa.DateTime),
+            sa.UniqueConstraint("run_id", "stage", name="uq_run_id_stage"),
+        )
+        op.create_index(
+            "ix_pipeline_runs_run_id_stage", "pipeline_runs", ["run_id", "stage"]
+        )
+
+    if _missing("backfill_checkpoints"):
+        op.create_table(
+            "backfill_checkpoints",
+            sa.Column("id", UUID(as_uuid=True), primary_key=True),
+            sa.Column("coin_id", sa.String(100), nullable=False),
+            sa.Column("window_start", sa.DateTime, nullable=False),
+            sa.Column("window_end", sa.DateTime, nullable=False),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("records_loaded", sa.Integer),
+            sa.Column("error_message", sa.Text),
+            sa.Column("updated_at", sa.DateTime, nullable=False),
+            sa.UniqueConstraint(
+                "coin_id", "window_start", "window_end", name="uq_backfill_window"
+            ),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("backfill_checkpoints")
+    op.drop_table("pipeline_runs")
+    op.drop_table("crypto_prices_raw")
@@ -0,0 +1,168 @@
+"""range-partition crypto_prices_raw on extracted_at
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+Rebuilds crypto_prices_raw as a table partitioned by RANGE (extracted_at),
+with one partition per month through PREMAKE_MONTHS ahead plus a default
+partition; partition maintenance takes over from there. The primary key
+becomes (id, extracted_at) because unique constraints on a partitioned
+table must include the partition key.
+Existing rows are copied into the new partitions; on a large history run
+this in a maintenance window, as the copy holds a lock on the old table.
+"""
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "id, symbol, name, current_price, market_cap, total_volume, "
+    "price_change_24h, price_change_percentage_24h, market_cap_rank, "
+    "extracted_at, created_at, price_change_percentage_1h, "
+    "price_change_percentage_7d, circulating_supply, total_supply, "
+    "max_supply, ath, atl, last_updated"
+)
+PREMAKE_MONTHS = 3
+INDEXES = (
+    ("ix_crypto_prices_raw_symbol", ["symbol"]),
+    ("ix_crypto_prices_raw_extracted_at", ["extracted_at"]),
+    ("ix_crypto_prices_symbol_extracted_at", ["symbol", "extracted_at"]),
+)
+
+
+def _columns():
+    return [
+        sa.Column("id", UUID(as_uuid=True), nullable=False),
+        sa.Column("symbol", sa.String(20), nullable=False),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("current_price", sa.Float, nullable=False),
+        sa.Column("market_cap", sa.Float),
+        sa.Column("total_volume", sa.Float),
+        sa.Column("price_change_24h", sa.Float),
+        sa.Column("price_change_percentage_24h", sa.Float),
+        sa.Column("market_cap_rank", sa.Integer),
+        sa.Column("extracted_at", sa.DateTime, nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+        sa.Column("price_change_percentage_1h", sa.Float),
+        sa.Column("price_change_percentage_7d", sa.Float),
+        sa.Column("circulating_supply", sa.Float),
+        sa.Column("total_supply", sa.Float),
+        sa.Column("max_supply", sa.Float),
+        sa.Column("ath", sa.Float),
+        sa.Column("atl", sa.Float),
+        sa.Column("last_updated", sa.String(50)),
+    ]
+
+
+def _drop_named_objects(table: str) -> None:
+    # Index and constraint names are schema-wide, so free them for the new table
+    op.drop_constraint("uq_symbol_extracted_at", table, type_="unique")
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def _create_indexes() -> None:
+    for name, columns in INDEXES:
+        op.create_index(name, "crypto_prices_raw", columns)
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(start: datetime) -> datetime:
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _create_partitions(since) -> None:
+    """Monthly partitions from ``since`` through PREMAKE_MONTHS ahead, named
+    crypto_prices_raw_pYYYYMM as partition maintenance expects."""
+    now = datetime.utcnow()
+    op.execute(
+        "CREATE TABLE crypto_prices_raw_default "
+        "PARTITION OF crypto_prices_raw DEFAULT"
+    )
+    start = _month_start(min(since or now, now))
+    last = _month_start(now)
+    for _ in range(PREMAKE_MONTHS):
+        last = _next_month(last)
+    while start <= last:
+        end = _next_month(start)
+        op.execute(
+            f"CREATE TABLE crypto_prices_raw_p{start:%Y%m} "
+            "PARTITION OF crypto_prices_raw "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    relkind = bind.execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": "crypto_prices_raw"},
+    ).scalar()
+    if relkind == "p":
+        # Fresh databases created from the current models are already done
+        return
+
+    op.rename_table("crypto_prices_raw", "crypto_prices_raw_unpartitioned")
+    op.execute(
+        "ALTER INDEX crypto_prices_raw_pkey "
+        "RENAME TO crypto_prices_raw_unpartitioned_pkey"
+    )
+    _drop_named_objects("crypto_prices_raw_unpartitioned")
+
+    op.create_table(
+        "crypto_prices_raw",
+        *_columns(),
+        sa.PrimaryKeyConstraint("id", "extracted_at", name="crypto_prices_raw_pkey"),
+        sa.UniqueConstraint("symbol", "extracted_at", name="uq_symbol_extracted_at"),
+        postgresql_partition_by="RANGE (extracted_at)",
+    )
+    _create_indexes()
+
+    oldest = bind.execute(
+        sa.text("SELECT min(extracted_at) FROM crypto_prices_raw_unpartitioned")
+    ).scalar()
+    _create_partitions(oldest)
+
+    op.execute(
+        f"INSERT INTO crypto_prices_raw ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM crypto_prices_raw_unpartitioned"
+    )
+    op.drop_table("crypto_prices_raw_unpartitioned")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "crypto_prices_raw_unpartitioned",
+        *_columns(),
+        sa.PrimaryKeyConstraint("id", name="crypto_prices_raw_unpartitioned_pkey"),
+    )
+    op.execute(
+        f"INSERT INTO crypto_prices_raw_unpartitioned ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM crypto_prices_raw"
+    )
+    # Dropping the parent drops every attached partition with it
+    op.drop_table("crypto_prices_raw")
+
+    op.rename_table("crypto_prices_raw_unpartitioned", "crypto_prices_raw")
+    op.execute(
+        "ALTER INDEX crypto_prices_raw_unpartitioned_pkey "
+        "RENAME TO crypto_prices_raw_pkey"
+    )
+    op.create_unique_constraint(
+        "uq_symbol_extracted_at", "crypto_prices_raw", ["symbol", "extracted_at"]
+    )
+    _create_indexes()
@@ -0,0 +1,272 @@
+"""compact price schema: coins dictionary and crypto_price_facts
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+Replaces crypto_prices_raw with crypto_price_facts, keyed by a small-int
+coin_id into the new coins dictionary instead of a UUID plus repeated
+symbol/name strings, with last_updated as timestamptz. The only B-tree is
+the (coin_id, extracted_at) primary key; time-range scans use a BRIN index
+on extracted_at. crypto_prices_raw becomes a view over the two tables.
+
+Rows are copied one day at a time, each day in its own transaction, so a
+large history never runs as one long transaction and an interrupted
+upgrade can simply be rerun: the schema steps are idempotent and the copy
+skips rows that are already there. The old table is only dropped once
+every row has been copied.
+"""
+import logging
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+BACKFILL_WINDOW = timedelta(days=1)
+PREMAKE_MONTHS = 3
+
+FACT_COLUMNS = (
+    "current_price, market_cap, total_volume, price_change_24h, "
+    "price_change_percentage_24h, market_cap_rank, extracted_at, created_at, "
+    "price_change_percentage_1h, price_change_percentage_7d, "
+    "circulating_supply, total_supply, max_supply, ath, atl"
+)
+LEGACY_INDEXES = (
+    ("ix_crypto_prices_raw_symbol", ["symbol"]),
+    ("ix_crypto_prices_raw_extracted_at", ["extracted_at"]),
+    ("ix_crypto_prices_symbol_extracted_at", ["symbol", "extracted_at"]),
+)
+CRYPTO_PRICES_RAW_VIEW_SQL = """
+CREATE OR REPLACE VIEW crypto_prices_raw AS
+SELECT
+    f.coin_id,
+    c.symbol,
+    c.name,
+    f.current_price,
+    f.market_cap,
+    f.total_volume,
+    f.price_change_24h,
+    f.price_change_percentage_24h,
+    f.market_cap_rank,
+    f.extracted_at,
+    f.created_at,
+    f.price_change_percentage_1h,
+    f.price_change_percentage_7d,
+    f.circulating_supply,
+    f.total_supply,
+    f.max_supply,
+    f.ath,
+    f.atl,
+    f.last_updated
+FROM crypto_price_facts f
+JOIN coins c ON c.coin_id = f.coin_id
+"""
+
+
+def _relkind(table: str):
+    return (
+        op.get_bind()
+        .execute(
+            sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": table},
+        )
+        .scalar()
+    )
+
+
+def _prefixed(alias: str) -> str:
+    return ", ".join(f"{alias}.{column}" for column in FACT_COLUMNS.split(", "))
+
+
+def _fact_columns():
+    return [
+        sa.Column("current_price", sa.Float, nullable=False),
+        sa.Column("market_cap", sa.Float),
+        sa.Column("total_volume", sa.Float),
+        sa.Column("price_change_24h", sa.Float),
+        sa.Column("price_change_percentage_24h", sa.Float),
+        sa.Column("market_cap_rank", sa.Integer),
+        sa.Column("extracted_at", sa.DateTime, nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime, nullable=False, server_default=sa.func.now()
+        ),
+        sa.Column("price_change_percentage_1h", sa.Float),
+        sa.Column("price_change_percentage_7d", sa.Float),
+        sa.Column("circulating_supply", sa.Float),
+        sa.Column("total_supply", sa.Float),
+        sa.Column("max_supply", sa.Float),
+        sa.Column("ath", sa.Float),
+        sa.Column("atl", sa.Float),
+    ]
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(start: datetime) -> datetime:
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _create_partitions(table: str, since) -> None:
+    """Monthly partitions of ``table`` from ``since`` through PREMAKE_MONTHS
+    ahead, named <table>_pYYYYMM as partition maintenance expects. Existing
+    ones are kept, so a rerun picks up where it stopped."""
+    now = datetime.utcnow()
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+    )
+    start = _month_start(min(since or now, now))
+    last = _month_start(now)
+    for _ in range(PREMAKE_MONTHS):
+        last = _next_month(last)
+    while start <= last:
+        end = _next_month(start)
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS {table}_p{start:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+
+
+def _copy_windows(bind, source: str, target: str, copy_sql: str) -> None:
+    """Run ``copy_sql`` once per BACKFILL_WINDOW of ``source``, committing
+    after each window."""
+    bounds = bind.execute(
+        sa.text(f"SELECT min(extracted_at), max(extracted_at) FROM {source}")
+    ).one()
+    if bounds[0] is None:
+        return
+    start = bounds[0].replace(hour=0, minute=0, second=0, microsecond=0)
+    copied = 0
+    with op.get_context().autocommit_block():
+        while start <= bounds[1]:
+            end = start + BACKFILL_WINDOW
+            result = bind.execute(sa.text(copy_sql), {"start": start, "end": end})
+            copied += result.rowcount
+            start = end
+    logger.info(f"Copied {copied} rows from {source} into {target}")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    legacy = _relkind("crypto_prices_raw") in ("r", "p")
+
+    if _relkind("coins") is None:
+        op.create_table(
+            "coins",
+            sa.Column("coin_id", sa.SmallInteger, primary_key=True, autoincrement=True),
+            sa.Column("symbol", sa.String(20), nullable=False, unique=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column(
+                "created_at", sa.DateTime, nullable=False, server_default=sa.func.now()
+            ),
+            sa.Column(
+                "updated_at", sa.DateTime, nullable=False, server_default=sa.func.now()
+            ),
+        )
+
+    if _relkind("crypto_price_facts") is None:
+        op.create_table(
+            "crypto_price_facts",
+            sa.Column(
+                "coin_id",
+                sa.SmallInteger,
+                sa.ForeignKey("coins.coin_id"),
+                nullable=False,
+            ),
+            *_fact_columns(),
+            sa.Column("last_updated", sa.DateTime(timezone=True)),
+            sa.PrimaryKeyConstraint(
+                "coin_id", "extracted_at", name="crypto_price_facts_pkey"
+            ),
+            postgresql_partition_by="RANGE (extracted_at)",
+        )
+        op.create_index(
+            "ix_crypto_price_facts_extracted_at_brin",
+            "crypto_price_facts",
+            ["extracted_at"],
+            postgresql_using="brin",
+        )
+
+    oldest = None
+    if legacy:
+        # Latest name wins for symbols that were renamed upstream
+        op.execute(
+            "INSERT INTO coins (symbol, name) "
+            "SELECT DISTINCT ON (symbol) symbol, name FROM crypto_prices_raw "
+            "ORDER BY symbol, extracted_at DESC "
+            "ON CONFLICT (symbol) DO NOTHING"
+        )
+        oldest = bind.execute(
+            sa.text("SELECT min(extracted_at) FROM crypto_prices_raw")
+        ).scalar()
+    _create_partitions("crypto_price_facts", oldest)
+
+    if legacy:
+        _copy_windows(
+            bind,
+            "crypto_prices_raw",
+            "crypto_price_facts",
+            f"INSERT INTO crypto_price_facts (coin_id, {FACT_COLUMNS}, last_updated) "
+            f"SELECT c.coin_id, {_prefixed('r')}, "
+            "CASE WHEN r.last_updated ~ '^\\d{4}-\\d{2}-\\d{2}' "
+            "THEN r.last_updated::timestamptz END "
+            "FROM crypto_prices_raw r JOIN coins c ON c.symbol = r.symbol "
+            "WHERE r.extracted_at >= :start AND r.extracted_at < :end "
+            "ON CONFLICT (coin_id, extracted_at) DO NOTHING",
+        )
+        # Dropping the parent drops every attached partition with it
+        op.drop_table("crypto_prices_raw")
+
+    op.execute(CRYPTO_PRICES_RAW_VIEW_SQL)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    op.execute("DROP VIEW IF EXISTS crypto_prices_raw")
+
+    op.create_table(
+        "crypto_prices_raw",
+        sa.Column("id", UUID(as_uuid=True), nullable=False),
+        sa.Column("symbol", sa.String(20), nullable=False),
+        sa.Column("name", sa.String(100), nullable=False),
+        *_fact_columns(),
+        sa.Column("last_updated", sa.String(50)),
+        sa.PrimaryKeyConstraint("id", "extracted_at", name="crypto_prices_raw_pkey"),
+        sa.UniqueConstraint("symbol", "extracted_at", name="uq_symbol_extracted_at"),
+        postgresql_partition_by="RANGE (extracted_at)",
+    )
+    for name, columns in LEGACY_INDEXES:
+        op.create_index(name, "crypto_prices_raw", columns)
+
+    oldest = bind.execute(
+        sa.text("SELECT min(extracted_at) FROM crypto_price_facts")
+    ).scalar()
+    _create_partitions("crypto_prices_raw", oldest)
+
+    _copy_windows(
+        bind,
+        "crypto_price_facts",
+        "crypto_prices_raw",
+        f"INSERT INTO crypto_prices_raw (id, symbol, name, {FACT_COLUMNS}, "
+        "last_updated) "
+        f"SELECT gen_random_uuid(), c.symbol, c.name, {_prefixed('f')}, "
+        "to_char(f.last_updated AT TIME ZONE 'UTC', "
+        '\'YYYY-MM-DD"T"HH24:MI:SS.MS"Z"\') '
+        "FROM crypto_price_facts f JOIN coins c ON c.coin_id = f.coin_id "
+        "WHERE f.extracted_at >= :start AND f.extracted_at < :end "
+        "ON CONFLICT ON CONSTRAINT uq_symbol_extracted_at DO NOTHING",
+    )
+    op.drop_table("crypto_price_facts")
+    op.drop_table("coins")
@@ -0,0 +1,119 @@
+"""append-only pipeline_run_events ledger behind a pipeline_runs view
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+
+Run tracking moves from upserts into pipeline_runs to an append-only
+pipeline_run_events ledger that also records duration, attempts and bytes
+fetched per stage. pipeline_runs becomes a view returning the latest event
+per (run_id, stage), so its readers keep working. Existing rows are copied
+over as one event each.
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "run_id, stage, status, records_processed, error_message, "
+    "started_at, completed_at"
+)
+PIPELINE_RUNS_VIEW_SQL = """
+CREATE OR REPLACE VIEW pipeline_runs AS
+SELECT DISTINCT ON (run_id, stage)
+    id,
+    run_id,
+    stage,
+    status,
+    records_processed,
+    error_message,
+    started_at,
+    completed_at,
+    duration_seconds,
+    attempts,
+    bytes_fetched
+FROM pipeline_run_events
+ORDER BY run_id, stage, id DESC
+"""
+
+
+def _relkind(table: str):
+    return (
+        op.get_bind()
+        .execute(
+            sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": table},
+        )
+        .scalar()
+    )
+
+
+def upgrade() -> None:
+    if _relkind("pipeline_run_events") is None:
+        op.create_table(
+            "pipeline_run_events",
+            sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+            sa.Column("run_id", sa.String(100), nullable=False),
+            sa.Column("stage", sa.String(50), nullable=False),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("records_processed", sa.Integer),
+            sa.Column("error_message", sa.Text),
+            sa.Column("started_at", sa.DateTime, nullable=False),
+            sa.Column("completed_at", sa.DateTime),
+            sa.Column("duration_seconds", sa.Float),
+            sa.Column("attempts", sa.Integer),
+            sa.Column("bytes_fetched", sa.BigInteger),
+            sa.Column(
+                "recorded_at", sa.DateTime, nullable=False, server_default=sa.func.now()
+            ),
+        )
+        op.create_index(
+            "ix_pipeline_run_events_run_id_stage_id",
+            "pipeline_run_events",
+            ["run_id", "stage", "id"],
+        )
+
+    if _relkind("pipeline_runs") == "r":
+        op.execute(
+            f"INSERT INTO pipeline_run_events ({COLUMNS}, duration_seconds) "
+            f"SELECT {COLUMNS}, "
+            "EXTRACT(EPOCH FROM completed_at - started_at) "
+            "FROM pipeline_runs ORDER BY started_at"
+        )
+        op.drop_table("pipeline_runs")
+
+    op.execute(PIPELINE_RUNS_VIEW_SQL)
+
+
+def downgrade() -> None:
+    op.create_table(
+        "pipeline_runs_legacy",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("run_id", sa.String(100), nullable=False),
+        sa.Column("stage", sa.String(50), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("records_processed", sa.Integer),
+        sa.Column("error_message", sa.Text),
+        sa.Column("started_at", sa.DateTime, nullable=False),
+        sa.Column("completed_at", sa.DateTime),
+        sa.UniqueConstraint("run_id", "stage", name="uq_run_id_stage"),
+    )
+    op.execute(
+        f"INSERT INTO pipeline_runs_legacy (id, {COLUMNS}) "
+        f"SELECT gen_random_uuid(), {COLUMNS} FROM pipeline_runs"
+    )
+    op.execute("DROP VIEW pipeline_runs")
+    op.drop_table("pipeline_run_events")
+
+    op.rename_table("pipeline_runs_legacy", "pipeline_runs")
+    op.execute("ALTER INDEX pipeline_runs_legacy_pkey RENAME TO pipeline_runs_pkey")
+    op.create_index(
+        "ix_pipeline_runs_run_id_stage", "pipeline_runs", ["run_id", "stage"]
+    )
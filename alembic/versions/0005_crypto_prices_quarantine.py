@@ -0,0 +1,38 @@
+"""crypto_prices_quarantine for rows rejected during a load
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+
+When a price batch fails on a constraint or data error, the loaders bisect
+it to find the offending rows, load the rest and store the rejected rows
+here with the error and the run that produced them.
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "crypto_prices_quarantine",
+        sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column("run_id", sa.String(100)),
+        sa.Column("error_code", sa.String(5)),
+        sa.Column("error_message", sa.Text, nullable=False),
+        sa.Column("payload", JSONB, nullable=False),
+        sa.Column(
+            "quarantined_at", sa.DateTime, nullable=False, server_default=sa.func.now()
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("crypto_prices_quarantine")
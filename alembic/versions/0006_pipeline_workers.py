@@ -0,0 +1,37 @@
+"""pipeline_workers lease table for sharding coins across workers
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+
+With SHARDING_ENABLED, each pipeline replica keeps a row here with a lease
+it renews while running. Replicas split the coin universe between the
+workers whose lease has not expired.
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pipeline_workers",
+        sa.Column("worker_id", sa.String(100), primary_key=True),
+        sa.Column(
+            "joined_at", sa.DateTime, nullable=False, server_default=sa.func.now()
+        ),
+        sa.Column(
+            "renewed_at", sa.DateTime, nullable=False, server_default=sa.func.now()
+        ),
+        sa.Column("expires_at", sa.DateTime, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("pipeline_workers")
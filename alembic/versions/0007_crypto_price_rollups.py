@@ -0,0 +1,117 @@
+"""crypto_price_rollups with hourly and daily OHLC maintained at load time
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00
+
+The loaders merge each batch's partial aggregates (open, high, low, close,
+count, sum, sum of squares) into per-coin hourly and daily buckets, so
+fresh aggregates cost O(new rows) instead of a rescan of the history. The
+crypto_price_ohlc view adds symbols, means and standard deviations. Buckets
+for existing history are built from the fact table.
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Buckets for the whole history, from the fact table
+BUILD_ROLLUPS_SQL = """
+WITH fresh AS (
+    SELECT f.coin_id, g.grain, date_trunc(g.grain, f.extracted_at) AS bucket_start,
+           f.extracted_at, f.current_price
+    FROM crypto_price_facts f
+    CROSS JOIN (VALUES ('hour'), ('day')) AS g(grain)
+)
+INSERT INTO crypto_price_rollups AS r (
+    coin_id, grain, bucket_start, open_at, open_price, close_at, close_price,
+    high_price, low_price, price_count, price_sum, price_sum_squares
+)
+SELECT
+    coin_id,
+    grain,
+    bucket_start,
+    min(extracted_at),
+    (array_agg(current_price ORDER BY extracted_at))[1],
+    max(extracted_at),
+    (array_agg(current_price ORDER BY extracted_at DESC))[1],
+    max(current_price),
+    min(current_price),
+    count(*),
+    sum(current_price),
+    sum(current_price * current_price)
+FROM fresh
+GROUP BY coin_id, grain, bucket_start
+"""
+
+CRYPTO_PRICE_OHLC_VIEW_SQL = """
+CREATE OR REPLACE VIEW crypto_price_ohlc AS
+SELECT
+    r.coin_id,
+    c.symbol,
+    c.name,
+    r.grain,
+    r.bucket_start,
+    r.open_price,
+    r.high_price,
+    r.low_price,
+    r.close_price,
+    r.price_count,
+    r.price_sum / r.price_count AS avg_price,
+    CASE WHEN r.price_count > 1 THEN sqrt(greatest(
+        (r.price_sum_squares - r.price_sum * r.price_sum / r.price_count)
+        / (r.price_count - 1),
+        0
+    )) END AS price_stddev,
+    r.open_at,
+    r.close_at,
+    r.updated_at
+FROM crypto_price_rollups r
+JOIN coins c ON c.coin_id = r.coin_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "crypto_price_rollups",
+        sa.Column(
+            "coin_id",
+            sa.SmallInteger,
+            sa.ForeignKey("coins.coin_id"),
+            primary_key=True,
+        ),
+        sa.Column("grain", sa.String(4), primary_key=True),
+        sa.Column("bucket_start", sa.DateTime, primary_key=True),
+        sa.Column("open_at", sa.DateTime, nullable=False),
+        sa.Column("open_price", sa.Float, nullable=False),
+        sa.Column("close_at", sa.DateTime, nullable=False),
+        sa.Column("close_price", sa.Float, nullable=False),
+        sa.Column("high_price", sa.Float, nullable=False),
+        sa.Column("low_price", sa.Float, nullable=False),
+        sa.Column("price_count", sa.BigInteger, nullable=False),
+        sa.Column("price_sum", sa.Float, nullable=False),
+        sa.Column("price_sum_squares", sa.Float, nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime, nullable=False, server_default=sa.func.now()
+        ),
+    )
+    op.create_index(
+        "ix_crypto_price_rollups_grain_bucket",
+        "crypto_price_rollups",
+        ["grain", "bucket_start"],
+    )
+    op.execute(BUILD_ROLLUPS_SQL)
+    op.execute(CRYPTO_PRICE_OHLC_VIEW_SQL)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW IF EXISTS crypto_price_ohlc")
+    op.drop_index(
+        "ix_crypto_price_rollups_grain_bucket", table_name="crypto_price_rollups"
+    )
+    op.drop_table("crypto_price_rollups")
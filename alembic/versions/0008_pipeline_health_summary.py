@@ -0,0 +1,128 @@
+"""pipeline_health_* summary tables maintained on every write
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00
+
+Health checks ran three aggregates over pipeline_runs and the last 24 hours
+of crypto_prices_raw on every call, so their cost grew with the ingest
+rate. The loaders now keep each coin's latest extraction and five-minute
+price counts current, and the run ledger the stage outcome counts and the
+latest event per stage, so a check reads one small row. The summary is
+built here from the fact table and the ledger.
+"""
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+# Five-minute buckets over the last 24 hours
+BUCKET = timedelta(minutes=5)
+HEALTH_WINDOW = timedelta(hours=24)
+
+BUILD_COINS_SQL = """
+INSERT INTO pipeline_health_coins (coin_id, extracted_at, current_price)
+SELECT DISTINCT ON (coin_id) coin_id, extracted_at, current_price
+FROM crypto_price_facts
+ORDER BY coin_id, extracted_at DESC
+"""
+
+BUILD_PRICE_BUCKETS_SQL = """
+INSERT INTO pipeline_health_buckets
+    (bucket_start, series, event_count, valid_count, value_sum)
+SELECT
+    date_bin('300 seconds', extracted_at, TIMESTAMP '1970-01-01'),
+    'prices',
+    count(*),
+    count(*) FILTER (WHERE current_price > 0),
+    sum(current_price)
+FROM crypto_price_facts
+WHERE extracted_at >= :since
+GROUP BY 1
+"""
+
+BUILD_RUN_BUCKETS_SQL = """
+INSERT INTO pipeline_health_buckets
+    (bucket_start, series, event_count, valid_count, value_sum)
+SELECT
+    date_bin('300 seconds', started_at, TIMESTAMP '1970-01-01'),
+    stage || '.' || status,
+    count(*),
+    0,
+    0
+FROM pipeline_run_events
+WHERE started_at >= :since AND status <> 'running'
+GROUP BY 1, 2
+"""
+
+BUILD_STAGES_SQL = """
+INSERT INTO pipeline_health_stages
+    (stage, status, run_id, records_processed, error_message, completed_at)
+SELECT DISTINCT ON (stage)
+    stage, status, run_id, records_processed, error_message,
+    coalesce(completed_at, started_at)
+FROM pipeline_run_events
+ORDER BY stage, id DESC
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pipeline_health_coins",
+        sa.Column(
+            "coin_id",
+            sa.SmallInteger,
+            sa.ForeignKey("coins.coin_id"),
+            primary_key=True,
+        ),
+        sa.Column("extracted_at", sa.DateTime, nullable=False),
+        sa.Column("current_price", sa.Float, nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime, nullable=False, server_default=sa.func.now()
+        ),
+    )
+    op.create_table(
+        "pipeline_health_buckets",
+        sa.Column("bucket_start", sa.DateTime, primary_key=True),
+        sa.Column("series", sa.String(80), primary_key=True),
+        sa.Column("event_count", sa.BigInteger, nullable=False),
+        sa.Column("valid_count", sa.BigInteger, nullable=False),
+        sa.Column("value_sum", sa.Float, nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime, nullable=False, server_default=sa.func.now()
+        ),
+    )
+    op.create_table(
+        "pipeline_health_stages",
+        sa.Column("stage", sa.String(50), primary_key=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("run_id", sa.String(100), nullable=False),
+        sa.Column("records_processed", sa.Integer),
+        sa.Column("error_message", sa.Text),
+        sa.Column("completed_at", sa.DateTime, nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime, nullable=False, server_default=sa.func.now()
+        ),
+    )
+
+    # The window starts on a bucket boundary, as the health checks read it
+    epoch = datetime(1970, 1, 1)
+    since = datetime.utcnow() - HEALTH_WINDOW
+    since = epoch + (since - epoch) // BUCKET * BUCKET
+    op.execute(BUILD_COINS_SQL)
+    op.execute(sa.text(BUILD_PRICE_BUCKETS_SQL).bindparams(since=since))
+    op.execute(sa.text(BUILD_RUN_BUCKETS_SQL).bindparams(since=since))
+    op.execute(BUILD_STAGES_SQL)
+
+
+def downgrade() -> None:
+    op.drop_table("pipeline_health_stages")
+    op.drop_table("pipeline_health_buckets")
+    op.drop_table("pipeline_health_coins")
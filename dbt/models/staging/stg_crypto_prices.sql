@@ -5,7 +5,8 @@
 
 WITH source_data AS (
     SELECT
-        id AS price_id,
+        {{ dbt_utils.generate_surrogate_key(['coin_id', 'extracted_at']) }} AS price_id,
+        coin_id,
         current_price AS price_usd,
         market_cap,
         total_volume AS volume_24h,
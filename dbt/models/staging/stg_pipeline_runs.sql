@@ -7,8 +7,13 @@ SELECT
     error_message,
     started_at,
     completed_at,
-    CASE
-        WHEN completed_at IS NOT NULL
-            THEN EXTRACT(EPOCH FROM (completed_at - started_at))
-    END AS duration_seconds
+    COALESCE(
+        duration_seconds,
+        CASE
+            WHEN completed_at IS NOT NULL
+                THEN EXTRACT(EPOCH FROM (completed_at - started_at))
+        END
+    ) AS duration_seconds,
+    attempts,
+    bytes_fetched
 FROM {{ ref('pipeline_runs') }}
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark WarehouseLoader load methods against a live PostgreSQL.
+
+Loads synthetic price batches through each LOAD_METHOD and reports rows/sec.
+Benchmark rows use BENCH* symbols and are deleted after every trial, but run
+this against a scratch database rather than production.
+
+Usage: python scripts/benchmark_loader.py [--sizes 10000,100000,1000000]
+                                          [--methods insert,copy,upsert]
+"""
+import argparse
+import logging
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import text
+
+from src.config.settings import DatabaseConfig
+from src.loaders.warehouse_loader import WarehouseLoader
+from src.models.batch import PriceBatch
+
+SYMBOL_COUNT = 1000
+
+
+def make_batch(rows: int) -> PriceBatch:
+    """Build a batch with unique (symbol, extracted_at) pairs."""
+    rng = np.random.default_rng(42)
+    symbols = np.array([f"BENCH{i:04d}" for i in range(SYMBOL_COUNT)], dtype=object)
+    base = np.datetime64(datetime(2000, 1, 1), "us")
+    index = np.arange(rows)
+    return PriceBatch.from_arrays(
+        rows,
+        {
+            "symbol": symbols[index % SYMBOL_COUNT],
+            "name": "Benchmark Coin",
+            "current_price": rng.uniform(0.01, 70000, rows),
+            "market_cap": rng.uniform(1e6, 1e12, rows),
+            "total_volume": rng.uniform(1e3, 1e10, rows),
+            "price_change_24h": rng.normal(0, 100, rows),
+            "price_change_percentage_24h": rng.normal(0, 5, rows),
+            "market_cap_rank": index % SYMBOL_COUNT + 1,
+            "last_updated": "2000-01-01T00:00:00.000Z",
+        },
+        base + (index // SYMBOL_COUNT) * np.timedelta64(timedelta(minutes=1)),
+    )
+
+
+def cleanup(loader: WarehouseLoader) -> None:
+    with loader.get_session() as session:
+        session.execute(
+            text(
+                "DELETE FROM crypto_price_facts WHERE coin_id IN "
+                "(SELECT coin_id FROM coins WHERE symbol LIKE 'BENCH%')"
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--methods", default="insert,copy,upsert")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    methods = [m.strip() for m in args.methods.split(",")]
+    base_config = DatabaseConfig()
+    WarehouseLoader(base_config).create_tables()
+
+    print(f"{'rows':>10}  {'method':<8}  {'seconds':>8}  {'rows/sec':>10}")
+    for size in sizes:
+        batch = make_batch(size)
+        for method in methods:
+            loader = WarehouseLoader(replace(base_config, load_method=method))
+            cleanup(loader)
+            started = time.perf_counter()
+            loader.bulk_insert_crypto_prices(batch)
+            elapsed = time.perf_counter() - started
+            cleanup(loader)
+            print(f"{size:>10}  {method:<8}  {elapsed:>8.2f}  {size / elapsed:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
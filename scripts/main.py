@@ -2,13 +2,21 @@
 """
 Main entry point for the Crypto Data Pipeline.
 """
+import argparse
 import asyncio
 import logging
 import os
+import signal
 import sys
+from datetime import date, timedelta
 from pathlib import Path
 
 from src.config.settings import DatabaseConfig, PipelineConfig
+from src.extractors.crypto_extractor import CryptoDataExtractor
+from src.loaders.sinks import build_loader, call_loader, close_loader
+from src.monitoring.health_server import HealthServer
+from src.monitoring.metrics import start_metrics_server
+from src.pipeline.backfill import BackfillEngine, parse_window_bounds
 from src.pipeline.orchestrator import CryptoPipelineOrchestrator
 from src.scheduler.job_scheduler import PipelineScheduler
 
@@ -28,7 +36,10 @@ async def run_manual_extraction():
     logger.info("Starting manual extraction...")
 
     orchestrator = CryptoPipelineOrchestrator(PipelineConfig(), DatabaseConfig())
-    result = await orchestrator.run_extraction_pipeline()
+    try:
+        result = await orchestrator.run_extraction_pipeline()
+    finally:
+        await orchestrator.close()
 
     logger.info(f"Extraction completed with result: {result}")
     return result
@@ -42,15 +53,116 @@ def run_scheduled_pipeline():
     config = PipelineConfig()
     db_config = DatabaseConfig()
     orchestrator = CryptoPipelineOrchestrator(config, db_config)
+    # On a shared port the health server answers /metrics too
+    if config.metrics_port != config.health_port:
+        start_metrics_server(config.metrics_port)
 
-    scheduler = PipelineScheduler(orchestrator, config.extraction_interval_minutes)
+    scheduler = PipelineScheduler(orchestrator, config)
     scheduler.schedule_pipeline()
+    if config.health_port:
+        scheduler.health_server = HealthServer(
+            scheduler.health_snapshot,
+            config.health_port,
+            config.health_refresh_seconds,
+        )
+
+    async def run_until_stopped():
+        # docker stop sends SIGTERM: let the run in flight finish
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, scheduler.stop)
+        await scheduler.start()
 
     try:
-        scheduler.start()
+        asyncio.run(run_until_stopped())
     except KeyboardInterrupt:
         logger.info("Pipeline scheduler stopped by user")
-        scheduler.stop()
+
+
+async def run_backfill(argv):
+    """Backfill historical prices for a date range"""
+    logger = logging.getLogger(__name__)
+    parser = argparse.ArgumentParser(prog="main.py backfill")
+    parser.add_argument("--start", required=True, help="ISO start date (inclusive)")
+    parser.add_argument("--end", help="ISO end date (exclusive, default now)")
+    parser.add_argument(
+        "--coins", help="Comma-separated CoinGecko ids (default CRYPTOCURRENCIES)"
+    )
+    args = parser.parse_args(argv)
+
+    config = PipelineConfig()
+    start, end = parse_window_bounds(args.start, args.end)
+    coin_ids = (
+        [c.strip() for c in args.coins.split(",") if c.strip()]
+        if args.coins
+        else config.cryptocurrencies
+    )
+    logger.info(f"Starting backfill for {len(coin_ids)} coins from {start} to {end}")
+
+    loader = build_loader(DatabaseConfig())
+    try:
+        async with CryptoDataExtractor(config) as extractor:
+            engine = BackfillEngine(config, loader, extractor)
+            result = await engine.run(coin_ids, start, end)
+    finally:
+        await close_loader(loader)
+
+    logger.info(f"Backfill completed with result: {result}")
+    return result
+
+
+async def run_partition_maintenance():
+    """Create upcoming price partitions and apply retention"""
+    logger = logging.getLogger(__name__)
+    loader = build_loader(DatabaseConfig())
+    try:
+        result = await call_loader(loader.maintain_partitions)
+    finally:
+        await close_loader(loader)
+
+    logger.info(f"Partition maintenance completed with result: {result}")
+    return result
+
+
+async def run_rollup_rebuild(argv):
+    """Recompute the hourly and daily OHLC rollups of a date range"""
+    logger = logging.getLogger(__name__)
+    parser = argparse.ArgumentParser(prog="main.py rollups")
+    parser.add_argument("--start", required=True, help="ISO start date (inclusive)")
+    parser.add_argument(
+        "--end", help="ISO end date (exclusive, default the day after --start)"
+    )
+    args = parser.parse_args(argv)
+
+    start = date.fromisoformat(args.start)
+    end = date.fromisoformat(args.end) if args.end else start + timedelta(days=1)
+    loader = build_loader(DatabaseConfig())
+    try:
+        buckets = await call_loader(loader.rebuild_price_rollups, start, end)
+    finally:
+        await close_loader(loader)
+
+    result = {"start": start.isoformat(), "end": end.isoformat(), "buckets": buckets}
+    logger.info(f"Rollup rebuild completed with result: {result}")
+    return result
+
+
+def run_lake_compaction(argv):
+    """Merge the Parquet lake's small files into one file per day and symbol"""
+    from src.loaders.parquet_sink import ParquetSink
+
+    logger = logging.getLogger(__name__)
+    parser = argparse.ArgumentParser(prog="main.py compact")
+    parser.add_argument(
+        "--before", help="Compact days before this ISO date (default today, UTC)"
+    )
+    args = parser.parse_args(argv)
+
+    db_config = DatabaseConfig()
+    sink = ParquetSink(db_config.lake_dir, db_config.parquet_compression)
+    before = date.fromisoformat(args.before) if args.before else None
+    result = sink.compact(before)
+
+    logger.info(f"Lake compaction completed with result: {result}")
+    return result
 
 
 def main():
@@ -65,9 +177,20 @@ def main():
             asyncio.run(run_manual_extraction())
         elif command == "schedule":
             run_scheduled_pipeline()
+        elif command == "backfill":
+            asyncio.run(run_backfill(sys.argv[2:]))
+        elif command == "partitions":
+            asyncio.run(run_partition_maintenance())
+        elif command == "compact":
+            run_lake_compaction(sys.argv[2:])
+        elif command == "rollups":
+            asyncio.run(run_rollup_rebuild(sys.argv[2:]))
         else:
             logger.error(f"Unknown command: {command}")
-            logger.info("Usage: python main.py [manual|schedule]")
+            logger.info(
+                "Usage: python main.py "
+                "[manual|schedule|backfill|partitions|compact|rollups]"
+            )
             sys.exit(1)
     else:
         asyncio.run(run_manual_extraction())
@@ -1,7 +1,8 @@
 import logging
 import os
+import socket
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from dotenv import load_dotenv
 
@@ -10,6 +11,84 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 
+def _env_bool(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def _parse_duration(text: str) -> float:
+    """Seconds in ``15``, ``15s``, ``15m`` or ``1h``."""
+    text = text.strip().lower()
+    if text[-1:] in _DURATION_UNITS:
+        return float(text[:-1]) * _DURATION_UNITS[text[-1]]
+    return float(text)
+
+
+@dataclass(frozen=True)
+class PollingTier:
+    """A group of coins refreshed on its own cadence: either explicit
+    CoinGecko ids or a market-cap rank range, inclusive. Lower ``priority``
+    values are served first when a poll has to leave tiers for later."""
+
+    name: str
+    interval_seconds: float
+    priority: int = 0
+    coins: Tuple[str, ...] = ()
+    ranks: Optional[Tuple[int, int]] = None
+
+    def __post_init__(self):
+        if self.interval_seconds <= 0:
+            raise ValueError(f"Polling tier {self.name!r} needs a positive interval")
+        if bool(self.coins) == (self.ranks is not None):
+            raise ValueError(
+                f"Polling tier {self.name!r} needs either coins or ranks, not both"
+            )
+        if self.ranks is not None and not (1 <= self.ranks[0] <= self.ranks[1]):
+            raise ValueError(f"Polling tier {self.name!r} has an invalid rank range")
+
+
+def parse_polling_tiers(text: str) -> List[PollingTier]:
+    """Tiers from ``name:key=value:...`` entries separated by ``;``.
+
+    Keys are ``coins`` (comma-separated ids) or ``ranks`` (``first-last``),
+    ``every`` (``15s``, ``15m``, ``1h``) and an optional ``priority``, e.g.
+    ``top:ranks=1-10:every=15s;tail:ranks=11-250:every=15m:priority=1``.
+    """
+    tiers = []
+    for entry in text.split(";"):
+        if not entry.strip():
+            continue
+        name, *pairs = (part.strip() for part in entry.split(":"))
+        options = {}
+        for pair in pairs:
+            key, sep, value = pair.partition("=")
+            if not sep or key not in ("coins", "ranks", "every", "priority"):
+                raise ValueError(f"POLLING_TIERS: unknown option {pair!r} in {name!r}")
+            options[key] = value.strip()
+        if "every" not in options:
+            raise ValueError(f"POLLING_TIERS: tier {name!r} needs every=")
+        ranks = None
+        if "ranks" in options:
+            first, _, last = options["ranks"].partition("-")
+            ranks = (int(first), int(last or first))
+        tiers.append(
+            PollingTier(
+                name=name,
+                interval_seconds=_parse_duration(options["every"]),
+                priority=int(options.get("priority", "0")),
+                coins=tuple(
+                    c.strip() for c in options.get("coins", "").split(",") if c.strip()
+                ),
+                ranks=ranks,
+            )
+        )
+    if len({tier.name for tier in tiers}) != len(tiers):
+        raise ValueError("POLLING_TIERS: tier names must be unique")
+    return tiers
+
+
 @dataclass
 class DatabaseConfig:
     host: str = field(default_factory=lambda: os.environ["DB_HOST"])
@@ -18,29 +97,237 @@ class DatabaseConfig:
     user: str = field(default_factory=lambda: os.environ["DB_USER"])
     password: str = field(default_factory=lambda: os.environ["DB_PASSWORD"])
     batch_size: int = field(default_factory=lambda: int(os.getenv("BATCH_SIZE", "100")))
+    load_method: str = field(default_factory=lambda: os.getenv("LOAD_METHOD", "insert"))
+    upsert_action: str = field(
+        default_factory=lambda: os.getenv("UPSERT_ACTION", "nothing")
+    )
+    copy_chunk_rows: int = field(
+        default_factory=lambda: int(os.getenv("COPY_CHUNK_ROWS", "50000"))
+    )
+    copy_spool_max_bytes: int = field(
+        default_factory=lambda: int(os.getenv("COPY_SPOOL_MAX_BYTES", "67108864"))
+    )
+    loader_backend: str = field(
+        default_factory=lambda: os.getenv("LOADER_BACKEND", "sync")
+    )
+    partition_interval: str = field(
+        default_factory=lambda: os.getenv("PARTITION_INTERVAL", "month")
+    )
+    partition_premake: int = field(
+        default_factory=lambda: int(os.getenv("PARTITION_PREMAKE", "3"))
+    )
+    partition_retention_days: int = field(
+        default_factory=lambda: int(os.getenv("PARTITION_RETENTION_DAYS", "0"))
+    )
+    partition_retention_action: str = field(
+        default_factory=lambda: os.getenv("PARTITION_RETENTION_ACTION", "detach")
+    )
+    load_sinks: List[str] = field(
+        default_factory=lambda: [
+            s.strip()
+            for s in os.getenv("LOAD_SINKS", "warehouse").split(",")
+            if s.strip()
+        ]
+    )
+    lake_dir: str = field(
+        default_factory=lambda: os.getenv("LAKE_DIR", "/app/data/lake")
+    )
+    parquet_compression: str = field(
+        default_factory=lambda: os.getenv("PARQUET_COMPRESSION", "zstd")
+    )
+    rollups_enabled: bool = field(default_factory=lambda: _env_bool("ROLLUPS_ENABLED"))
 
     def __post_init__(self):
         if not (1 <= self.port <= 65535):
             raise ValueError("DB_PORT must be between 1 and 65535")
         if self.batch_size <= 0:
             raise ValueError("BATCH_SIZE must be positive")
+        if self.load_method not in ("insert", "copy", "upsert"):
+            raise ValueError("LOAD_METHOD must be 'insert', 'copy' or 'upsert'")
+        if self.upsert_action not in ("nothing", "update"):
+            raise ValueError("UPSERT_ACTION must be 'nothing' or 'update'")
+        if self.copy_chunk_rows <= 0:
+            raise ValueError("COPY_CHUNK_ROWS must be positive")
+        if self.loader_backend not in ("sync", "async"):
+            raise ValueError("LOADER_BACKEND must be 'sync' or 'async'")
+        if self.partition_interval not in ("day", "month"):
+            raise ValueError("PARTITION_INTERVAL must be 'day' or 'month'")
+        if self.partition_premake < 0:
+            raise ValueError("PARTITION_PREMAKE must be non-negative")
+        if self.partition_retention_days < 0:
+            raise ValueError("PARTITION_RETENTION_DAYS must be non-negative")
+        if self.partition_retention_action not in ("detach", "drop"):
+            raise ValueError("PARTITION_RETENTION_ACTION must be 'detach' or 'drop'")
+        if not self.load_sinks or not set(self.load_sinks) <= {"warehouse", "parquet"}:
+            raise ValueError(
+                "LOAD_SINKS must list 'warehouse' and/or 'parquet', comma-separated"
+            )
+        if self.parquet_compression not in (
+            "snappy",
+            "zstd",
+            "gzip",
+            "brotli",
+            "lz4",
+            "none",
+        ):
+            raise ValueError(
+                "PARQUET_COMPRESSION must be snappy, zstd, gzip, brotli, lz4 or none"
+            )
 
     @property
     def connection_string(self) -> str:
         return f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
 
+    @property
+    def async_connection_string(self) -> str:
+        return f"postgresql+asyncpg://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
+
 
 @dataclass
 class PipelineConfig:
     extraction_interval_minutes: int = field(
         default_factory=lambda: int(os.getenv("EXTRACTION_INTERVAL_MINUTES", "60"))
     )
+    # 0 falls back to EXTRACTION_INTERVAL_MINUTES
+    schedule_interval_seconds: int = field(
+        default_factory=lambda: int(os.getenv("SCHEDULE_INTERVAL_SECONDS", "0"))
+    )
+    schedule_cron: str = field(
+        default_factory=lambda: os.getenv("SCHEDULE_CRON", "").strip()
+    )
+    schedule_jitter_seconds: float = field(
+        default_factory=lambda: float(os.getenv("SCHEDULE_JITTER_SECONDS", "0"))
+    )
+    schedule_overlap_policy: str = field(
+        default_factory=lambda: os.getenv("SCHEDULE_OVERLAP_POLICY", "skip")
+    )
+    schedule_missed_policy: str = field(
+        default_factory=lambda: os.getenv("SCHEDULE_MISSED_POLICY", "skip")
+    )
+    schedule_max_catchup: int = field(
+        default_factory=lambda: int(os.getenv("SCHEDULE_MAX_CATCHUP", "3"))
+    )
+    # Empty polls the whole universe on the schedule above
+    polling_tiers: List[PollingTier] = field(
+        default_factory=lambda: parse_polling_tiers(os.getenv("POLLING_TIERS", ""))
+    )
+    polling_max_requests: int = field(
+        default_factory=lambda: int(os.getenv("POLLING_MAX_REQUESTS", "0"))
+    )
+    polling_pack_ahead_seconds: float = field(
+        default_factory=lambda: float(os.getenv("POLLING_PACK_AHEAD_SECONDS", "15"))
+    )
+    leader_election: bool = field(default_factory=lambda: _env_bool("LEADER_ELECTION"))
+    leader_lock_name: str = field(
+        default_factory=lambda: os.getenv(
+            "LEADER_LOCK_NAME", "crypto-pipeline-scheduler"
+        )
+    )
+    leader_poll_seconds: float = field(
+        default_factory=lambda: float(os.getenv("LEADER_POLL_SECONDS", "5"))
+    )
     batch_size: int = field(default_factory=lambda: int(os.getenv("BATCH_SIZE", "100")))
     max_retries: int = field(default_factory=lambda: int(os.getenv("MAX_RETRIES", "3")))
     timeout_seconds: int = field(
         default_factory=lambda: int(os.getenv("TIMEOUT_SECONDS", "30"))
     )
     cryptocurrencies: Optional[List[str]] = field(default=None)
+    top_n_coins: int = field(default_factory=lambda: int(os.getenv("TOP_N_COINS", "0")))
+    page_size: int = field(default_factory=lambda: int(os.getenv("PAGE_SIZE", "250")))
+    max_concurrent_requests: int = field(
+        default_factory=lambda: int(os.getenv("MAX_CONCURRENT_REQUESTS", "5"))
+    )
+    rate_limit_per_minute: int = field(
+        default_factory=lambda: int(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
+    )
+    rate_limit_burst: int = field(
+        default_factory=lambda: int(os.getenv("RATE_LIMIT_BURST", "5"))
+    )
+    rate_limit_backend: str = field(
+        default_factory=lambda: os.getenv("RATE_LIMIT_BACKEND", "memory")
+    )
+    redis_url: str = field(
+        default_factory=lambda: os.getenv("REDIS_URL", "redis://redis:6379")
+    )
+    persistent_runtime: bool = field(
+        default_factory=lambda: _env_bool("PERSISTENT_RUNTIME")
+    )
+    http_pool_size: int = field(
+        default_factory=lambda: int(os.getenv("HTTP_POOL_SIZE", "20"))
+    )
+    dns_cache_ttl_seconds: int = field(
+        default_factory=lambda: int(os.getenv("DNS_CACHE_TTL_SECONDS", "300"))
+    )
+    http_keepalive_seconds: float = field(
+        default_factory=lambda: float(os.getenv("HTTP_KEEPALIVE_SECONDS", "75"))
+    )
+    dedup_enabled: bool = field(default_factory=lambda: _env_bool("DEDUP_ENABLED"))
+    dedup_backend: str = field(
+        default_factory=lambda: os.getenv("DEDUP_BACKEND", "memory")
+    )
+    backfill_window_days: int = field(
+        default_factory=lambda: int(os.getenv("BACKFILL_WINDOW_DAYS", "90"))
+    )
+    backfill_queue_size: int = field(
+        default_factory=lambda: int(os.getenv("BACKFILL_QUEUE_SIZE", "8"))
+    )
+    backfill_flush_rows: int = field(
+        default_factory=lambda: int(os.getenv("BACKFILL_FLUSH_ROWS", "10000"))
+    )
+    write_behind_enabled: bool = field(
+        default_factory=lambda: _env_bool("WRITE_BEHIND_ENABLED")
+    )
+    write_behind_flush_rows: int = field(
+        default_factory=lambda: int(os.getenv("WRITE_BEHIND_FLUSH_ROWS", "5000"))
+    )
+    write_behind_flush_seconds: float = field(
+        default_factory=lambda: float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "300"))
+    )
+    spool_dir: str = field(
+        default_factory=lambda: os.getenv("SPOOL_DIR", "/app/data/spool")
+    )
+    metrics_port: int = field(
+        default_factory=lambda: int(os.getenv("METRICS_PORT", "9108"))
+    )
+    health_port: int = field(
+        default_factory=lambda: int(os.getenv("HEALTH_PORT", "8080"))
+    )
+    health_refresh_seconds: float = field(
+        default_factory=lambda: float(os.getenv("HEALTH_REFRESH_SECONDS", "15"))
+    )
+    streaming_enabled: bool = field(
+        default_factory=lambda: _env_bool("STREAMING_ENABLED")
+    )
+    stream_queue_size: int = field(
+        default_factory=lambda: int(os.getenv("STREAM_QUEUE_SIZE", "4"))
+    )
+    stream_load_workers: int = field(
+        default_factory=lambda: int(os.getenv("STREAM_LOAD_WORKERS", "2"))
+    )
+    progress_flush_seconds: float = field(
+        default_factory=lambda: float(os.getenv("PROGRESS_FLUSH_SECONDS", "15"))
+    )
+    sharding_enabled: bool = field(
+        default_factory=lambda: _env_bool("SHARDING_ENABLED")
+    )
+    worker_id: str = field(
+        default_factory=lambda: os.getenv("WORKER_ID") or socket.gethostname()
+    )
+    worker_lease_seconds: int = field(
+        default_factory=lambda: int(os.getenv("WORKER_LEASE_SECONDS", "120"))
+    )
+    transform_enabled: bool = field(
+        default_factory=lambda: _env_bool("TRANSFORM_ENABLED")
+    )
+    dbt_project_dir: str = field(
+        default_factory=lambda: os.getenv("DBT_PROJECT_DIR", "/app/dbt")
+    )
+    dbt_profiles_dir: str = field(
+        default_factory=lambda: os.getenv("DBT_PROFILES_DIR", "/app/dbt")
+    )
+    transform_debounce_seconds: float = field(
+        default_factory=lambda: float(os.getenv("TRANSFORM_DEBOUNCE_SECONDS", "30"))
+    )
 
     def __post_init__(self):
         # Load cryptocurrencies from env or defaults
@@ -61,6 +348,24 @@ class PipelineConfig:
         # Validation
         if self.extraction_interval_minutes <= 0:
             raise ValueError("EXTRACTION_INTERVAL_MINUTES must be positive")
+        if self.schedule_interval_seconds < 0:
+            raise ValueError("SCHEDULE_INTERVAL_SECONDS must be non-negative")
+        if not self.schedule_interval_seconds:
+            self.schedule_interval_seconds = self.extraction_interval_minutes * 60
+        if self.schedule_cron and len(self.schedule_cron.split()) != 5:
+            raise ValueError("SCHEDULE_CRON must have five fields")
+        if self.schedule_jitter_seconds < 0:
+            raise ValueError("SCHEDULE_JITTER_SECONDS must be non-negative")
+        if self.schedule_overlap_policy not in ("skip", "queue"):
+            raise ValueError("SCHEDULE_OVERLAP_POLICY must be 'skip' or 'queue'")
+        if self.schedule_missed_policy not in ("skip", "catchup"):
+            raise ValueError("SCHEDULE_MISSED_POLICY must be 'skip' or 'catchup'")
+        if self.schedule_max_catchup <= 0:
+            raise ValueError("SCHEDULE_MAX_CATCHUP must be positive")
+        if self.polling_max_requests < 0:
+            raise ValueError("POLLING_MAX_REQUESTS must be non-negative")
+        if self.polling_pack_ahead_seconds < 0:
+            raise ValueError("POLLING_PACK_AHEAD_SECONDS must be non-negative")
         if self.batch_size <= 0:
             raise ValueError("BATCH_SIZE must be positive")
         if self.max_retries < 0:
@@ -69,3 +374,54 @@ class PipelineConfig:
             raise ValueError("TIMEOUT_SECONDS must be positive")
         if not self.cryptocurrencies:
             raise ValueError("CRYPTOCURRENCIES list cannot be empty")
+        if self.top_n_coins < 0:
+            raise ValueError("TOP_N_COINS must be non-negative")
+        if not (1 <= self.page_size <= 250):
+            raise ValueError("PAGE_SIZE must be between 1 and 250")
+        if self.max_concurrent_requests <= 0:
+            raise ValueError("MAX_CONCURRENT_REQUESTS must be positive")
+        if self.rate_limit_per_minute <= 0:
+            raise ValueError("RATE_LIMIT_PER_MINUTE must be positive")
+        if self.rate_limit_burst <= 0:
+            raise ValueError("RATE_LIMIT_BURST must be positive")
+        if self.rate_limit_backend not in ("memory", "redis"):
+            raise ValueError("RATE_LIMIT_BACKEND must be 'memory' or 'redis'")
+        if self.http_pool_size <= 0:
+            raise ValueError("HTTP_POOL_SIZE must be positive")
+        if self.dedup_backend not in ("memory", "redis"):
+            raise ValueError("DEDUP_BACKEND must be 'memory' or 'redis'")
+        if self.backfill_window_days <= 0:
+            raise ValueError("BACKFILL_WINDOW_DAYS must be positive")
+        if self.backfill_queue_size <= 0:
+            raise ValueError("BACKFILL_QUEUE_SIZE must be positive")
+        if self.backfill_flush_rows <= 0:
+            raise ValueError("BACKFILL_FLUSH_ROWS must be positive")
+        if self.write_behind_flush_rows <= 0:
+            raise ValueError("WRITE_BEHIND_FLUSH_ROWS must be positive")
+        if self.write_behind_flush_seconds < 0:
+            raise ValueError("WRITE_BEHIND_FLUSH_SECONDS must be non-negative")
+        if not (0 <= self.metrics_port <= 65535):
+            raise ValueError("METRICS_PORT must be between 0 and 65535")
+        if not (0 <= self.health_port <= 65535):
+            raise ValueError("HEALTH_PORT must be between 0 and 65535")
+        if self.health_refresh_seconds <= 0:
+            raise ValueError("HEALTH_REFRESH_SECONDS must be positive")
+        if self.stream_queue_size <= 0:
+            raise ValueError("STREAM_QUEUE_SIZE must be positive")
+        if self.stream_load_workers <= 0:
+            raise ValueError("STREAM_LOAD_WORKERS must be positive")
+        if self.progress_flush_seconds <= 0:
+            raise ValueError("PROGRESS_FLUSH_SECONDS must be positive")
+        if not self.worker_id:
+            raise ValueError("WORKER_ID cannot be empty")
+        if self.worker_lease_seconds <= 0:
+            raise ValueError("WORKER_LEASE_SECONDS must be positive")
+        if self.leader_poll_seconds <= 0:
+            raise ValueError("LEADER_POLL_SECONDS must be positive")
+        if self.leader_election and self.sharding_enabled:
+            raise ValueError(
+                "LEADER_ELECTION and SHARDING_ENABLED cannot both be set: "
+                "a single leader leaves no work to shard"
+            )
+        if self.transform_debounce_seconds < 0:
+            raise ValueError("TRANSFORM_DEBOUNCE_SECONDS must be non-negative")
@@ -1,107 +1,361 @@
 import asyncio
 import logging
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Set
 
 import aiohttp
 import backoff
 
 from src.config.settings import PipelineConfig
+from src.extractors.rate_limiter import TokenBucketRateLimiter, build_rate_limiter
 from src.extractors.secrets import get_coingecko_api_key  # 🔑 secure import
+from src.models.batch import PriceBatch
+from src.monitoring.metrics import (
+    HTTP_RATE_LIMITED,
+    HTTP_REQUEST_SECONDS,
+    HTTP_RETRIES,
+)
+
+if TYPE_CHECKING:
+    from src.pipeline.polling import PollPlan
+    from src.pipeline.sharding import ShardAssignment
 
 logger = logging.getLogger(__name__)
 
 
+class RateLimitExceeded(aiohttp.ClientError):
+    """Raised on HTTP 429 so backoff retries once the limiter cools down."""
+
+
+def _endpoint(path: str) -> str:
+    """Metric label for an API path, with the coin id folded out."""
+    parts = path.split("/")
+    if len(parts) > 3:
+        parts[2] = "{id}"
+    return "/".join(parts)
+
+
+def _count_retry(details: Dict[str, Any]) -> None:
+    HTTP_RETRIES.labels(_endpoint(details["args"][1])).inc()
+
+
 class CryptoDataExtractor:
-    def __init__(self, config: PipelineConfig):
+    def __init__(
+        self,
+        config: PipelineConfig,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+    ):
         self.config = config
         self.base_url = "https://api.coingecko.com/api/v3"
         self.api_key = get_coingecko_api_key()  # 🔐 secure fetch
         self.session: Optional[aiohttp.ClientSession] = None
+        # Pass a shared limiter to pace requests across extractor instances
+        self.rate_limiter = rate_limiter or build_rate_limiter(config)
+        # Running totals for run metrics; retries count as separate attempts
+        self.request_attempts = 0
+        self.bytes_fetched = 0
 
     async def __aenter__(self):
-        timeout = aiohttp.ClientTimeout(total=self.config.timeout_seconds)
-        self.session = aiohttp.ClientSession(timeout=timeout)
+        await self.open()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def open(self) -> None:
+        """Open the HTTP session; a no-op while one is already open."""
+        if self.session is not None and not self.session.closed:
+            return
+        timeout = aiohttp.ClientTimeout(total=self.config.timeout_seconds)
+        connector = aiohttp.TCPConnector(
+            limit=self.config.http_pool_size,
+            limit_per_host=self.config.http_pool_size,
+            ttl_dns_cache=self.config.dns_cache_ttl_seconds,
+            keepalive_timeout=self.config.http_keepalive_seconds,
+        )
+        self.session = aiohttp.ClientSession(timeout=timeout, connector=connector)
+
+    async def close(self) -> None:
         if self.session:
             await self.session.close()
+            self.session = None
+
+    def _build_page_params(
+        self,
+        shard: Optional["ShardAssignment"] = None,
+        plan: Optional["PollPlan"] = None,
+    ) -> List[Dict[str, Any]]:
+        """Split the configured universe, or the tiers of ``plan``, into
+        /coins/markets page requests, keeping only the part ``shard`` owns
+        when one is given.
+
+        A ranked universe is sharded by page number, since the coins on a
+        page are only known once it is fetched; an explicit one by coin id.
+        """
+        base_params = {
+            "vs_currency": "usd",
+            "order": "market_cap_desc",
+            "sparkline": "false",
+            "price_change_percentage": "1h,24h,7d",
+        }
+        page_size = self.config.page_size
+
+        if plan is not None:
+            return self._build_plan_params(base_params, plan, shard)
+
+        if self.config.top_n_coins:
+            # Rank-ordered universe: walk the market-cap pages
+            page_count = -(-self.config.top_n_coins // page_size)
+            pages = range(1, page_count + 1)
+            if shard is not None:
+                owned = set(shard.owned([f"page:{page}" for page in pages]))
+                pages = [page for page in pages if f"page:{page}" in owned]
+                logger.info(
+                    f"Worker {shard.worker_id} owns {len(pages)} of {page_count} "
+                    f"market-cap pages across {len(shard.workers)} workers"
+                )
+            return [
+                {**base_params, "per_page": page_size, "page": page} for page in pages
+            ]
+
+        # Explicit universe: one request per chunk of IDs
+        ids = self.config.cryptocurrencies
+        if shard is not None:
+            ids = shard.owned(ids)
+            logger.info(
+                f"Worker {shard.worker_id} owns {len(ids)} of "
+                f"{len(self.config.cryptocurrencies)} coins across "
+                f"{len(shard.workers)} workers"
+            )
+        return [
+            {
+                **base_params,
+                "ids": ",".join(ids[i : i + page_size]),
+                "per_page": len(ids[i : i + page_size]),
+                "page": 1,
+            }
+            for i in range(0, len(ids), page_size)
+        ]
+
+    def _build_plan_params(
+        self,
+        base_params: Dict[str, Any],
+        plan: "PollPlan",
+        shard: Optional["ShardAssignment"],
+    ) -> List[Dict[str, Any]]:
+        page_size = self.config.page_size
+        rank_pages = plan.rank_pages(page_size)
+        ids = plan.ids
+        if shard is not None:
+            # Same keys as an untiered run, so tiers split like the universe
+            owned = set(shard.owned([f"page:{page}" for _, page in rank_pages]))
+            rank_pages = [
+                (n, page) for n, page in rank_pages if f"page:{page}" in owned
+            ]
+            ids = shard.owned(ids)
+        params = [
+            {**base_params, "per_page": per_page, "page": page}
+            for per_page, page in rank_pages
+        ]
+        return params + [
+            {
+                **base_params,
+                "ids": ",".join(ids[i : i + page_size]),
+                "per_page": len(ids[i : i + page_size]),
+                "page": 1,
+            }
+            for i in range(0, len(ids), page_size)
+        ]
 
     @backoff.on_exception(
         backoff.expo,
         (aiohttp.ClientError, asyncio.TimeoutError),
         max_tries=3,
         max_time=60,
+        on_backoff=_count_retry,
     )
-    async def fetch_crypto_prices(self) -> List[Dict]:
+    async def _get_json(self, path: str, params: Dict[str, Any]) -> Any:
         if not self.session:
             raise RuntimeError("Extractor session not initialized")
 
-        crypto_ids = ",".join(self.config.cryptocurrencies)
-        url = f"{self.base_url}/coins/markets"
+        url = f"{self.base_url}{path}"
 
         headers = {
             "accept": "application/json",
             "x-cg-demo-api-key": self.api_key,  # ✅ secured
         }
 
+        await self.rate_limiter.acquire()
+        self.request_attempts += 1
+        started = time.perf_counter()
+        status = "error"
+        try:
+            async with self.session.get(
+                url, headers=headers, params=params
+            ) as response:
+                status = str(response.status)
+                await self.rate_limiter.on_response(response.status, response.headers)
+                if response.status == 429:
+                    HTTP_RATE_LIMITED.inc()
+                    raise RateLimitExceeded(f"Rate limit exceeded: {response.status}")
+                elif response.status in (401, 403):
+                    error_msg = await response.text()
+                    logger.error(f"API Auth Error {response.status}: {error_msg}")
+                    raise aiohttp.ClientError(
+                        f"API key issue ({response.status}): {error_msg}"
+                    )
+                elif response.status != 200:
+                    error_msg = await response.text()
+                    logger.error(f"API Error {response.status}: {error_msg}")
+                    raise aiohttp.ClientError(f"Error {response.status}: {error_msg}")
+
+                self.bytes_fetched += len(await response.read())
+                return await response.json()
+        finally:
+            HTTP_REQUEST_SECONDS.labels(_endpoint(path), status).observe(
+                time.perf_counter() - started
+            )
+
+    async def _fetch_markets_page(self, params: Dict[str, Any]) -> List[Dict]:
+        return await self._get_json("/coins/markets", params)
+
+    async def fetch_coin_list(self) -> List[Dict]:
+        """Return every CoinGecko coin as {"id", "symbol", "name"}."""
+        return await self._get_json("/coins/list", {})
+
+    async def fetch_market_chart_range(
+        self, coin_id: str, start: datetime, end: datetime
+    ) -> Dict[str, List[List[float]]]:
+        """Fetch historical prices, market caps and volumes for [start, end].
+
+        CoinGecko picks the granularity from the span: 5-minutely up to one
+        day, hourly up to 90 days and daily beyond that.
+        """
         params = {
             "vs_currency": "usd",
-            "ids": crypto_ids,
-            "order": "market_cap_desc",
-            "per_page": len(self.config.cryptocurrencies),
-            "page": 1,
-            "sparkline": "false",
-            "price_change_percentage": "1h,24h,7d",
+            "from": int(start.replace(tzinfo=timezone.utc).timestamp()),
+            "to": int(end.replace(tzinfo=timezone.utc).timestamp()),
         }
+        return await self._get_json(f"/coins/{coin_id}/market_chart/range", params)
 
-        logger.info(f"Fetching data for: {crypto_ids}")
-
-        async with self.session.get(url, headers=headers, params=params) as response:
-            if response.status == 429:
-                logger.warning("Rate limit hit. Retrying after cooldown...")
-                await asyncio.sleep(60)
-                raise aiohttp.ClientError(f"Rate limit exceeded: {response.status}")
-            elif response.status in (401, 403):
-                error_msg = await response.text()
-                logger.error(f"API Auth Error {response.status}: {error_msg}")
-                raise aiohttp.ClientError(
-                    f"API key issue ({response.status}): {error_msg}"
-                )
-            elif response.status != 200:
-                error_msg = await response.text()
-                logger.error(f"API Error {response.status}: {error_msg}")
-                raise aiohttp.ClientError(f"Error {response.status}: {error_msg}")
+    async def fetch_crypto_prices(
+        self,
+        shard: Optional["ShardAssignment"] = None,
+        plan: Optional["PollPlan"] = None,
+    ) -> PriceBatch:
+        if not self.session:
+            raise RuntimeError("Extractor session not initialized")
+
+        page_params = self._build_page_params(shard, plan)
+        semaphore = asyncio.Semaphore(self.config.max_concurrent_requests)
+
+        async def fetch_page(params: Dict[str, Any]) -> List[Dict]:
+            async with semaphore:
+                return await self._fetch_markets_page(params)
 
-            data = await response.json()
-            extraction_time = datetime.utcnow()
+        if plan is not None:
+            logger.info(f"Polling tiers {plan} across {len(page_params)} pages")
+        elif self.config.top_n_coins:
+            logger.info(
+                f"Fetching top {self.config.top_n_coins} coins "
+                f"across {len(page_params)} pages"
+            )
+        else:
+            logger.info(
+                f"Fetching data for {len(self.config.cryptocurrencies)} coins "
+                f"across {len(page_params)} pages"
+            )
 
+        pages = await asyncio.gather(*(fetch_page(p) for p in page_params))
+        extraction_time = datetime.utcnow()
+
+        seen_ids: Set[str] = set()
+        coins = []
+        for params, page in zip(page_params, pages):
+            coins.extend(
+                self._within_universe(params, self._unseen_coins(page, seen_ids), plan)
+            )
+
+        return PriceBatch.from_api(coins, extraction_time)
+
+    def _within_universe(
+        self,
+        params: Dict[str, Any],
+        coins: List[Dict],
+        plan: Optional["PollPlan"] = None,
+    ) -> List[Dict]:
+        """Trim a market-cap page to the ranks ``plan`` polls, or the last
+        one to TOP_N_COINS."""
+        if "ids" in params:
+            return coins
+        ranked_before = (params["page"] - 1) * params["per_page"]
+        if plan is not None:
             return [
-                {
-                    "symbol": coin.get("symbol", "").upper(),
-                    "name": coin.get("name", ""),
-                    "current_price": coin.get("current_price", 0.0),
-                    "market_cap": coin.get("market_cap"),
-                    "total_volume": coin.get("total_volume"),
-                    "price_change_24h": coin.get("price_change_24h"),
-                    "price_change_percentage_24h": coin.get(
-                        "price_change_percentage_24h"
-                    ),
-                    "price_change_percentage_1h": coin.get(
-                        "price_change_percentage_1h_in_currency"
-                    ),
-                    "price_change_percentage_7d": coin.get(
-                        "price_change_percentage_7d_in_currency"
-                    ),
-                    "market_cap_rank": coin.get("market_cap_rank"),
-                    "circulating_supply": coin.get("circulating_supply"),
-                    "total_supply": coin.get("total_supply"),
-                    "max_supply": coin.get("max_supply"),
-                    "ath": coin.get("ath"),
-                    "atl": coin.get("atl"),
-                    "last_updated": coin.get("last_updated"),
-                    "extracted_at": extraction_time,
-                }
-                for coin in data
+                coin
+                for rank, coin in enumerate(coins, ranked_before + 1)
+                if plan.wants_rank(rank)
             ]
+        if not self.config.top_n_coins:
+            return coins
+        return coins[: self.config.top_n_coins - ranked_before]
+
+    @staticmethod
+    def _unseen_coins(page: List[Dict], seen_ids: Set[str]) -> List[Dict]:
+        # Ranks can shift between concurrent page reads, so a coin may show
+        # up on two adjacent pages; keep the first occurrence.
+        coins = []
+        for coin in page:
+            coin_id = coin.get("id")
+            if coin_id is not None:
+                if coin_id in seen_ids:
+                    continue
+                seen_ids.add(coin_id)
+            coins.append(coin)
+        return coins
+
+    async def stream_crypto_prices(
+        self,
+        shard: Optional["ShardAssignment"] = None,
+        plan: Optional["PollPlan"] = None,
+    ) -> AsyncIterator[PriceBatch]:
+        """Yield each /coins/markets page as a batch as soon as it arrives.
+
+        At most MAX_CONCURRENT_REQUESTS pages are in flight, and new requests
+        are only issued when the consumer asks for the next batch, so a slow
+        consumer throttles fetching. Every batch shares one extracted_at,
+        taken when the stream starts, so a run is still a single snapshot.
+        """
+        if not self.session:
+            raise RuntimeError("Extractor session not initialized")
+
+        page_params = iter(self._build_page_params(shard, plan))
+        extraction_time = datetime.utcnow()
+        in_flight: Dict[asyncio.Task, Dict[str, Any]] = {}
+        seen_ids: Set[str] = set()
+
+        def request_more() -> None:
+            while len(in_flight) < self.config.max_concurrent_requests:
+                params = next(page_params, None)
+                if params is None:
+                    return
+                task = asyncio.create_task(self._fetch_markets_page(params))
+                in_flight[task] = params
+
+        request_more()
+        try:
+            while in_flight:
+                done, _ = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    params = in_flight.pop(task)
+                    coins = self._within_universe(
+                        params, self._unseen_coins(task.result(), seen_ids), plan
+                    )
+                    if coins:
+                        yield PriceBatch.from_api(coins, extraction_time)
+                request_more()
+        finally:
+            for task in in_flight:
+                task.cancel()
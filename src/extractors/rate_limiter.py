@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Mapping, Optional
+
+import redis.asyncio as aioredis
+
+from src.config.settings import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+# Multiplicative decrease / additive increase applied to the refill rate
+BACKOFF_FACTOR = 0.5
+RECOVERY_STEP = 0.05
+MIN_RATE_FRACTION = 0.1
+
+
+def _parse_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_retry_after(value: Any) -> Optional[float]:
+    """Return the Retry-After delay in seconds (delta-seconds or HTTP-date)."""
+    seconds = _parse_float(value)
+    if seconds is not None:
+        return max(0.0, seconds)
+    if not isinstance(value, str):
+        return None
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def cooldown_from_headers(status: int, headers: Mapping[str, Any]) -> float:
+    """Work out how long the API asked us to stay quiet, in seconds."""
+    retry_after = parse_retry_after(headers.get("Retry-After"))
+    if retry_after is not None:
+        return retry_after
+
+    remaining = _parse_float(headers.get("x-ratelimit-remaining"))
+    reset = _parse_float(headers.get("x-ratelimit-reset"))
+    if reset is not None and (status == 429 or remaining == 0):
+        # Providers disagree on epoch vs. delta; epochs are unmistakably large
+        return max(0.0, reset - time.time()) if reset > 1e9 else reset
+
+    return 0.0
+
+
+class TokenBucketRateLimiter:
+    """Process-local token bucket with adaptive refill and server cooldowns."""
+
+    def __init__(self, requests_per_minute: float, burst: int = 1):
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive")
+        self.max_rate = requests_per_minute / 60.0
+        self.min_rate = self.max_rate * MIN_RATE_FRACTION
+        self.capacity = float(max(1, burst))
+        self.rate = self.max_rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        while True:
+            wait = await self._take()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def on_response(self, status: int, headers: Mapping[str, Any]) -> None:
+        """Feed a response back so the bucket can follow the server's pace."""
+        cooldown = cooldown_from_headers(status, headers)
+        if status == 429:
+            logger.warning(
+                f"Rate limit hit; pausing requests for {cooldown:.1f}s "
+                "and slowing down"
+            )
+            await self._penalize(cooldown)
+        elif cooldown > 0:
+            logger.info(f"Rate limit window exhausted; pausing for {cooldown:.1f}s")
+            await self._pause(cooldown)
+        else:
+            await self._recover()
+
+    # The in-memory bucket never awaits between read and write, so callers
+    # on the same event loop cannot interleave and no lock is needed.
+    async def _take(self) -> float:
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def _pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def _penalize(self, seconds: float) -> None:
+        await self._pause(seconds)
+        self.rate = max(self.min_rate, self.rate * BACKOFF_FACTOR)
+
+    async def _recover(self) -> None:
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisTokenBucketRateLimiter(TokenBucketRateLimiter):
+    """Token bucket whose state lives in Redis so worker processes share it."""
+
+    # Refill and take in one round trip; returns seconds to wait (0 = granted)
+    TAKE_SCRIPT = """
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local max_rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local s = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'paused_until', 'rate')
+    local rate = tonumber(s[4]) or max_rate
+    local paused_until = tonumber(s[3]) or 0
+    if now < paused_until then
+        return {tostring(paused_until - now), tostring(rate)}
+    end
+    local tokens = tonumber(s[1]) or capacity
+    local ts = tonumber(s[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], 3600)
+    return {tostring(wait), tostring(rate)}
+    """
+
+    # ARGV: pause seconds, rate multiplier, min rate, max rate, rate increment
+    ADJUST_SCRIPT = """
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local s = redis.call('HMGET', KEYS[1], 'paused_until', 'rate')
+    local paused_until = tonumber(s[1]) or 0
+    local rate = tonumber(s[2]) or tonumber(ARGV[4])
+    local pause = tonumber(ARGV[1])
+    if pause > 0 then
+        paused_until = math.max(paused_until, now + pause)
+        redis.call('HSET', KEYS[1], 'tokens', '0', 'ts', tostring(now))
+    end
+    rate = rate * tonumber(ARGV[2]) + tonumber(ARGV[5])
+    rate = math.max(tonumber(ARGV[3]), math.min(tonumber(ARGV[4]), rate))
+    redis.call('HSET', KEYS[1], 'paused_until', tostring(paused_until),
+               'rate', tostring(rate))
+    redis.call('EXPIRE', KEYS[1], 3600)
+    return tostring(rate)
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        requests_per_minute: float,
+        burst: int = 1,
+        key: str = "crypto_pipeline:rate_limiter:coingecko",
+    ):
+        super().__init__(requests_per_minute, burst)
+        self.redis_url = redis_url
+        self.key = key
+        self._client: Any = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> Any:
+        # redis.asyncio connections are bound to the loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+            self._client_loop = loop
+        return self._client
+
+    async def _take(self) -> float:
+        wait, rate = await self._get_client().eval(
+            self.TAKE_SCRIPT, 1, self.key, self.max_rate, self.capacity
+        )
+        self.rate = float(rate)
+        return float(wait)
+
+    async def _adjust(self, pause: float, factor: float, step: float) -> None:
+        rate = await self._get_client().eval(
+            self.ADJUST_SCRIPT,
+            1,
+            self.key,
+            pause,
+            factor,
+            self.min_rate,
+            self.max_rate,
+            step,
+        )
+        self.rate = float(rate)
+
+    async def _pause(self, seconds: float) -> None:
+        await self._adjust(seconds, 1.0, 0.0)
+
+    async def _penalize(self, seconds: float) -> None:
+        await self._adjust(seconds, BACKOFF_FACTOR, 0.0)
+
+    async def _recover(self) -> None:
+        if self.rate < self.max_rate:
+            await self._adjust(0.0, 1.0, self.max_rate * RECOVERY_STEP)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+def build_rate_limiter(config: PipelineConfig) -> TokenBucketRateLimiter:
+    """Create the rate limiter selected by RATE_LIMIT_BACKEND."""
+    if config.rate_limit_backend == "redis":
+        return RedisTokenBucketRateLimiter(
+            config.redis_url,
+            config.rate_limit_per_minute,
+            config.rate_limit_burst,
+        )
+    return TokenBucketRateLimiter(config.rate_limit_per_minute, config.rate_limit_burst)
@@ -0,0 +1,398 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src.config.settings import DatabaseConfig
+from src.loaders.health_summary import (
+    prune_buckets,
+    read_health,
+    summarize_prices,
+    summarize_run_events,
+)
+from src.loaders.partition_manager import build_partition_manager
+from src.loaders.quarantine import bisect_load_async, error_text, quarantine_rows
+from src.loaders.rollups import rebuild_rollups, rollup_batch
+from src.loaders.warehouse_loader import (
+    CREATE_STAGE_TABLE_SQL,
+    FACT_TABLE,
+    CoinDictionary,
+    backfill_checkpoint_upsert,
+    coin_lookup,
+    coin_upsert,
+    expired_workers_delete,
+    live_workers,
+    merge_staged_prices_sql,
+    pipeline_run_event,
+    record_flush,
+    record_rollup_skips,
+    worker_lease_upsert,
+)
+from src.models.base import Base
+from src.models.batch import PriceBatch
+from src.models.schemas import (
+    BackfillCheckpoint,
+    CryptoPrice,
+    PipelineRunEvent,
+    PipelineWorker,
+    QuarantinedPrice,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _render_csv(chunk: pd.DataFrame) -> bytes:
+    return chunk.to_csv(index=False, header=False, na_rep="\\N").encode()
+
+
+def _to_records(chunk: pd.DataFrame) -> List[Dict[str, Any]]:
+    # asyncpg wants Python scalars and None rather than numpy values and NaN
+    values = chunk.astype(object)
+    return values.where(chunk.notna(), None).to_dict("records")
+
+
+class AsyncWarehouseLoader:
+    """asyncpg-backed loader with the same surface as ``WarehouseLoader``.
+
+    Every method is a coroutine, so loads and run logging share the event
+    loop with in-flight API requests instead of blocking it.
+    """
+
+    def __init__(self, db_config: DatabaseConfig):
+        self.db_config = db_config
+        self._engine: Optional[AsyncEngine] = None
+        self._engine_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.SessionLocal: Optional[async_sessionmaker] = None
+        self.partitions = build_partition_manager(db_config)
+        self.coins = CoinDictionary()
+
+    def _get_engine(self) -> AsyncEngine:
+        # asyncpg connections are bound to the loop that opened them, and
+        # only that loop can close them
+        loop = asyncio.get_running_loop()
+        if self._engine is not None and self._engine_loop is not loop:
+            raise RuntimeError(
+                "AsyncWarehouseLoader is bound to another event loop; "
+                "close() it on that loop before using it on this one"
+            )
+        if self._engine is None:
+            self._engine = create_async_engine(
+                self.db_config.async_connection_string,
+                pool_size=10,
+                max_overflow=20,
+                pool_pre_ping=True,
+                echo=False,
+            )
+            self._engine_loop = loop
+            self.SessionLocal = async_sessionmaker(self._engine, expire_on_commit=False)
+        return self._engine
+
+    async def close(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+            self._engine_loop = None
+
+    async def create_tables(self):
+        """Create all tables based on Base metadata"""
+        async with self._get_engine().begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        await self.maintain_partitions()
+        logger.info("✅ Database tables created or already exist.")
+
+    async def maintain_partitions(self) -> Dict[str, List[str]]:
+        """Pre-create upcoming price partitions and expire old ones"""
+        async with self._get_engine().begin() as connection:
+            return await connection.run_sync(self.partitions.maintain)
+
+    @asynccontextmanager
+    async def get_session(self) -> AsyncIterator[AsyncSession]:
+        self._get_engine()
+        session = self.SessionLocal()
+        try:
+            yield session
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.exception("❌ Session rollback due to error")
+            raise e
+        finally:
+            await session.close()
+
+    @asynccontextmanager
+    async def _driver_connection(self) -> AsyncIterator[Any]:
+        """asyncpg connection from the pool, committed as one unit."""
+        async with self._get_engine().connect() as connection:
+            raw = await connection.get_raw_connection()
+            driver = raw.driver_connection
+            async with driver.transaction():
+                yield driver
+
+    async def bulk_insert_crypto_prices(
+        self, data: Union[PriceBatch, List[Dict]], run_id: Optional[str] = None
+    ) -> int:
+        """Bulk insert crypto price records into raw table
+
+        Bad rows are bisected out and quarantined, as in ``WarehouseLoader``.
+        """
+        if not len(data):
+            logger.info("No data to insert")
+            return 0
+
+        batch = PriceBatch.coerce(data)
+
+        started = time.perf_counter()
+        try:
+            written, rejected = await bisect_load_async(self._load_crypto_prices, batch)
+            if rejected:
+                await self.quarantine_prices(quarantine_rows(rejected, run_id))
+            record_flush(self.db_config.load_method, written, started)
+            logger.info(f"✅ Inserted {written} crypto price records.")
+            if written:
+                await self.update_health_summary(batch)
+            if written and self.db_config.rollups_enabled:
+                await self.roll_up_prices(batch)
+            return written
+
+        except SQLAlchemyError:
+            logger.exception("❌ Database error during bulk insert.")
+            raise
+        except Exception:
+            logger.exception("❌ Unexpected error during bulk insert.")
+            raise
+
+    async def _load_crypto_prices(self, batch: PriceBatch) -> int:
+        """Write a batch with LOAD_METHOD in a single transaction."""
+        coin_ids = await self._coin_ids(batch)
+        frame = await asyncio.to_thread(batch.to_fact_frame, coin_ids)
+        if self.db_config.load_method == "copy":
+            return await self._copy_crypto_prices(frame)
+        if self.db_config.load_method == "upsert":
+            written = await self._upsert_crypto_prices(frame)
+            if written < len(batch):
+                logger.info(f"Skipped {len(batch) - written} rows already present.")
+            return written
+        return await self._insert_crypto_prices(frame)
+
+    async def update_health_summary(self, batch: PriceBatch) -> int:
+        """Fold a loaded batch into the health summary.
+
+        Never raises, as in ``WarehouseLoader``. Returns the buckets touched.
+        """
+        try:
+            coin_ids = await self._coin_ids(batch)
+            async with self._get_engine().begin() as connection:
+                result = await connection.execute(summarize_prices(batch, coin_ids))
+                return result.rowcount
+        except SQLAlchemyError as e:
+            logger.error(
+                f"❌ Could not update the health summary for {len(batch)} "
+                f"price rows: {error_text(e)}"
+            )
+            return 0
+
+    async def roll_up_prices(self, batch: PriceBatch) -> int:
+        """Merge a loaded batch into the hourly and daily OHLC rollups.
+
+        Never raises, as in ``WarehouseLoader``. Returns the buckets touched.
+        """
+        try:
+            coin_ids = await self._coin_ids(batch)
+            async with self._get_engine().begin() as connection:
+                result = await connection.execute(rollup_batch(batch, coin_ids))
+                merged = result.one()
+        except SQLAlchemyError as e:
+            logger.error(
+                f"❌ Could not roll up {len(batch)} price rows, rebuild their "
+                f"days with `main.py rollups`: {error_text(e)}"
+            )
+            return 0
+        record_rollup_skips(merged.skipped)
+        return merged.buckets
+
+    async def rebuild_price_rollups(self, start: date, end: date) -> int:
+        """Recompute the OHLC rollups of [start, end) from the fact table"""
+        async with self._get_engine().begin() as connection:
+            delete_stmt, insert_stmt = rebuild_rollups(start, end)
+            await connection.execute(delete_stmt)
+            return (await connection.execute(insert_stmt)).rowcount
+
+    async def _coin_ids(self, batch: PriceBatch) -> np.ndarray:
+        stale = self.coins.stale(batch)
+        if stale:
+            async with self._get_engine().begin() as connection:
+                self.coins.remember(await connection.execute(coin_lookup(stale)))
+                stale = self.coins.unknown(stale)
+                if stale:
+                    self.coins.remember(await connection.execute(coin_upsert(stale)))
+        return self.coins.coin_ids(batch)
+
+    async def _insert_crypto_prices(self, frame: pd.DataFrame) -> int:
+        chunk_rows = self.db_config.batch_size or 100
+        async with self.get_session() as session:
+            for start in range(0, len(frame), chunk_rows):
+                chunk = frame.iloc[start : start + chunk_rows]
+                # created_at comes from the column default
+                await session.execute(insert(CryptoPrice.__table__), _to_records(chunk))
+        return len(frame)
+
+    async def _copy_into(
+        self, connection: Any, table: str, frame: pd.DataFrame
+    ) -> None:
+        """Stream fact rows into ``table`` with COPY, one CSV chunk at a time.
+
+        Chunks are rendered on a worker thread so a large COPY never stalls
+        the loop, and only one rendered chunk is held in memory at a time.
+        """
+        chunk_rows = self.db_config.copy_chunk_rows
+
+        async def source() -> AsyncIterator[bytes]:
+            for start in range(0, len(frame), chunk_rows):
+                chunk = frame.iloc[start : start + chunk_rows]
+                yield await asyncio.to_thread(_render_csv, chunk)
+
+        await connection.copy_to_table(
+            table,
+            source=source(),
+            columns=list(frame.columns),
+            format="csv",
+            null="\\N",
+        )
+
+    async def _copy_crypto_prices(self, frame: pd.DataFrame) -> int:
+        """Stream fact rows into the fact table with COPY ... FROM STDIN."""
+        async with self._driver_connection() as connection:
+            await self._copy_into(connection, FACT_TABLE, frame)
+        return len(frame)
+
+    async def _upsert_crypto_prices(self, frame: pd.DataFrame) -> int:
+        """COPY fact rows into a temp table and merge on (coin_id, extracted_at).
+
+        Returns the number of rows inserted or updated.
+        """
+        columns = list(frame.columns)
+        async with self._driver_connection() as connection:
+            await connection.execute(CREATE_STAGE_TABLE_SQL)
+            await self._copy_into(connection, "crypto_prices_stage", frame)
+            status = await connection.execute(
+                merge_staged_prices_sql(columns, self.db_config.upsert_action)
+            )
+        # asyncpg returns the command tag, e.g. "INSERT 0 42"
+        return int(status.rsplit(" ", 1)[-1])
+
+    async def record_pipeline_events(self, events: List[Dict[str, Any]]) -> None:
+        """Append a run's stage events to the ledger, and fold them into
+        the health summary, in one transaction"""
+        if not events:
+            return
+
+        try:
+            async with self.get_session() as session:
+                await session.execute(insert(PipelineRunEvent.__table__), events)
+                for statement in summarize_run_events(events):
+                    await session.execute(statement)
+                await session.execute(prune_buckets())
+                logger.info(
+                    f"📝 Recorded {len(events)} pipeline events "
+                    f"for {events[0]['run_id']}"
+                )
+        except Exception:
+            logger.exception("❌ Failed to record pipeline events.")
+            raise
+
+    async def read_health_summary(self) -> Dict[str, Any]:
+        """The health summary the health checks evaluate, as one row"""
+        async with self._get_engine().connect() as connection:
+            result = await connection.execute(read_health())
+            return dict(result.one()._mapping)
+
+    async def quarantine_prices(self, rows: List[Dict[str, Any]]) -> None:
+        """Store rejected price rows in crypto_prices_quarantine"""
+        async with self.get_session() as session:
+            await session.execute(insert(QuarantinedPrice.__table__), rows)
+        logger.warning(f"Quarantined {len(rows)} price rows.")
+
+    async def renew_worker_lease(
+        self, worker_id: str, lease_seconds: float
+    ) -> List[str]:
+        """Take or renew a worker's lease and return every live worker"""
+        async with self._get_engine().begin() as connection:
+            await connection.execute(expired_workers_delete())
+            await connection.execute(worker_lease_upsert(worker_id, lease_seconds))
+            return list(await connection.scalars(live_workers()))
+
+    async def release_worker_lease(self, worker_id: str) -> None:
+        """Drop a worker's lease so the others take over its shards"""
+        async with self._get_engine().begin() as connection:
+            await connection.execute(
+                delete(PipelineWorker.__table__).where(
+                    PipelineWorker.worker_id == worker_id
+                )
+            )
+
+    async def log_pipeline_run(
+        self,
+        run_id: str,
+        stage: str,
+        status: str,
+        records_processed: int,
+        error_message: Optional[str] = None,
+        started_at: Optional[datetime] = None,
+        completed_at: Optional[datetime] = None,
+    ):
+        """Append a single pipeline stage event"""
+        await self.record_pipeline_events(
+            [
+                pipeline_run_event(
+                    run_id,
+                    stage,
+                    status,
+                    records_processed,
+                    error_message,
+                    started_at,
+                    completed_at,
+                )
+            ]
+        )
+
+    async def get_completed_backfill_windows(
+        self, coin_id: str
+    ) -> Set[Tuple[datetime, datetime]]:
+        """Return the (start, end) windows already backfilled for a coin"""
+        async with self.get_session() as session:
+            result = await session.execute(
+                select(
+                    BackfillCheckpoint.window_start, BackfillCheckpoint.window_end
+                ).where(
+                    BackfillCheckpoint.coin_id == coin_id,
+                    BackfillCheckpoint.status == "success",
+                )
+            )
+            rows = result.fetchall()
+        return {(row.window_start, row.window_end) for row in rows}
+
+    async def mark_backfill_windows(self, checkpoints: List[Dict[str, Any]]) -> None:
+        """Upsert backfill window checkpoints in a single transaction"""
+        if not checkpoints:
+            return
+
+        try:
+            async with self.get_session() as session:
+                await session.execute(backfill_checkpoint_upsert(checkpoints))
+                logger.info(f"📝 Checkpointed {len(checkpoints)} backfill windows")
+        except Exception:
+            logger.exception("❌ Failed to checkpoint backfill windows.")
+            raise
@@ -0,0 +1,244 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import JSON, TextClause, TextualSelect, func, text
+from sqlalchemy.dialects.postgresql import Insert, insert
+
+from src.models.batch import PriceBatch
+from src.models.schemas import (
+    CryptoPrice,
+    PipelineHealthBucket,
+    PipelineHealthCoin,
+    PipelineHealthStage,
+)
+
+FACT_TABLE = CryptoPrice.__tablename__
+COINS_TABLE = PipelineHealthCoin.__tablename__
+BUCKETS_TABLE = PipelineHealthBucket.__tablename__
+STAGES_TABLE = PipelineHealthStage.__tablename__
+
+BUCKET_SECONDS = 300
+# Buckets the health checks read, and the ones kept beyond them
+HEALTH_WINDOW = timedelta(hours=24)
+BUCKET_RETENTION = 2 * HEALTH_WINDOW
+PRICES_SERIES = "prices"
+
+_EPOCH = datetime(1970, 1, 1)
+_BUCKET = timedelta(seconds=BUCKET_SECONDS)
+_BUCKET_SQL = (
+    f"date_bin('{BUCKET_SECONDS} seconds', {{column}}, TIMESTAMP '1970-01-01')"
+)
+
+
+def bucket_start(moment: datetime) -> datetime:
+    """Start of the health bucket holding ``moment``."""
+    return _EPOCH + (moment - _EPOCH) // _BUCKET * _BUCKET
+
+
+def run_series(stage: str, status: str) -> str:
+    """Bucket series counting the ``status`` outcomes of ``stage``."""
+    return f"{stage}.{status}"
+
+
+_PRICE_BUCKET_MERGE_SQL = """
+ON CONFLICT (bucket_start, series) DO UPDATE SET
+    event_count = b.event_count + EXCLUDED.event_count,
+    valid_count = b.valid_count + EXCLUDED.valid_count,
+    value_sum = b.value_sum + EXCLUDED.value_sum,
+    updated_at = now()
+"""
+
+# Reads back the batch's own fact rows, as the rollups do, and counts only
+# those newer than their coin's latest extraction: replays and backfills
+# leave the summary alone, and rows older than the health window never
+# open a bucket. Both statements see the summary as it was before the
+# batch, so the latest-per-coin update cannot hide the batch from itself.
+SUMMARIZE_PRICES_SQL = f"""
+WITH batch AS (
+    SELECT *
+    FROM unnest(CAST(:coin_ids AS smallint[]), CAST(:extracted_at AS timestamp[]))
+        AS b(coin_id, extracted_at)
+),
+fresh AS (
+    SELECT f.coin_id, f.extracted_at, f.current_price
+    FROM batch b
+    JOIN {FACT_TABLE} f
+        ON f.coin_id = b.coin_id AND f.extracted_at = b.extracted_at
+    LEFT JOIN {COINS_TABLE} h ON h.coin_id = f.coin_id
+    WHERE f.extracted_at BETWEEN :first_at AND :last_at
+        AND f.extracted_at >= :since
+        AND (h.extracted_at IS NULL OR f.extracted_at > h.extracted_at)
+),
+latest AS (
+    INSERT INTO {COINS_TABLE} AS h (coin_id, extracted_at, current_price)
+    SELECT DISTINCT ON (coin_id) coin_id, extracted_at, current_price
+    FROM fresh
+    ORDER BY coin_id, extracted_at DESC
+    ON CONFLICT (coin_id) DO UPDATE SET
+        extracted_at = EXCLUDED.extracted_at,
+        current_price = EXCLUDED.current_price,
+        updated_at = now()
+    WHERE EXCLUDED.extracted_at > h.extracted_at
+)
+INSERT INTO {BUCKETS_TABLE} AS b
+    (bucket_start, series, event_count, valid_count, value_sum)
+SELECT
+    {_BUCKET_SQL.format(column="extracted_at")},
+    '{PRICES_SERIES}',
+    count(*),
+    count(*) FILTER (WHERE current_price > 0),
+    sum(current_price)
+FROM fresh
+GROUP BY 1
+{_PRICE_BUCKET_MERGE_SQL}
+"""
+
+# One row: the freshest extraction, price counts for the window and its
+# last hour, and the run outcomes and latest stage events as JSON.
+HEALTH_READ_SQL = f"""
+SELECT
+    (SELECT max(extracted_at) FROM {COINS_TABLE}) AS latest_extraction,
+    (SELECT count(*) FROM {COINS_TABLE} WHERE extracted_at >= :since)
+        AS symbols_last_24h,
+    CAST(coalesce(sum(day_count) FILTER (WHERE series = '{PRICES_SERIES}'), 0) AS bigint)
+        AS records_last_24h,
+    CAST(coalesce(sum(hour_count) FILTER (WHERE series = '{PRICES_SERIES}'), 0) AS bigint)
+        AS records_last_hour,
+    CAST(coalesce(sum(hour_valid) FILTER (WHERE series = '{PRICES_SERIES}'), 0) AS bigint)
+        AS valid_prices_last_hour,
+    sum(hour_sum) FILTER (WHERE series = '{PRICES_SERIES}') AS price_sum_last_hour,
+    coalesce(
+        json_object_agg(series, day_count) FILTER (WHERE series <> '{PRICES_SERIES}'),
+        '{{}}'
+    ) AS run_counts,
+    (
+        SELECT coalesce(json_agg(json_build_object(
+            'stage', stage,
+            'status', status,
+            'run_id', run_id,
+            'completed_at', completed_at
+        ) ORDER BY stage), '[]')
+        FROM {STAGES_TABLE}
+    ) AS last_stages
+FROM (
+    SELECT
+        series,
+        CAST(sum(event_count) AS bigint) AS day_count,
+        CAST(sum(event_count) FILTER (WHERE bucket_start >= :hour_since) AS bigint)
+            AS hour_count,
+        CAST(sum(valid_count) FILTER (WHERE bucket_start >= :hour_since) AS bigint)
+            AS hour_valid,
+        sum(value_sum) FILTER (WHERE bucket_start >= :hour_since) AS hour_sum
+    FROM {BUCKETS_TABLE}
+    WHERE bucket_start >= :since
+    GROUP BY series
+) s
+"""
+
+PRUNE_BUCKETS_SQL = f"DELETE FROM {BUCKETS_TABLE} WHERE bucket_start < :before"
+
+
+def summarize_prices(
+    batch: PriceBatch, coin_ids: np.ndarray, now: Optional[datetime] = None
+) -> TextClause:
+    """Fold a loaded batch into the latest-per-coin rows and price buckets."""
+    timestamps = batch.extracted_at_array()
+    now = now or datetime.utcnow()
+    params: Dict[str, Any] = {
+        "coin_ids": coin_ids.tolist(),
+        "extracted_at": timestamps.astype(object).tolist(),
+        "first_at": timestamps.min().astype(object),
+        "last_at": timestamps.max().astype(object),
+        "since": bucket_start(now - HEALTH_WINDOW),
+    }
+    return text(SUMMARIZE_PRICES_SQL).bindparams(**params)
+
+
+def summarize_run_events(events: List[Dict[str, Any]]) -> List[Insert]:
+    """Count a flush's finished stage events into buckets and keep the
+    latest event of each stage.
+
+    Progress snapshots ("running") update the stage but are not counted,
+    so each stage outcome counts once, as in the ``pipeline_runs`` view.
+    """
+    counts = Counter(
+        (bucket_start(e["started_at"]), run_series(e["stage"], e["status"]))
+        for e in events
+        if e["status"] != "running"
+    )
+    latest = {e["stage"]: e for e in events}
+
+    statements = []
+    if counts:
+        buckets = insert(PipelineHealthBucket.__table__).values(
+            [
+                {
+                    "bucket_start": start,
+                    "series": series,
+                    "event_count": count,
+                    "valid_count": 0,
+                    "value_sum": 0.0,
+                }
+                for (start, series), count in counts.items()
+            ]
+        )
+        table = PipelineHealthBucket.__table__
+        statements.append(
+            buckets.on_conflict_do_update(
+                index_elements=["bucket_start", "series"],
+                set_={
+                    "event_count": table.c.event_count + buckets.excluded.event_count,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+
+    stages = insert(PipelineHealthStage.__table__).values(
+        [
+            {
+                "stage": e["stage"],
+                "status": e["status"],
+                "run_id": e["run_id"],
+                "records_processed": e["records_processed"],
+                "error_message": e["error_message"],
+                "completed_at": e["completed_at"],
+            }
+            for e in latest.values()
+        ]
+    )
+    table = PipelineHealthStage.__table__
+    statements.append(
+        stages.on_conflict_do_update(
+            index_elements=["stage"],
+            set_={
+                "status": stages.excluded.status,
+                "run_id": stages.excluded.run_id,
+                "records_processed": stages.excluded.records_processed,
+                "error_message": stages.excluded.error_message,
+                "completed_at": stages.excluded.completed_at,
+                "updated_at": func.now(),
+            },
+            # A slow run flushing late never hides a newer run's outcome
+            where=table.c.completed_at <= stages.excluded.completed_at,
+        )
+    )
+    return statements
+
+
+def prune_buckets(now: Optional[datetime] = None) -> TextClause:
+    """Drop buckets past the retention window."""
+    now = now or datetime.utcnow()
+    return text(PRUNE_BUCKETS_SQL).bindparams(before=now - BUCKET_RETENTION)
+
+
+def read_health(now: Optional[datetime] = None) -> TextualSelect:
+    """The one-row health summary as of ``now``."""
+    now = now or datetime.utcnow()
+    statement = text(HEALTH_READ_SQL).bindparams(
+        since=bucket_start(now - HEALTH_WINDOW),
+        hour_since=bucket_start(now - timedelta(hours=1)),
+    )
+    # asyncpg leaves json as text unless the column is typed
+    return statement.columns(run_counts=JSON, last_stages=JSON)
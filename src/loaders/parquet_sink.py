@@ -0,0 +1,152 @@
+import logging
+import os
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.models.batch import FLOAT_COLUMNS, INTEGER_COLUMNS, PriceBatch
+
+logger = logging.getLogger(__name__)
+
+LAKE_TABLE = "crypto_prices"
+COMPACTED_FILE = "day.parquet"
+
+# Fixed schema so every file agrees, even when a column is all-null in one
+# batch; date and symbol become the Hive partition directories.
+LAKE_SCHEMA = pa.schema(
+    [
+        ("symbol", pa.string()),
+        ("name", pa.string()),
+        *[(column, pa.float64()) for column in FLOAT_COLUMNS],
+        *[(column, pa.int64()) for column in INTEGER_COLUMNS],
+        ("last_updated", pa.timestamp("us", tz="UTC")),
+        ("extracted_at", pa.timestamp("us")),
+        ("date", pa.string()),
+    ]
+)
+PARTITIONING = ds.partitioning(
+    pa.schema([("date", pa.string()), ("symbol", pa.string())]), flavor="hive"
+)
+
+
+class ParquetSink:
+    """Writes price batches to a Hive-partitioned Parquet lake.
+
+    Files land under ``<lake_dir>/crypto_prices/date=YYYY-MM-DD/symbol=XYZ/``.
+    Every write adds one small file per (date, symbol); ``compact`` later
+    merges each closed day's files into a single ``day.parquet``.
+
+    The lake only holds prices. Run tracking, partition maintenance and
+    backfill checkpoints live in the warehouse, so with LOAD_SINKS=parquet
+    alone those calls are no-ops.
+    """
+
+    def __init__(self, lake_dir: Union[str, Path], compression: str = "zstd"):
+        self.root = Path(lake_dir) / LAKE_TABLE
+        self.compression = None if compression == "none" else compression
+
+    def dataset(self) -> ds.Dataset:
+        """The lake as a pyarrow dataset, for partition-pruned scans."""
+        return ds.dataset(self.root, format="parquet", partitioning="hive")
+
+    def create_tables(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _to_table(self, batch: PriceBatch) -> pa.Table:
+        frame = batch.to_frame()
+        frame["last_updated"] = pd.to_datetime(
+            frame["last_updated"], utc=True, errors="coerce"
+        )
+        frame["date"] = frame["extracted_at"].dt.strftime("%Y-%m-%d")
+        return pa.Table.from_pandas(frame, schema=LAKE_SCHEMA, preserve_index=False)
+
+    def bulk_insert_crypto_prices(
+        self, data: Union[PriceBatch, List[Dict]], run_id: Optional[str] = None
+    ) -> int:
+        """Write a batch as one new file per (date, symbol) partition"""
+        if not len(data):
+            return 0
+
+        batch = PriceBatch.coerce(data)
+        ds.write_dataset(
+            self._to_table(batch),
+            self.root,
+            format="parquet",
+            partitioning=PARTITIONING,
+            basename_template=(
+                f"part-{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+                "-{i}.parquet"
+            ),
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=ds.ParquetFileFormat().make_write_options(
+                compression=self.compression
+            ),
+        )
+        logger.info(f"🗄️ Wrote {len(batch)} rows to the Parquet lake")
+        return len(batch)
+
+    def compact(self, before: Optional[date] = None) -> Dict[str, int]:
+        """Merge each (date, symbol) partition of days before ``before``
+        (default today, UTC) into a single file.
+
+        The merged file is renamed into place before the small files are
+        removed, so readers never miss rows; duplicates left by a crash in
+        between are dropped on the next compaction.
+        """
+        cutoff = (before or datetime.utcnow().date()).isoformat()
+        days, files = set(), 0
+        for partition in sorted(self.root.glob("date=*/symbol=*")):
+            day = partition.parent.name.split("=", 1)[1]
+            parts = sorted(partition.glob("*.parquet"))
+            if day >= cutoff or [p.name for p in parts] in ([], [COMPACTED_FILE]):
+                continue
+            self._merge(partition, parts)
+            days.add(day)
+            files += len(parts)
+
+        if files:
+            logger.info(f"Compacted {files} Parquet files across {len(days)} days")
+        return {"days": len(days), "files_merged": files}
+
+    def _merge(self, partition: Path, parts: List[Path]) -> None:
+        frame = pa.concat_tables([pq.read_table(part) for part in parts]).to_pandas()
+        frame = (
+            frame.drop_duplicates("extracted_at", keep="last")
+            .sort_values("extracted_at")
+            .reset_index(drop=True)
+        )
+        schema = pa.schema(
+            [f for f in LAKE_SCHEMA if f.name not in PARTITIONING.schema.names]
+        )
+        table = pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+
+        # Dot-prefixed files are ignored by dataset discovery until renamed
+        staging = partition / f".{COMPACTED_FILE}.tmp"
+        pq.write_table(table, staging, compression=self.compression)
+        os.replace(staging, partition / COMPACTED_FILE)
+        for part in parts:
+            if part.name != COMPACTED_FILE:
+                part.unlink()
+
+    def maintain_partitions(self) -> Dict[str, Any]:
+        return {"compacted": self.compact()}
+
+    def record_pipeline_events(self, events: List[Dict[str, Any]]) -> None:
+        logger.debug(f"No warehouse sink; dropping {len(events)} pipeline events")
+
+    def log_pipeline_run(self, *args: Any, **kwargs: Any) -> None:
+        logger.debug("No warehouse sink; not logging pipeline run")
+
+    def get_completed_backfill_windows(
+        self, coin_id: str
+    ) -> Set[Tuple[datetime, datetime]]:
+        return set()
+
+    def mark_backfill_windows(self, checkpoints: List[Dict[str, Any]]) -> None:
+        return None
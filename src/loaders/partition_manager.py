@@ -0,0 +1,207 @@
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from src.config.settings import DatabaseConfig
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "crypto_price_facts"
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    start: datetime
+    end: datetime
+
+
+def period_start(value: datetime, interval: str) -> datetime:
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day.replace(day=1) if interval == "month" else day
+
+
+def next_period(start: datetime, interval: str) -> datetime:
+    if interval == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def partition_for(
+    start: datetime, interval: str, table: str = PARENT_TABLE
+) -> Partition:
+    suffix = start.strftime("%Y%m") if interval == "month" else start.strftime("%Y%m%d")
+    return Partition(f"{table}_p{suffix}", start, next_period(start, interval))
+
+
+def parse_partition_name(name: str, table: str = PARENT_TABLE) -> Optional[Partition]:
+    """Recover a partition's bounds from its name (pYYYYMM or pYYYYMMDD)."""
+    match = re.match(rf"^{re.escape(table)}_p(\d{{6}}|\d{{8}})$", name)
+    if not match:
+        return None
+    suffix = match.group(1)
+    if len(suffix) == 6:
+        return partition_for(datetime.strptime(suffix, "%Y%m"), "month", table)
+    return partition_for(datetime.strptime(suffix, "%Y%m%d"), "day", table)
+
+
+class PartitionManager:
+    """Keeps the price fact table's range partitions ahead of the data and
+    expires old ones.
+
+    Partitions are named after the period they cover, so their bounds can
+    be read back from the catalog without parsing partition expressions.
+    Rows outside every partition land in the ``<table>_default`` partition
+    and are moved out when a partition covering them is created.
+    """
+
+    def __init__(
+        self,
+        interval: str = "month",
+        premake: int = 3,
+        retention_days: int = 0,
+        retention_action: str = "detach",
+        table: str = PARENT_TABLE,
+    ):
+        self.table = table
+        self.default_partition = f"{table}_default"
+        self.interval = interval
+        self.premake = premake
+        self.retention_days = retention_days
+        self.retention_action = retention_action
+
+    def is_partitioned(self, connection: Connection) -> bool:
+        relkind = connection.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": self.table},
+        ).scalar()
+        return relkind == "p"
+
+    def existing(self, connection: Connection) -> List[Partition]:
+        names = connection.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = to_regclass(:table)"
+            ),
+            {"table": self.table},
+        ).scalars()
+        partitions = [parse_partition_name(name, self.table) for name in names]
+        return sorted((p for p in partitions if p), key=lambda p: p.start)
+
+    def ensure_partitions(
+        self,
+        connection: Connection,
+        since: Optional[datetime] = None,
+        now: Optional[datetime] = None,
+    ) -> List[str]:
+        """Create missing partitions from ``since`` through ``premake``
+        periods past ``now``. Returns the names created."""
+        now = now or datetime.utcnow()
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {self.default_partition} "
+                f"PARTITION OF {self.table} DEFAULT"
+            )
+        )
+
+        existing = self.existing(connection)
+        created = []
+        start = period_start(min(since or now, now), self.interval)
+        last = period_start(now, self.interval)
+        for _ in range(self.premake):
+            last = next_period(last, self.interval)
+
+        while start <= last:
+            partition = partition_for(start, self.interval, self.table)
+            # Skip periods already covered, e.g. after switching day <-> month
+            if not any(
+                p.start < partition.end and partition.start < p.end for p in existing
+            ):
+                self._create_partition(connection, partition)
+                created.append(partition.name)
+            start = partition.end
+
+        if created:
+            logger.info(f"Created {len(created)} partitions: {', '.join(created)}")
+        return created
+
+    def _create_partition(self, connection: Connection, partition: Partition) -> None:
+        bounds = {"start": partition.start, "end": partition.end}
+        connection.execute(
+            text(
+                f"CREATE TABLE {partition.name} "
+                f"(LIKE {self.table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+        # ATTACH refuses while the default partition holds rows for the range
+        connection.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {self.default_partition} "
+                "WHERE extracted_at >= :start AND extracted_at < :end RETURNING *) "
+                f"INSERT INTO {partition.name} SELECT * FROM moved"
+            ),
+            bounds,
+        )
+        connection.execute(
+            text(
+                f"ALTER TABLE {self.table} ATTACH PARTITION {partition.name} "
+                f"FOR VALUES FROM ('{partition.start.isoformat()}') "
+                f"TO ('{partition.end.isoformat()}')"
+            )
+        )
+
+    def apply_retention(
+        self, connection: Connection, now: Optional[datetime] = None
+    ) -> List[str]:
+        """Detach or drop partitions that ended before the retention cutoff."""
+        if self.retention_days <= 0:
+            return []
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+
+        expired = [p for p in self.existing(connection) if p.end <= cutoff]
+        for partition in expired:
+            connection.execute(
+                text(f"ALTER TABLE {self.table} DETACH PARTITION {partition.name}")
+            )
+            if self.retention_action == "drop":
+                connection.execute(text(f"DROP TABLE {partition.name}"))
+
+        if expired:
+            logger.info(
+                f"Retention: {self.retention_action} {len(expired)} partitions "
+                f"ending before {cutoff:%Y-%m-%d}"
+            )
+        return [p.name for p in expired]
+
+    def maintain(
+        self, connection: Connection, now: Optional[datetime] = None
+    ) -> Dict[str, List[str]]:
+        """Pre-create upcoming partitions and expire old ones."""
+        if not self.is_partitioned(connection):
+            logger.warning(
+                f"{self.table} is not partitioned; run the database migrations"
+            )
+            return {"created": [], "expired": []}
+        return {
+            "created": self.ensure_partitions(connection, now=now),
+            "expired": self.apply_retention(connection, now=now),
+        }
+
+
+def build_partition_manager(
+    db_config: DatabaseConfig, table: str = PARENT_TABLE
+) -> PartitionManager:
+    """Create the partition manager configured by the PARTITION_* settings."""
+    return PartitionManager(
+        db_config.partition_interval,
+        db_config.partition_premake,
+        db_config.partition_retention_days,
+        db_config.partition_retention_action,
+        table,
+    )
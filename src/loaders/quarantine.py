@@ -0,0 +1,134 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.models.batch import PriceBatch
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE classes caused by the rows themselves: data exceptions (bad
+# values, overlong strings) and integrity violations (NOT NULL, keys). Any
+# other failure, such as a lost connection, is not fixed by splitting.
+ROW_ERROR_CLASSES = ("22", "23")
+
+Rejected = List[Tuple[PriceBatch, BaseException]]
+
+
+def _driver_errors(error: Optional[BaseException]) -> List[BaseException]:
+    """Driver errors carrying a SQLSTATE, outermost first, found through
+    SQLAlchemy's ``orig`` and exception chaining."""
+    found = []
+    while error is not None:
+        if getattr(error, "pgcode", None) or getattr(error, "sqlstate", None):
+            found.append(error)
+        error = getattr(error, "orig", None) or error.__cause__
+    return found
+
+
+def sqlstate(error: BaseException) -> Optional[str]:
+    """SQLSTATE of a psycopg2, asyncpg or SQLAlchemy-wrapped error."""
+    driver_errors = _driver_errors(error)
+    if not driver_errors:
+        return None
+    return getattr(driver_errors[0], "pgcode", None) or driver_errors[0].sqlstate
+
+
+def error_text(error: BaseException) -> str:
+    """The database's own message, without SQLAlchemy's statement and
+    parameters or asyncpg adapter prefixes."""
+    driver_errors = _driver_errors(error)
+    return str(driver_errors[-1] if driver_errors else error).strip()
+
+
+def is_row_error(error: BaseException) -> bool:
+    code = sqlstate(error)
+    return code is not None and code[:2] in ROW_ERROR_CLASSES
+
+
+def _halves(batch: PriceBatch) -> List[PriceBatch]:
+    middle = len(batch) // 2
+    # Pushed onto a stack, so the first half is popped and loaded first
+    return [batch.take(slice(middle, None)), batch.take(slice(0, middle))]
+
+
+def bisect_load(
+    load: Callable[[PriceBatch], int], batch: PriceBatch
+) -> Tuple[int, Rejected]:
+    """Load ``batch``, splitting it in half on row errors until the rows at
+    fault are isolated.
+
+    ``load`` must write each call in its own transaction. The whole batch
+    goes in one call when it is clean; k bad rows cost O(k log n) extra
+    calls. Returns the rows written and the rejected single-row batches
+    with their errors. Errors that are not row errors are raised, leaving
+    halves loaded so far committed.
+    """
+    written, rejected = 0, []
+    pending = [batch]
+    while pending:
+        part = pending.pop()
+        try:
+            written += load(part)
+        except Exception as e:
+            if not is_row_error(e):
+                raise
+            if part is batch:
+                logger.warning(
+                    f"Isolating bad rows in a {len(batch)}-row batch: "
+                    f"{error_text(e).splitlines()[0]}"
+                )
+            if len(part) == 1:
+                rejected.append((part, e))
+            else:
+                pending.extend(_halves(part))
+    return written, rejected
+
+
+async def bisect_load_async(
+    load: Callable[[PriceBatch], Awaitable[int]], batch: PriceBatch
+) -> Tuple[int, Rejected]:
+    """``bisect_load`` for coroutine loaders."""
+    written, rejected = 0, []
+    pending = [batch]
+    while pending:
+        part = pending.pop()
+        try:
+            written += await load(part)
+        except Exception as e:
+            if not is_row_error(e):
+                raise
+            if part is batch:
+                logger.warning(
+                    f"Isolating bad rows in a {len(batch)}-row batch: "
+                    f"{error_text(e).splitlines()[0]}"
+                )
+            if len(part) == 1:
+                rejected.append((part, e))
+            else:
+                pending.extend(_halves(part))
+    return written, rejected
+
+
+def quarantine_rows(rejected: Rejected, run_id: Optional[str]) -> List[Dict[str, Any]]:
+    """crypto_prices_quarantine rows for rejected single-row batches."""
+    rows = []
+    for row, error in rejected:
+        payload = row.to_payload()
+        record = {column: values[0] for column, values in payload["columns"].items()}
+        extracted_at = payload["extracted_at"]
+        record["extracted_at"] = (
+            extracted_at[0] if isinstance(extracted_at, list) else extracted_at
+        )
+        message = error_text(error)
+        rows.append(
+            {
+                "run_id": run_id,
+                "error_code": sqlstate(error),
+                "error_message": message,
+                "payload": record,
+            }
+        )
+        logger.warning(
+            f"Quarantined {record['symbol']} at {record['extracted_at']}: "
+            f"{message.splitlines()[0]}"
+        )
+    return rows
@@ -0,0 +1,148 @@
+from datetime import date, datetime, time
+from typing import Any, Dict, List
+
+import numpy as np
+from sqlalchemy import TextClause, text
+
+from src.models.batch import PriceBatch
+from src.models.schemas import CryptoPrice, PriceRollup
+
+FACT_TABLE = CryptoPrice.__tablename__
+ROLLUP_TABLE = PriceRollup.__tablename__
+ROLLUP_GRAINS = ("hour", "day")
+
+_GRAINS_SQL = ", ".join(f"('{grain}')" for grain in ROLLUP_GRAINS)
+
+_ROLLUP_COLUMNS = (
+    "coin_id, grain, bucket_start, open_at, open_price, close_at, close_price, "
+    "high_price, low_price, price_count, price_sum, price_sum_squares"
+)
+
+# Partial aggregates of the rows in ``fresh``, one per (coin, grain, bucket)
+_AGGREGATE_SQL = """
+SELECT
+    coin_id,
+    grain,
+    bucket_start,
+    min(extracted_at),
+    (array_agg(current_price ORDER BY extracted_at))[1],
+    max(extracted_at),
+    (array_agg(current_price ORDER BY extracted_at DESC))[1],
+    max(current_price),
+    min(current_price),
+    count(*),
+    sum(current_price),
+    sum(current_price * current_price)
+FROM fresh
+GROUP BY coin_id, grain, bucket_start
+"""
+
+# Combining two partials: the earlier open, the later close, the wider
+# range and the summed moments. Any split of a bucket's rows merges to the
+# same result, so buckets grow one batch at a time.
+_MERGE_SQL = """
+ON CONFLICT (coin_id, grain, bucket_start) DO UPDATE SET
+    open_price = CASE WHEN EXCLUDED.open_at < r.open_at
+        THEN EXCLUDED.open_price ELSE r.open_price END,
+    open_at = LEAST(r.open_at, EXCLUDED.open_at),
+    close_price = CASE WHEN EXCLUDED.close_at > r.close_at
+        THEN EXCLUDED.close_price ELSE r.close_price END,
+    close_at = GREATEST(r.close_at, EXCLUDED.close_at),
+    high_price = GREATEST(r.high_price, EXCLUDED.high_price),
+    low_price = LEAST(r.low_price, EXCLUDED.low_price),
+    price_count = r.price_count + EXCLUDED.price_count,
+    price_sum = r.price_sum + EXCLUDED.price_sum,
+    price_sum_squares = r.price_sum_squares + EXCLUDED.price_sum_squares,
+    updated_at = now()
+"""
+
+# Reads back only the batch's own fact rows, so rows the load quarantined
+# or skipped never count. Rows at or before their bucket's close were
+# merged by an earlier batch (a replayed spool segment, a retried run) or
+# arrived late for a closed bucket (a backfill); either way they are left
+# out, which keeps replays from counting a row twice. Returns the buckets
+# merged and the (row, bucket) pairs left out.
+ROLLUP_BATCH_SQL = f"""
+WITH batch AS (
+    SELECT *
+    FROM unnest(CAST(:coin_ids AS smallint[]), CAST(:extracted_at AS timestamp[]))
+        AS b(coin_id, extracted_at)
+),
+candidates AS (
+    SELECT f.coin_id, g.grain, date_trunc(g.grain, f.extracted_at) AS bucket_start,
+           f.extracted_at, f.current_price,
+           r.close_at IS NULL OR f.extracted_at > r.close_at AS is_fresh
+    FROM batch b
+    JOIN {FACT_TABLE} f
+        ON f.coin_id = b.coin_id AND f.extracted_at = b.extracted_at
+    CROSS JOIN (VALUES {_GRAINS_SQL}) AS g(grain)
+    LEFT JOIN {ROLLUP_TABLE} r
+        ON r.coin_id = f.coin_id
+        AND r.grain = g.grain
+        AND r.bucket_start = date_trunc(g.grain, f.extracted_at)
+    WHERE f.extracted_at BETWEEN :first_at AND :last_at
+),
+fresh AS (
+    SELECT * FROM candidates WHERE is_fresh
+),
+merged AS (
+    INSERT INTO {ROLLUP_TABLE} AS r ({_ROLLUP_COLUMNS})
+    {_AGGREGATE_SQL}
+    {_MERGE_SQL}
+    RETURNING 1
+)
+SELECT
+    (SELECT count(*) FROM merged) AS buckets,
+    (SELECT count(*) FROM candidates WHERE NOT is_fresh) AS skipped
+"""
+
+REBUILD_DELETE_SQL = f"""
+DELETE FROM {ROLLUP_TABLE}
+WHERE bucket_start >= :start AND bucket_start < :end
+"""
+
+REBUILD_INSERT_SQL = f"""
+WITH fresh AS (
+    SELECT f.coin_id, g.grain, date_trunc(g.grain, f.extracted_at) AS bucket_start,
+           f.extracted_at, f.current_price
+    FROM {FACT_TABLE} f
+    CROSS JOIN (VALUES {_GRAINS_SQL}) AS g(grain)
+    WHERE f.extracted_at >= :start AND f.extracted_at < :end
+)
+INSERT INTO {ROLLUP_TABLE} AS r ({_ROLLUP_COLUMNS})
+{_AGGREGATE_SQL}
+"""
+
+
+def rollup_batch(batch: PriceBatch, coin_ids: np.ndarray) -> TextClause:
+    """Merge the partial aggregates of ``batch``'s rows into their buckets.
+
+    The work is proportional to the batch, not to the history behind it.
+    The statement returns one row: the buckets merged and the rows left
+    out of a bucket because they were at or before its close.
+    """
+    timestamps = batch.extracted_at_array()
+    params: Dict[str, Any] = {
+        "coin_ids": coin_ids.tolist(),
+        "extracted_at": timestamps.astype(object).tolist(),
+        "first_at": timestamps.min().astype(object),
+        "last_at": timestamps.max().astype(object),
+    }
+    return text(ROLLUP_BATCH_SQL).bindparams(**params)
+
+
+def rebuild_rollups(start: date, end: date) -> List[TextClause]:
+    """Recompute every bucket in [start, end) from the fact table.
+
+    For late rows that landed in an already closed bucket, such as a
+    backfill of a day the live pipeline covered. Whole days only, so no
+    daily bucket is cut in two; run it while nothing loads into the range.
+    """
+    bounds = {
+        "start": datetime.combine(start, time()),
+        "end": datetime.combine(end, time()),
+    }
+    return [
+        text(REBUILD_DELETE_SQL).bindparams(**bounds),
+        text(REBUILD_INSERT_SQL).bindparams(**bounds),
+    ]
@@ -0,0 +1,96 @@
+import asyncio
+import inspect
+import logging
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
+
+from src.config.settings import DatabaseConfig
+from src.loaders.async_warehouse_loader import AsyncWarehouseLoader
+from src.loaders.warehouse_loader import WarehouseLoader
+from src.models.batch import PriceBatch
+
+if TYPE_CHECKING:
+    # pyarrow is only imported by deployments that write the lake
+    from src.loaders.parquet_sink import ParquetSink
+
+logger = logging.getLogger(__name__)
+
+Loader = Union[WarehouseLoader, AsyncWarehouseLoader, "ParquetSink", "FanOutLoader"]
+
+
+class FanOutLoader:
+    """Loads price batches into the warehouse and copies them to extra sinks.
+
+    Every other call (run tracking, partitions, backfill checkpoints) goes
+    to the warehouse. The warehouse stays the source of truth: a failing
+    extra sink is logged and skipped rather than failing the load.
+    """
+
+    def __init__(self, primary: Loader, sinks: List[Loader]):
+        self.primary = primary
+        self.sinks = sinks
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.primary, name)
+
+    async def create_tables(self) -> None:
+        for loader in (self.primary, *self.sinks):
+            await call_loader(loader.create_tables)
+
+    async def maintain_partitions(self) -> Dict[str, Any]:
+        result = await call_loader(self.primary.maintain_partitions)
+        for sink in self.sinks:
+            result.update(await call_loader(sink.maintain_partitions))
+        return result
+
+    async def bulk_insert_crypto_prices(
+        self, data: Union[PriceBatch, List[Dict]], run_id: Optional[str] = None
+    ) -> int:
+        written = await call_loader(
+            self.primary.bulk_insert_crypto_prices, data, run_id=run_id
+        )
+        for sink in self.sinks:
+            try:
+                await call_loader(sink.bulk_insert_crypto_prices, data, run_id=run_id)
+            except Exception:
+                logger.exception(f"❌ {type(sink).__name__} failed; batch skipped.")
+        return written
+
+    async def close(self) -> None:
+        for loader in (self.primary, *self.sinks):
+            await close_loader(loader)
+
+
+def build_loader(db_config: DatabaseConfig) -> Loader:
+    """Create the loader for LOAD_SINKS, with the warehouse on LOADER_BACKEND."""
+    sinks: List[Loader] = []
+    if "warehouse" in db_config.load_sinks:
+        if db_config.loader_backend == "async":
+            sinks.append(AsyncWarehouseLoader(db_config))
+        else:
+            sinks.append(WarehouseLoader(db_config))
+    if "parquet" in db_config.load_sinks:
+        # Imported here so warehouse-only deployments never load pyarrow
+        from src.loaders.parquet_sink import ParquetSink
+
+        sinks.append(ParquetSink(db_config.lake_dir, db_config.parquet_compression))
+    if len(sinks) == 1:
+        return sinks[0]
+    return FanOutLoader(sinks[0], sinks[1:])
+
+
+async def close_loader(loader: Loader) -> None:
+    """Release a loader's connections, if it holds any."""
+    close = getattr(loader, "close", None)
+    if close is not None:
+        await call_loader(close)
+
+
+async def call_loader(method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Call a loader method from async code without blocking the loop.
+
+    Coroutine methods are awaited directly; blocking ones run on a worker
+    thread.
+    """
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    return await asyncio.to_thread(method, *args, **kwargs)
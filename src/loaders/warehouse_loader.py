@@ -1,21 +1,242 @@
 import logging
+import tempfile
+import time
 import uuid
 from contextlib import contextmanager
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timedelta
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import Delete, Select, case, create_engine, delete, func, select
+from sqlalchemy.dialects.postgresql import Insert, insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import sessionmaker
 
 from src.config.settings import DatabaseConfig
+from src.loaders.health_summary import (
+    prune_buckets,
+    read_health,
+    summarize_prices,
+    summarize_run_events,
+)
+from src.loaders.partition_manager import build_partition_manager
+from src.loaders.quarantine import bisect_load, error_text, quarantine_rows
+from src.loaders.rollups import rebuild_rollups, rollup_batch
 from src.models.base import Base
-from src.models.schemas import PipelineRun
+from src.models.batch import PriceBatch
+from src.models.schemas import (
+    BackfillCheckpoint,
+    Coin,
+    CryptoPrice,
+    PipelineRunEvent,
+    PipelineWorker,
+    QuarantinedPrice,
+)
+from src.monitoring.metrics import (
+    DB_FLUSH_ROWS,
+    DB_FLUSH_SECONDS,
+    ROLLUP_ROWS_SKIPPED,
+)
 
 logger = logging.getLogger(__name__)
 
+FACT_TABLE = CryptoPrice.__tablename__
+
+CREATE_STAGE_TABLE_SQL = (
+    "CREATE TEMP TABLE crypto_prices_stage "
+    f"(LIKE {FACT_TABLE} INCLUDING DEFAULTS) ON COMMIT DROP"
+)
+
+
+def merge_staged_prices_sql(columns: List[str], upsert_action: str) -> str:
+    """INSERT ... SELECT from crypto_prices_stage with the UPSERT_ACTION policy."""
+    column_list = ", ".join(columns)
+    if upsert_action == "update":
+        updates = ", ".join(
+            f"{c} = EXCLUDED.{c}"
+            for c in columns
+            if c not in ("created_at", "coin_id", "extracted_at")
+        )
+        conflict_action = f"DO UPDATE SET {updates}"
+    else:
+        conflict_action = "DO NOTHING"
+
+    # DISTINCT ON keeps a batch that repeats a key from tripping
+    # "ON CONFLICT DO UPDATE command cannot affect row a second time"
+    return (
+        f"INSERT INTO {FACT_TABLE} ({column_list}) "
+        f"SELECT DISTINCT ON (coin_id, extracted_at) {column_list} "
+        "FROM crypto_prices_stage "
+        f"ON CONFLICT (coin_id, extracted_at) {conflict_action}"
+    )
+
+
+def coin_lookup(symbols: Iterable[str]) -> Select:
+    return select(Coin.symbol, Coin.coin_id, Coin.name).where(
+        Coin.symbol.in_(list(symbols))
+    )
+
+
+def coin_upsert(coins: Dict[str, str]) -> Insert:
+    """Register symbols in the coins dictionary, returning their rows.
+
+    Every attempted insert consumes a coin_id from the sequence even when it
+    conflicts, so callers only upsert symbols ``coin_lookup`` did not find
+    (or that were renamed) to keep the small-int key space from draining.
+    """
+    table = Coin.__table__
+    stmt = insert(table).values(
+        [{"symbol": symbol, "name": name} for symbol, name in coins.items()]
+    )
+    renamed = table.c.name != stmt.excluded.name
+    return stmt.on_conflict_do_update(
+        index_elements=["symbol"],
+        set_={
+            "name": stmt.excluded.name,
+            "updated_at": case((renamed, func.now()), else_=table.c.updated_at),
+        },
+    ).returning(table.c.symbol, table.c.coin_id, table.c.name)
+
+
+class CoinDictionary:
+    """Process-local cache of the coins table, so steady-state loads map
+    symbols to coin_ids without a database round trip."""
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[str, str] = {}
+
+    def stale(self, batch: PriceBatch) -> Dict[str, str]:
+        """Symbols that are not cached yet or were renamed, with their name."""
+        latest = dict(zip(batch["symbol"].tolist(), batch["name"].tolist()))
+        return self.unknown({symbol: name or "" for symbol, name in latest.items()})
+
+    def unknown(self, names: Dict[str, str]) -> Dict[str, str]:
+        return {s: n for s, n in names.items() if self._names.get(s) != n}
+
+    def remember(self, rows: Iterable[Tuple[str, int, str]]) -> None:
+        for symbol, coin_id, name in rows:
+            self._ids[symbol] = coin_id
+            self._names[symbol] = name
+
+    def coin_ids(self, batch: PriceBatch) -> np.ndarray:
+        ids = pd.Series(batch["symbol"], copy=False).map(self._ids)
+        return ids.to_numpy(dtype=np.int16)
+
+
+def record_flush(load_method: str, written: int, started: float) -> None:
+    """Export the timing of one ``bulk_insert_crypto_prices`` call."""
+    DB_FLUSH_SECONDS.labels(load_method).observe(time.perf_counter() - started)
+    DB_FLUSH_ROWS.labels(load_method).inc(written)
+
+
+def record_rollup_skips(skipped: int) -> None:
+    """Count and log the rows a rollup merge left out of closed buckets,
+    once per hourly or daily bucket."""
+    if not skipped:
+        return
+    ROLLUP_ROWS_SKIPPED.inc(skipped)
+    logger.info(
+        f"Rollups skipped {skipped} row merges at or before their bucket's "
+        "close; if the rows were late rather than replayed, rebuild their "
+        "days with `main.py rollups`"
+    )
+
+
+def pipeline_run_event(
+    run_id: str,
+    stage: str,
+    status: str,
+    records_processed: int,
+    error_message: Optional[str] = None,
+    started_at: Optional[datetime] = None,
+    completed_at: Optional[datetime] = None,
+    duration_seconds: Optional[float] = None,
+    attempts: Optional[int] = None,
+    bytes_fetched: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Build a pipeline_run_events row."""
+    completed_at = completed_at or datetime.utcnow()
+    started_at = started_at or completed_at
+    if duration_seconds is None:
+        duration_seconds = (completed_at - started_at).total_seconds()
+    return {
+        "run_id": run_id,
+        "stage": stage,
+        "status": status,
+        "records_processed": records_processed,
+        "error_message": error_message,
+        "started_at": started_at,
+        "completed_at": completed_at,
+        "duration_seconds": duration_seconds,
+        "attempts": attempts,
+        "bytes_fetched": bytes_fetched,
+    }
+
+
+def backfill_checkpoint_upsert(checkpoints: List[Dict[str, Any]]) -> Insert:
+    """Upsert backfill window checkpoints keyed on (coin_id, window)."""
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "records_loaded": 0,
+            "error_message": None,
+            **checkpoint,
+            "updated_at": now,
+        }
+        for checkpoint in checkpoints
+    ]
+    stmt = insert(BackfillCheckpoint.__table__).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=["coin_id", "window_start", "window_end"],
+        set_={
+            "status": stmt.excluded.status,
+            "records_loaded": stmt.excluded.records_loaded,
+            "error_message": stmt.excluded.error_message,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+def worker_lease_upsert(worker_id: str, lease_seconds: float) -> Insert:
+    """Take or renew a worker lease, timed by the database clock so workers
+    with skewed clocks still agree on who is alive."""
+    expires_at = func.now() + timedelta(seconds=lease_seconds)
+    stmt = insert(PipelineWorker.__table__).values(
+        worker_id=worker_id, expires_at=expires_at
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["worker_id"],
+        set_={"renewed_at": func.now(), "expires_at": stmt.excluded.expires_at},
+    )
+
+
+def expired_workers_delete() -> Delete:
+    return delete(PipelineWorker.__table__).where(
+        PipelineWorker.expires_at <= func.now()
+    )
+
+
+def live_workers() -> Select:
+    return (
+        select(PipelineWorker.worker_id)
+        .where(PipelineWorker.expires_at > func.now())
+        .order_by(PipelineWorker.worker_id)
+    )
+
 
 class WarehouseLoader:
     def __init__(self, db_config: DatabaseConfig):
@@ -28,12 +249,20 @@ class WarehouseLoader:
             echo=False,
         )
         self.SessionLocal = sessionmaker(bind=self.engine)
+        self.partitions = build_partition_manager(db_config)
+        self.coins = CoinDictionary()
 
     def create_tables(self):
         """Create all tables based on Base metadata"""
         Base.metadata.create_all(bind=self.engine)
+        self.maintain_partitions()
         logger.info("✅ Database tables created or already exist.")
 
+    def maintain_partitions(self) -> Dict[str, List[str]]:
+        """Pre-create upcoming price partitions and expire old ones"""
+        with self.engine.begin() as connection:
+            return self.partitions.maintain(connection)
+
     @contextmanager
     def get_session(self):
         session = self.SessionLocal()
@@ -47,28 +276,33 @@ class WarehouseLoader:
         finally:
             session.close()
 
-    def bulk_insert_crypto_prices(self, data: List[Dict]) -> int:
-        """Bulk insert crypto price records into raw table"""
-        if not data:
+    def bulk_insert_crypto_prices(
+        self, data: Union[PriceBatch, List[Dict]], run_id: Optional[str] = None
+    ) -> int:
+        """Bulk insert crypto price records into raw table
+
+        If the batch hits a constraint or data error it is bisected until the
+        offending rows are found; those go to crypto_prices_quarantine with
+        ``run_id`` and every other row still loads.
+        """
+        if not len(data):
             logger.info("No data to insert")
             return 0
 
+        batch = PriceBatch.coerce(data)
+
+        started = time.perf_counter()
         try:
-            for record in data:
-                record["id"] = str(uuid.uuid4())
-                record["created_at"] = datetime.utcnow()
-
-            df = pd.DataFrame(data)
-            df.to_sql(
-                "crypto_prices_raw",
-                self.engine,
-                if_exists="append",
-                index=False,
-                method="multi",
-                chunksize=self.db_config.batch_size or 100,
-            )
-            logger.info(f"✅ Inserted {len(data)} crypto price records.")
-            return len(data)
+            written, rejected = bisect_load(self._load_crypto_prices, batch)
+            if rejected:
+                self.quarantine_prices(quarantine_rows(rejected, run_id))
+            record_flush(self.db_config.load_method, written, started)
+            logger.info(f"✅ Inserted {written} crypto price records.")
+            if written:
+                self.update_health_summary(batch)
+            if written and self.db_config.rollups_enabled:
+                self.roll_up_prices(batch)
+            return written
 
         except SQLAlchemyError as e:
             logger.exception("❌ Database error during bulk insert.")
@@ -77,6 +311,193 @@ class WarehouseLoader:
             logger.exception("❌ Unexpected error during bulk insert.")
             raise
 
+    def _load_crypto_prices(self, batch: PriceBatch) -> int:
+        """Write a batch with LOAD_METHOD in a single transaction."""
+        frame = batch.to_fact_frame(self._coin_ids(batch))
+        if self.db_config.load_method == "copy":
+            return self._copy_crypto_prices(frame)
+        if self.db_config.load_method == "upsert":
+            written = self._upsert_crypto_prices(frame)
+            if written < len(batch):
+                logger.info(f"Skipped {len(batch) - written} rows already present.")
+            return written
+        frame.to_sql(
+            FACT_TABLE,
+            self.engine,
+            if_exists="append",
+            index=False,
+            method="multi",
+            chunksize=self.db_config.batch_size or 100,
+        )
+        return len(batch)
+
+    def update_health_summary(self, batch: PriceBatch) -> int:
+        """Fold a loaded batch into the health summary.
+
+        Never raises: the prices are already stored, and a missed update
+        only leaves this batch out of the counts; the next batch brings its
+        coins' latest extraction current. Returns the buckets touched.
+        """
+        try:
+            coin_ids = self._coin_ids(batch)
+            with self.engine.begin() as connection:
+                return connection.execute(summarize_prices(batch, coin_ids)).rowcount
+        except SQLAlchemyError as e:
+            logger.error(
+                f"❌ Could not update the health summary for {len(batch)} "
+                f"price rows: {error_text(e)}"
+            )
+            return 0
+
+    def roll_up_prices(self, batch: PriceBatch) -> int:
+        """Merge a loaded batch into the hourly and daily OHLC rollups.
+
+        Never raises: the prices are already stored, and a missed merge is
+        repaired by rebuilding the day. Returns the buckets touched.
+        """
+        try:
+            coin_ids = self._coin_ids(batch)
+            with self.engine.begin() as connection:
+                merged = connection.execute(rollup_batch(batch, coin_ids)).one()
+        except SQLAlchemyError as e:
+            logger.error(
+                f"❌ Could not roll up {len(batch)} price rows, rebuild their "
+                f"days with `main.py rollups`: {error_text(e)}"
+            )
+            return 0
+        record_rollup_skips(merged.skipped)
+        return merged.buckets
+
+    def rebuild_price_rollups(self, start: date, end: date) -> int:
+        """Recompute the OHLC rollups of [start, end) from the fact table"""
+        with self.engine.begin() as connection:
+            delete_stmt, insert_stmt = rebuild_rollups(start, end)
+            connection.execute(delete_stmt)
+            return connection.execute(insert_stmt).rowcount
+
+    def _coin_ids(self, batch: PriceBatch) -> np.ndarray:
+        stale = self.coins.stale(batch)
+        if stale:
+            with self.engine.begin() as connection:
+                self.coins.remember(connection.execute(coin_lookup(stale)))
+                stale = self.coins.unknown(stale)
+                if stale:
+                    self.coins.remember(connection.execute(coin_upsert(stale)))
+        return self.coins.coin_ids(batch)
+
+    @contextmanager
+    def _csv_buffer(self, frame: pd.DataFrame) -> Iterator[IO[str]]:
+        """Render fact rows as COPY-ready CSV in a spooled buffer.
+
+        The buffer stays in memory up to COPY_SPOOL_MAX_BYTES and spills to a
+        temp file beyond that, so arbitrarily large batches load in one COPY
+        without holding the whole rendered payload in RAM.
+        """
+        chunk_rows = self.db_config.copy_chunk_rows
+        with tempfile.SpooledTemporaryFile(
+            max_size=self.db_config.copy_spool_max_bytes, mode="w+", newline=""
+        ) as buffer:
+            for start in range(0, len(frame), chunk_rows):
+                frame.iloc[start : start + chunk_rows].to_csv(
+                    buffer, index=False, header=False, na_rep="\\N"
+                )
+            buffer.seek(0)
+            yield buffer
+
+    @contextmanager
+    def _raw_cursor(self) -> Iterator[Any]:
+        """psycopg2 cursor on a pooled connection, committed as one unit."""
+        connection = self.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                yield cursor
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _copy_crypto_prices(self, frame: pd.DataFrame) -> int:
+        """Stream fact rows into the fact table with COPY ... FROM STDIN."""
+        with self._csv_buffer(frame) as buffer, self._raw_cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {FACT_TABLE} ({', '.join(frame.columns)}) "
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+        return len(frame)
+
+    def _upsert_crypto_prices(self, frame: pd.DataFrame) -> int:
+        """COPY fact rows into a temp table and merge on (coin_id, extracted_at).
+
+        Rows that already exist are updated or skipped according to
+        UPSERT_ACTION, so retried runs and overlapping backfills become
+        no-ops instead of aborting the whole batch on the first conflict.
+        Returns the number of rows inserted or updated.
+        """
+        columns = list(frame.columns)
+        with self._csv_buffer(frame) as buffer, self._raw_cursor() as cursor:
+            column_list = ", ".join(columns)
+            cursor.execute(CREATE_STAGE_TABLE_SQL)
+            cursor.copy_expert(
+                f"COPY crypto_prices_stage ({column_list}) "
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+
+            cursor.execute(
+                merge_staged_prices_sql(columns, self.db_config.upsert_action)
+            )
+            return cursor.rowcount
+
+    def record_pipeline_events(self, events: List[Dict[str, Any]]) -> None:
+        """Append a run's stage events to the ledger, and fold them into
+        the health summary, in one transaction"""
+        if not events:
+            return
+
+        try:
+            with self.get_session() as session:
+                session.execute(insert(PipelineRunEvent.__table__), events)
+                for statement in summarize_run_events(events):
+                    session.execute(statement)
+                session.execute(prune_buckets())
+                logger.info(
+                    f"📝 Recorded {len(events)} pipeline events "
+                    f"for {events[0]['run_id']}"
+                )
+        except Exception:
+            logger.exception("❌ Failed to record pipeline events.")
+            raise
+
+    def read_health_summary(self) -> Dict[str, Any]:
+        """The health summary the health checks evaluate, as one row"""
+        with self.engine.connect() as connection:
+            return dict(connection.execute(read_health()).one()._mapping)
+
+    def quarantine_prices(self, rows: List[Dict[str, Any]]) -> None:
+        """Store rejected price rows in crypto_prices_quarantine"""
+        with self.get_session() as session:
+            session.execute(insert(QuarantinedPrice.__table__), rows)
+        logger.warning(f"Quarantined {len(rows)} price rows.")
+
+    def renew_worker_lease(self, worker_id: str, lease_seconds: float) -> List[str]:
+        """Take or renew a worker's lease and return every live worker"""
+        with self.engine.begin() as connection:
+            connection.execute(expired_workers_delete())
+            connection.execute(worker_lease_upsert(worker_id, lease_seconds))
+            return list(connection.scalars(live_workers()))
+
+    def release_worker_lease(self, worker_id: str) -> None:
+        """Drop a worker's lease so the others take over its shards"""
+        with self.engine.begin() as connection:
+            connection.execute(
+                delete(PipelineWorker.__table__).where(
+                    PipelineWorker.worker_id == worker_id
+                )
+            )
+
     def log_pipeline_run(
         self,
         run_id: str,
@@ -87,36 +508,46 @@ class WarehouseLoader:
         started_at: Optional[datetime] = None,
         completed_at: Optional[datetime] = None,
     ):
-        """Insert or update a pipeline run log"""
-        run_data = {
-            "id": uuid.uuid4(),
-            "run_id": run_id,
-            "stage": stage,
-            "status": status,
-            "records_processed": records_processed,
-            "error_message": error_message,
-            "started_at": started_at or datetime.utcnow(),
-            "completed_at": completed_at or datetime.utcnow(),
-        }
+        """Append a single pipeline stage event"""
+        self.record_pipeline_events(
+            [
+                pipeline_run_event(
+                    run_id,
+                    stage,
+                    status,
+                    records_processed,
+                    error_message,
+                    started_at,
+                    completed_at,
+                )
+            ]
+        )
+
+    def get_completed_backfill_windows(
+        self, coin_id: str
+    ) -> Set[Tuple[datetime, datetime]]:
+        """Return the (start, end) windows already backfilled for a coin"""
+        with self.get_session() as session:
+            rows = session.execute(
+                select(
+                    BackfillCheckpoint.window_start, BackfillCheckpoint.window_end
+                ).where(
+                    BackfillCheckpoint.coin_id == coin_id,
+                    BackfillCheckpoint.status == "success",
+                )
+            ).fetchall()
+        return {(row.window_start, row.window_end) for row in rows}
+
+    def mark_backfill_windows(self, checkpoints: List[Dict[str, Any]]) -> None:
+        """Upsert backfill window checkpoints in a single transaction"""
+        if not checkpoints:
+            return
 
         try:
             with self.get_session() as session:
-                # Create a new PipelineRun or update existing one
-                stmt = (
-                    insert(PipelineRun.__table__)
-                    .values(run_data)
-                    .on_conflict_do_update(
-                        index_elements=["run_id", "stage"],
-                        set_={
-                            "status": status,
-                            "records_processed": records_processed,
-                            "error_message": error_message,
-                            "completed_at": run_data["completed_at"],
-                        },
-                    )
-                )
+                stmt = backfill_checkpoint_upsert(checkpoints)
                 session.execute(stmt)
-                logger.info(f"📝 Logged pipeline run: {run_id} [{stage} - {status}]")
-        except Exception as e:
-            logger.exception("❌ Failed to log pipeline run.")
+                logger.info(f"📝 Checkpointed {len(checkpoints)} backfill windows")
+        except Exception:
+            logger.exception("❌ Failed to checkpoint backfill windows.")
             raise
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import IO, Callable, Dict, List, Optional, Sequence, Union
+
+from src.loaders.sinks import Loader, call_loader
+from src.models.batch import PriceBatch
+
+logger = logging.getLogger(__name__)
+
+
+class SegmentSpool:
+    """Append-only JSONL segment files on local disk.
+
+    Each line is one batch in ``PriceBatch.to_payload`` form. Every append
+    is fsynced before it returns, so an acknowledged batch survives a crash.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self._active: Optional[IO[str]] = None
+
+    def segments(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("segment-*.jsonl"))
+
+    def _open_segment(self) -> IO[str]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        existing = self.segments()
+        sequence = int(existing[-1].stem.split("-")[1]) + 1 if existing else 1
+        segment = open(self.directory / f"segment-{sequence:010d}.jsonl", "a")
+        # Make the new directory entry durable along with its contents
+        directory_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+        return segment
+
+    def append(self, batch: PriceBatch) -> None:
+        if self._active is None:
+            self._active = self._open_segment()
+        self._active.write(json.dumps(batch.to_payload()) + "\n")
+        self._active.flush()
+        os.fsync(self._active.fileno())
+
+    def seal(self) -> List[Path]:
+        """Close the active segment and return every segment on disk."""
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+        return self.segments()
+
+    def read(self, segment: Path) -> List[PriceBatch]:
+        batches = []
+        with open(segment) as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    batches.append(PriceBatch.from_payload(json.loads(line)))
+                except (ValueError, KeyError) as e:
+                    # A crash mid-append leaves at most one torn trailing line
+                    logger.warning(
+                        f"Skipping unreadable spool line {segment.name}:"
+                        f"{line_number}: {e}"
+                    )
+        return batches
+
+    def remove(self, segments: Sequence[Path]) -> None:
+        for segment in segments:
+            segment.unlink(missing_ok=True)
+
+
+class WriteBehindBuffer:
+    """Accumulates batches across runs and loads them in large flushes.
+
+    Batches are appended to the spool before ``add`` returns and are only
+    removed from it after the loader commits them, so rows survive both a
+    process crash and a database outage; ``open`` replays whatever a previous
+    process left behind. A crash between commit and segment removal replays
+    rows that are already loaded, which LOAD_METHOD=upsert turns into no-ops.
+
+    Once open, a timer flushes buffered rows when the oldest reaches
+    ``flush_seconds``, even if no run adds more; a failed flush is retried
+    ``flush_seconds`` later. Rows loaded outside ``add`` (by the timer, a
+    replay or ``close``) belong to no run, so they are reported to
+    ``on_flush`` instead.
+    """
+
+    def __init__(
+        self,
+        loader: Loader,
+        spool_dir: Union[str, Path],
+        flush_rows: int,
+        flush_seconds: float,
+        on_flush: Optional[Callable[[int], None]] = None,
+    ):
+        self.loader = loader
+        self.on_flush = on_flush
+        self.spool = SegmentSpool(spool_dir)
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._pending: List[PriceBatch] = []
+        self._pending_rows = 0
+        self._oldest: Optional[float] = None
+        self._retry_at: Optional[float] = None
+        self._opened = False
+        self._timer: Optional[asyncio.Task] = None
+        # The timer and add() may both flush; each batch loads once
+        self._flush_lock = asyncio.Lock()
+        # A sealed segment must hold exactly the batches a flush loads, so
+        # sealing waits for an append and its buffering to finish
+        self._spool_lock = asyncio.Lock()
+
+    @property
+    def pending_rows(self) -> int:
+        return self._pending_rows
+
+    def _buffer(self, batch: PriceBatch) -> None:
+        self._pending.append(batch)
+        self._pending_rows += len(batch)
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+    def _due(self) -> bool:
+        if self._pending_rows >= self.flush_rows:
+            return True
+        return (
+            self._oldest is not None
+            and time.monotonic() - self._oldest >= self.flush_seconds
+        )
+
+    def _next_flush_at(self) -> Optional[float]:
+        if self._oldest is None:
+            return None
+        due_at = self._oldest + self.flush_seconds
+        if self._retry_at is not None:
+            due_at = max(due_at, self._retry_at)
+        return due_at
+
+    async def _flush_on_age(self) -> None:
+        while True:
+            due_at = self._next_flush_at()
+            if due_at is None:
+                delay = self.flush_seconds
+            else:
+                delay = due_at - time.monotonic()
+            # A zero flush_seconds still leaves the loop room to breathe
+            await asyncio.sleep(max(delay, 0.1))
+            due_at = self._next_flush_at()
+            if due_at is not None and time.monotonic() >= due_at:
+                await self._flush_between_runs()
+
+    async def open(self) -> int:
+        """Replay spooled segments left by a previous process and start the
+        age timer (idempotent)."""
+        if self._opened:
+            return 0
+        self._opened = True
+        self._timer = asyncio.create_task(self._flush_on_age())
+
+        segments = self.spool.segments()
+        for segment in segments:
+            for batch in await asyncio.to_thread(self.spool.read, segment):
+                self._buffer(batch)
+        if not self._pending_rows:
+            return 0
+        logger.info(
+            f"Replaying {self._pending_rows} spooled rows "
+            f"from {len(segments)} segments"
+        )
+        return await self._flush_between_runs()
+
+    async def add(self, data: Union[PriceBatch, Sequence[Dict]]) -> int:
+        """Spool a batch and flush if a threshold is reached.
+
+        Returns the number of rows written to the warehouse by this call,
+        which is 0 while the batch is only buffered.
+        """
+        written = await self.open()
+        batch = PriceBatch.coerce(data)
+        if len(batch):
+            async with self._spool_lock:
+                await asyncio.to_thread(self.spool.append, batch)
+                self._buffer(batch)
+        if self._due():
+            written += await self.flush()
+        return written
+
+    async def flush(self) -> int:
+        """Load everything buffered; on failure keep it spooled for later."""
+        async with self._flush_lock:
+            return await self._flush()
+
+    async def _flush_between_runs(self) -> int:
+        written = await self.flush()
+        if written and self.on_flush is not None:
+            self.on_flush(written)
+        return written
+
+    async def _flush(self) -> int:
+        if not self._pending:
+            return 0
+
+        async with self._spool_lock:
+            sealed = self.spool.seal()
+            flushing = len(self._pending)
+            batch = PriceBatch.concat(self._pending)
+        try:
+            written = await call_loader(self.loader.bulk_insert_crypto_prices, batch)
+        except Exception as e:
+            logger.warning(
+                f"Write-behind flush of {len(batch)} rows failed, "
+                f"keeping them spooled: {e}"
+            )
+            self._retry_at = time.monotonic() + self.flush_seconds
+            return 0
+
+        await asyncio.to_thread(self.spool.remove, sealed)
+        # Batches added while the load was in flight stay buffered
+        self._pending = self._pending[flushing:]
+        self._pending_rows = sum(len(b) for b in self._pending)
+        self._oldest = time.monotonic() if self._pending else None
+        self._retry_at = None
+        logger.info(f"Flushed {len(batch)} buffered rows ({written} written)")
+        return written
+
+    async def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            await asyncio.gather(self._timer, return_exceptions=True)
+            self._timer = None
+        await self._flush_between_runs()
+        async with self._spool_lock:
+            self.spool.seal()
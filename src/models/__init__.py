@@ -1,6 +1,31 @@
 """Models package for database entities."""
 
 from .base import Base
-from .schemas import CryptoPrice, PipelineRun
+from .batch import PriceBatch
+from .schemas import (
+    BackfillCheckpoint,
+    Coin,
+    CryptoPrice,
+    PipelineHealthBucket,
+    PipelineHealthCoin,
+    PipelineHealthStage,
+    PipelineRunEvent,
+    PipelineWorker,
+    PriceRollup,
+    QuarantinedPrice,
+)
 
-__all__ = ["Base", "CryptoPrice", "PipelineRun"]
+__all__ = [
+    "Base",
+    "BackfillCheckpoint",
+    "Coin",
+    "CryptoPrice",
+    "PipelineHealthBucket",
+    "PipelineHealthCoin",
+    "PipelineHealthStage",
+    "PipelineRunEvent",
+    "PipelineWorker",
+    "PriceBatch",
+    "PriceRollup",
+    "QuarantinedPrice",
+]
@@ -0,0 +1,230 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# symbol/name map to the coins dictionary; the rest are crypto_price_facts columns
+STRING_COLUMNS = ("symbol", "name", "last_updated")
+FLOAT_COLUMNS = (
+    "current_price",
+    "market_cap",
+    "total_volume",
+    "price_change_24h",
+    "price_change_percentage_24h",
+    "price_change_percentage_1h",
+    "price_change_percentage_7d",
+    "circulating_supply",
+    "total_supply",
+    "max_supply",
+    "ath",
+    "atl",
+)
+# Nullable integers are held as float64 with NaN and narrowed on write
+INTEGER_COLUMNS = ("market_cap_rank",)
+PRICE_COLUMNS = STRING_COLUMNS + FLOAT_COLUMNS + INTEGER_COLUMNS
+
+# CoinGecko /coins/markets field for each column where the names differ
+API_FIELDS = {
+    "price_change_percentage_1h": "price_change_percentage_1h_in_currency",
+    "price_change_percentage_7d": "price_change_percentage_7d_in_currency",
+}
+
+Timestamps = Union[datetime, np.ndarray]
+
+
+@dataclass
+class PriceBatch:
+    """Struct-of-arrays batch of price snapshots.
+
+    ``extracted_at`` is a single timestamp shared by every row for live
+    snapshots, or a ``datetime64[us]`` array when rows carry their own time
+    (historical backfills).
+    """
+
+    columns: Dict[str, np.ndarray]
+    extracted_at: Optional[Timestamps] = None
+
+    def __len__(self) -> int:
+        return len(self.columns["symbol"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name == "extracted_at":
+            return self.extracted_at_array()
+        return self.columns[name]
+
+    @classmethod
+    def empty(cls, extracted_at: Optional[datetime] = None) -> "PriceBatch":
+        return cls._from_column_lists({c: [] for c in PRICE_COLUMNS}, extracted_at)
+
+    @classmethod
+    def from_api(cls, coins: Sequence[Dict], extracted_at: datetime) -> "PriceBatch":
+        """Build a batch straight from decoded /coins/markets JSON."""
+        lists: Dict[str, List[Any]] = {
+            column: [coin.get(API_FIELDS.get(column, column)) for coin in coins]
+            for column in PRICE_COLUMNS
+        }
+        lists["symbol"] = [(s or "").upper() for s in lists["symbol"]]
+        lists["name"] = [n or "" for n in lists["name"]]
+        lists["current_price"] = [coin.get("current_price", 0.0) for coin in coins]
+        return cls._from_column_lists(lists, extracted_at)
+
+    @classmethod
+    def from_arrays(
+        cls, size: int, arrays: Dict[str, Any], extracted_at: Optional[Timestamps]
+    ) -> "PriceBatch":
+        """Build a batch from a subset of columns; the rest are null."""
+        columns: Dict[str, np.ndarray] = {}
+        for column in STRING_COLUMNS:
+            values = arrays.get(column)
+            columns[column] = (
+                np.full(size, values, dtype=object)
+                if values is None or np.isscalar(values)
+                else np.asarray(values, dtype=object)
+            )
+        for column in FLOAT_COLUMNS + INTEGER_COLUMNS:
+            values = arrays.get(column, np.nan)
+            columns[column] = (
+                np.full(size, values, dtype=np.float64)
+                if np.isscalar(values)
+                else np.asarray(values, dtype=np.float64)
+            )
+        return cls(columns, extracted_at)
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict]) -> "PriceBatch":
+        """Build a batch from row dicts (legacy callers and spooled data)."""
+        lists = {c: [r.get(c) for r in records] for c in PRICE_COLUMNS}
+        timestamps = [r.get("extracted_at") for r in records]
+        if len(set(timestamps)) <= 1:
+            extracted_at: Optional[Timestamps] = timestamps[0] if timestamps else None
+        else:
+            extracted_at = np.array(timestamps, dtype="datetime64[us]")
+        return cls._from_column_lists(lists, extracted_at)
+
+    @classmethod
+    def coerce(cls, data: Union["PriceBatch", Sequence[Dict]]) -> "PriceBatch":
+        """Accept either a batch or legacy row dicts."""
+        return data if isinstance(data, PriceBatch) else cls.from_records(data)
+
+    @classmethod
+    def _from_column_lists(
+        cls, lists: Dict[str, List[Any]], extracted_at: Optional[Timestamps]
+    ) -> "PriceBatch":
+        columns: Dict[str, np.ndarray] = {}
+        for column in STRING_COLUMNS:
+            columns[column] = np.array(lists[column], dtype=object)
+        for column in FLOAT_COLUMNS + INTEGER_COLUMNS:
+            # None becomes NaN under a float dtype
+            columns[column] = np.array(lists[column], dtype=np.float64)
+        return cls(columns, extracted_at)
+
+    @classmethod
+    def concat(cls, batches: Sequence["PriceBatch"]) -> "PriceBatch":
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+
+        shared = {
+            b.extracted_at for b in batches if isinstance(b.extracted_at, datetime)
+        }
+        if len(shared) == 1 and all(
+            isinstance(b.extracted_at, datetime) for b in batches
+        ):
+            extracted_at: Optional[Timestamps] = shared.pop()
+        else:
+            extracted_at = np.concatenate([b.extracted_at_array() for b in batches])
+
+        columns = {
+            column: np.concatenate([b.columns[column] for b in batches])
+            for column in PRICE_COLUMNS
+        }
+        return cls(columns, extracted_at)
+
+    def extracted_at_array(self) -> np.ndarray:
+        if isinstance(self.extracted_at, np.ndarray):
+            return self.extracted_at
+        return np.full(len(self), self.extracted_at, dtype="datetime64[us]")
+
+    def take(self, indices: Union[np.ndarray, Sequence[int], slice]) -> "PriceBatch":
+        """Select rows by position, boolean mask or slice."""
+        columns = {name: values[indices] for name, values in self.columns.items()}
+        extracted_at = self.extracted_at
+        if isinstance(extracted_at, np.ndarray):
+            extracted_at = extracted_at[indices]
+        return PriceBatch(columns, extracted_at)
+
+    def iter_slices(self, size: int) -> Iterator["PriceBatch"]:
+        for start in range(0, len(self), size):
+            yield self.take(slice(start, start + size))
+
+    def to_frame(self) -> pd.DataFrame:
+        """Wrap the arrays in a DataFrame without copying them."""
+        data: Dict[str, Any] = dict(self.columns)
+        for column in INTEGER_COLUMNS:
+            data[column] = pd.array(self.columns[column], dtype="Int64")
+        data["extracted_at"] = self.extracted_at_array()
+        return pd.DataFrame(data, copy=False)
+
+    def to_fact_frame(self, coin_ids: np.ndarray) -> pd.DataFrame:
+        """Rows in crypto_price_facts layout, with symbols already resolved
+        to ``coin_ids``; ``created_at`` is left to the column default."""
+        data: Dict[str, Any] = {"coin_id": coin_ids}
+        for column in FLOAT_COLUMNS:
+            data[column] = self.columns[column]
+        for column in INTEGER_COLUMNS:
+            data[column] = pd.array(self.columns[column], dtype="Int64")
+        data["last_updated"] = pd.to_datetime(
+            self.columns["last_updated"], utc=True, errors="coerce"
+        )
+        data["extracted_at"] = self.extracted_at_array()
+        return pd.DataFrame(data, copy=False)
+
+    def to_payload(self) -> Dict[str, Any]:
+        """JSON-safe columnar form, used by the write-behind spool."""
+        if isinstance(self.extracted_at, np.ndarray):
+            extracted_at: Any = self.extracted_at.astype(str).tolist()
+        elif self.extracted_at is not None:
+            extracted_at = self.extracted_at.isoformat()
+        else:
+            extracted_at = None
+        columns = {}
+        for column in PRICE_COLUMNS:
+            # NaN is not valid JSON; null round-trips back to NaN
+            columns[column] = [
+                None if v != v else v for v in self.columns[column].tolist()
+            ]
+        return {"extracted_at": extracted_at, "columns": columns}
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "PriceBatch":
+        columns = payload["columns"]
+        raw = payload.get("extracted_at")
+        if isinstance(raw, list):
+            extracted_at: Optional[Timestamps] = np.array(raw, dtype="datetime64[us]")
+        else:
+            extracted_at = datetime.fromisoformat(raw) if raw else None
+        return cls.from_arrays(len(columns["symbol"]), columns, extracted_at)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Materialise row dicts; only for small batches or debugging."""
+        records = []
+        timestamps = self.extracted_at_array().astype(object)
+        for i in range(len(self)):
+            record: Dict[str, Any] = {}
+            for column in STRING_COLUMNS:
+                record[column] = self.columns[column][i]
+            for column in FLOAT_COLUMNS + INTEGER_COLUMNS:
+                value = self.columns[column][i]
+                if np.isnan(value):
+                    record[column] = None
+                elif column in INTEGER_COLUMNS:
+                    record[column] = int(value)
+                else:
+                    record[column] = float(value)
+            record["extracted_at"] = timestamps[i]
+            records.append(record)
+        return records
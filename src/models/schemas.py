@@ -2,39 +2,66 @@ import uuid
 from datetime import datetime
 
 from sqlalchemy import (
+    DDL,
+    BigInteger,
     Column,
     DateTime,
     Float,
+    ForeignKey,
     Index,
     Integer,
+    SmallInteger,
     String,
     Text,
     UniqueConstraint,
+    event,
+    func,
+    text,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 
 from src.models.base import Base
 
 
+class Coin(Base):
+    """
+    Symbol dictionary for the price fact table: each symbol is stored once
+    and referenced by a small-integer ``coin_id``.
+    """
+
+    __tablename__ = "coins"
+
+    coin_id = Column(SmallInteger, primary_key=True, autoincrement=True)
+    symbol = Column(String(20), nullable=False, unique=True)
+    name = Column(String(100), nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<Coin(coin_id={self.coin_id}, symbol={self.symbol})>"
+
+
 class CryptoPrice(Base):
     """
     Stores raw crypto price data as fetched from the CoinGecko API.
     Includes enriched fields if API key is available.
+
+    Rows are keyed by (coin_id, extracted_at); symbol and name live in
+    ``coins``. The ``crypto_prices_raw`` view joins them back for readers.
     """
 
-    __tablename__ = "crypto_prices_raw"
+    __tablename__ = "crypto_price_facts"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    symbol = Column(String(20), nullable=False, index=True)
-    name = Column(String(100), nullable=False)
+    coin_id = Column(SmallInteger, ForeignKey("coins.coin_id"), primary_key=True)
+    # Part of the primary key because the table is range-partitioned on it
+    extracted_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
     current_price = Column(Float, nullable=False)
     market_cap = Column(Float)
     total_volume = Column(Float)
     price_change_24h = Column(Float)
     price_change_percentage_24h = Column(Float)
     market_cap_rank = Column(Integer)
-    extracted_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
 
     # Enhanced fields available with API key
     price_change_percentage_1h = Column(Float)
@@ -44,37 +71,314 @@ class CryptoPrice(Base):
     max_supply = Column(Float)
     ath = Column(Float)  # All-time high
     atl = Column(Float)  # All-time low
-    last_updated = Column(String(50))
+    last_updated = Column(DateTime(timezone=True))
 
+    # The primary key is the only B-tree; time-range scans use BRIN, which
+    # stays tiny because rows arrive in extracted_at order.
     __table_args__ = (
-        UniqueConstraint("symbol", "extracted_at", name="uq_symbol_extracted_at"),
-        Index("ix_crypto_prices_symbol_extracted_at", "symbol", "extracted_at"),
+        Index(
+            "ix_crypto_price_facts_extracted_at_brin",
+            "extracted_at",
+            postgresql_using="brin",
+        ),
+        {"postgresql_partition_by": "RANGE (extracted_at)"},
     )
 
     def __repr__(self):
-        return f"<CryptoPrice(symbol={self.symbol}, price={self.current_price}, time={self.extracted_at})>"
+        return f"<CryptoPrice(coin_id={self.coin_id}, price={self.current_price}, time={self.extracted_at})>"
 
 
-class PipelineRun(Base):
+class PipelineRunEvent(Base):
     """
-    Tracks the status and metrics of pipeline stages (extract, load, transform).
+    Append-only ledger of pipeline stage outcomes (extract, load, transform).
+
+    A run's events are buffered in memory and written together at the end
+    of the run; the ``pipeline_runs`` view reduces them to the latest event
+    per (run_id, stage).
     """
 
-    __tablename__ = "pipeline_runs"
+    __tablename__ = "pipeline_run_events"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
     run_id = Column(String(100), nullable=False)
     stage = Column(String(50), nullable=False)  # extract, load, transform
-    status = Column(String(20), nullable=False)  # running, success, failed
+    status = Column(String(20), nullable=False)  # success, failed
     records_processed = Column(Integer, default=0)
     error_message = Column(Text)
     started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     completed_at = Column(DateTime)
+    duration_seconds = Column(Float)
+    attempts = Column(Integer)
+    bytes_fetched = Column(BigInteger)
+    recorded_at = Column(DateTime, nullable=False, server_default=func.now())
 
     __table_args__ = (
-        UniqueConstraint("run_id", "stage", name="uq_run_id_stage"),
-        Index("ix_pipeline_runs_run_id_stage", "run_id", "stage"),
+        Index("ix_pipeline_run_events_run_id_stage_id", "run_id", "stage", "id"),
     )
 
     def __repr__(self):
-        return f"<PipelineRun(run_id={self.run_id}, stage={self.stage}, status={self.status})>"
+        return f"<PipelineRunEvent(run_id={self.run_id}, stage={self.stage}, status={self.status})>"
+
+
+class BackfillCheckpoint(Base):
+    """
+    Records the outcome of each historical backfill window so an interrupted
+    backfill can resume without refetching completed windows.
+    """
+
+    __tablename__ = "backfill_checkpoints"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    coin_id = Column(String(100), nullable=False)
+    window_start = Column(DateTime, nullable=False)
+    window_end = Column(DateTime, nullable=False)
+    status = Column(String(20), nullable=False)  # success, failed
+    records_loaded = Column(Integer, default=0)
+    error_message = Column(Text)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "coin_id", "window_start", "window_end", name="uq_backfill_window"
+        ),
+    )
+
+    def __repr__(self):
+        return f"<BackfillCheckpoint(coin_id={self.coin_id}, window_start={self.window_start}, status={self.status})>"
+
+
+class QuarantinedPrice(Base):
+    """
+    Price rows the warehouse rejected (constraint or data errors), isolated
+    from their batch so the rest of it still loads. ``payload`` holds the
+    row as extracted, for inspection and replay.
+    """
+
+    __tablename__ = "crypto_prices_quarantine"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    run_id = Column(String(100))  # null for write-behind flushes and backfills
+    error_code = Column(String(5))  # SQLSTATE
+    error_message = Column(Text, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    quarantined_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<QuarantinedPrice(id={self.id}, run_id={self.run_id}, error_code={self.error_code})>"
+
+
+class PriceRollup(Base):
+    """
+    Hourly and daily OHLC buckets per coin, merged at load time from each
+    batch's new rows. Count, sum and sum of squares add up across merges,
+    so a bucket's mean and standard deviation never need its raw rows; the
+    ``crypto_price_ohlc`` view derives them.
+    """
+
+    __tablename__ = "crypto_price_rollups"
+
+    coin_id = Column(SmallInteger, ForeignKey("coins.coin_id"), primary_key=True)
+    grain = Column(String(4), primary_key=True)  # hour, day
+    bucket_start = Column(DateTime, primary_key=True)
+    open_at = Column(DateTime, nullable=False)
+    open_price = Column(Float, nullable=False)
+    close_at = Column(DateTime, nullable=False)
+    close_price = Column(Float, nullable=False)
+    high_price = Column(Float, nullable=False)
+    low_price = Column(Float, nullable=False)
+    price_count = Column(BigInteger, nullable=False)
+    price_sum = Column(Float, nullable=False)
+    price_sum_squares = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_crypto_price_rollups_grain_bucket", "grain", "bucket_start"),
+    )
+
+    def __repr__(self):
+        return f"<PriceRollup(coin_id={self.coin_id}, grain={self.grain}, bucket_start={self.bucket_start})>"
+
+
+class PipelineWorker(Base):
+    """
+    Lease held by each running pipeline worker. Workers renew their row
+    while alive and split the coin universe between the rows whose lease
+    has not expired, so a crashed worker's share moves to the others.
+    """
+
+    __tablename__ = "pipeline_workers"
+
+    worker_id = Column(String(100), primary_key=True)
+    joined_at = Column(DateTime, nullable=False, server_default=func.now())
+    renewed_at = Column(DateTime, nullable=False, server_default=func.now())
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<PipelineWorker(worker_id={self.worker_id}, expires_at={self.expires_at})>"
+
+
+class PipelineHealthCoin(Base):
+    """
+    Latest extraction of each coin, kept current by the loaders so health
+    checks never scan the fact table.
+    """
+
+    __tablename__ = "pipeline_health_coins"
+
+    coin_id = Column(SmallInteger, ForeignKey("coins.coin_id"), primary_key=True)
+    extracted_at = Column(DateTime, nullable=False)
+    current_price = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<PipelineHealthCoin(coin_id={self.coin_id}, extracted_at={self.extracted_at})>"
+
+
+class PipelineHealthBucket(Base):
+    """
+    Rolling counts for the health checks in five-minute buckets. The
+    ``prices`` series counts loaded price rows, with how many were valid
+    and their sum; ``<stage>.<status>`` series count finished run stages.
+    """
+
+    __tablename__ = "pipeline_health_buckets"
+
+    bucket_start = Column(DateTime, primary_key=True)
+    series = Column(String(80), primary_key=True)
+    event_count = Column(BigInteger, nullable=False)
+    valid_count = Column(BigInteger, nullable=False)
+    value_sum = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<PipelineHealthBucket(bucket_start={self.bucket_start}, series={self.series}, count={self.event_count})>"
+
+
+class PipelineHealthStage(Base):
+    """
+    Latest ledger event of each pipeline stage, written with the events.
+    """
+
+    __tablename__ = "pipeline_health_stages"
+
+    stage = Column(String(50), primary_key=True)
+    status = Column(String(20), nullable=False)
+    run_id = Column(String(100), nullable=False)
+    records_processed = Column(Integer)
+    error_message = Column(Text)
+    completed_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<PipelineHealthStage(stage={self.stage}, status={self.status}, run_id={self.run_id})>"
+
+
+# Read-side view with the pre-dictionary column layout, so dashboards, health
+# checks and ad-hoc queries keep working against crypto_prices_raw.
+CRYPTO_PRICES_RAW_VIEW_SQL = """
+CREATE OR REPLACE VIEW crypto_prices_raw AS
+SELECT
+    f.coin_id,
+    c.symbol,
+    c.name,
+    f.current_price,
+    f.market_cap,
+    f.total_volume,
+    f.price_change_24h,
+    f.price_change_percentage_24h,
+    f.market_cap_rank,
+    f.extracted_at,
+    f.created_at,
+    f.price_change_percentage_1h,
+    f.price_change_percentage_7d,
+    f.circulating_supply,
+    f.total_supply,
+    f.max_supply,
+    f.ath,
+    f.atl,
+    f.last_updated
+FROM crypto_price_facts f
+JOIN coins c ON c.coin_id = f.coin_id
+"""
+
+
+# Current state of every (run_id, stage), in the shape of the table the
+# ledger replaced, so stg_pipeline_runs and the health checks keep working.
+PIPELINE_RUNS_VIEW_SQL = """
+CREATE OR REPLACE VIEW pipeline_runs AS
+SELECT DISTINCT ON (run_id, stage)
+    id,
+    run_id,
+    stage,
+    status,
+    records_processed,
+    error_message,
+    started_at,
+    completed_at,
+    duration_seconds,
+    attempts,
+    bytes_fetched
+FROM pipeline_run_events
+ORDER BY run_id, stage, id DESC
+"""
+
+# OHLC buckets by symbol with the mean and sample standard deviation
+# derived from the stored moments.
+CRYPTO_PRICE_OHLC_VIEW_SQL = """
+CREATE OR REPLACE VIEW crypto_price_ohlc AS
+SELECT
+    r.coin_id,
+    c.symbol,
+    c.name,
+    r.grain,
+    r.bucket_start,
+    r.open_price,
+    r.high_price,
+    r.low_price,
+    r.close_price,
+    r.price_count,
+    r.price_sum / r.price_count AS avg_price,
+    CASE WHEN r.price_count > 1 THEN sqrt(greatest(
+        (r.price_sum_squares - r.price_sum * r.price_sum / r.price_count)
+        / (r.price_count - 1),
+        0
+    )) END AS price_stddev,
+    r.open_at,
+    r.close_at,
+    r.updated_at
+FROM crypto_price_rollups r
+JOIN coins c ON c.coin_id = r.coin_id
+"""
+
+READ_VIEWS = {
+    "crypto_prices_raw": CRYPTO_PRICES_RAW_VIEW_SQL,
+    "pipeline_runs": PIPELINE_RUNS_VIEW_SQL,
+    "crypto_price_ohlc": CRYPTO_PRICE_OHLC_VIEW_SQL,
+}
+
+
+def _replaces_legacy_table(view: str):
+    def check(ddl, target, bind, **kw) -> bool:
+        # Until its migration runs, the view's name still belongs to a table
+        relkind = bind.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:view)"),
+            {"view": view},
+        ).scalar()
+        return relkind in (None, "v")
+
+    return check
+
+
+for _view, _sql in READ_VIEWS.items():
+    event.listen(
+        Base.metadata,
+        "after_create",
+        DDL(_sql).execute_if(callable_=_replaces_legacy_table(_view)),
+    )
+    event.listen(
+        Base.metadata,
+        "before_drop",
+        DDL(f"DROP VIEW IF EXISTS {_view}").execute_if(
+            callable_=_replaces_legacy_table(_view)
+        ),
+    )
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+logger = logging.getLogger(__name__)
+
+# Snapshot statuses a replica can serve traffic with
+READY_STATUSES = ("healthy", "warning")
+# Refresh periods a snapshot may miss before readiness stops trusting it
+STALE_REFRESHES = 3
+
+_JSON = "application/json"
+
+
+def _render(body: Dict[str, Any]) -> bytes:
+    return json.dumps(body, default=str).encode()
+
+
+class HealthServer:
+    """Serves /healthz, /readyz, /status and /metrics on the scheduler's
+    event loop.
+
+    Probes never reach the database: a background task runs ``check``
+    every ``refresh_seconds`` and the handlers answer from the bodies it
+    rendered, so probe cost does not depend on how often probes come.
+    /healthz is liveness (the refresh task is still running), /readyz is
+    200 while the latest snapshot is fresh and healthy or a warning, and
+    /status returns the snapshot itself.
+    """
+
+    def __init__(
+        self,
+        check: Callable[[], Awaitable[Dict[str, Any]]],
+        port: int,
+        refresh_seconds: float,
+        host: str = "0.0.0.0",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.check = check
+        self.port = port
+        self.refresh_seconds = refresh_seconds
+        self.host = host
+        self._clock = clock
+        self._refreshed_at: Optional[float] = None
+        self._ready = False
+        self._status_body = _render({"status": "starting"})
+        self._ready_body = _render({"ready": False, "status": "starting"})
+        self._refresher: Optional[asyncio.Task] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def stale_after(self) -> float:
+        return STALE_REFRESHES * self.refresh_seconds
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/healthz", self.healthz)
+        app.router.add_get("/readyz", self.readyz)
+        app.router.add_get("/status", self.status)
+        app.router.add_get("/metrics", self.metrics)
+        return app
+
+    async def start(self) -> None:
+        """Take the first snapshot, then serve and keep refreshing it."""
+        await self.refresh()
+        self._refresher = asyncio.create_task(self._refresh_forever())
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"🩺 Serving /healthz, /readyz and /status on :{self.port}")
+
+    async def stop(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def refresh(self) -> None:
+        """Replace the snapshot; a check that fails or overruns its period
+        becomes an "error" snapshot."""
+        try:
+            snapshot = await asyncio.wait_for(self.check(), self.refresh_seconds)
+        except Exception as e:
+            logger.warning(f"Health snapshot failed: {e!r}")
+            snapshot = {
+                "timestamp": datetime.utcnow().isoformat(),
+                "status": "error",
+                "error": str(e) or type(e).__name__,
+            }
+        status = snapshot.get("status")
+        self._ready = status in READY_STATUSES
+        self._ready_body = _render({"ready": self._ready, "status": status})
+        self._status_body = _render(snapshot)
+        self._refreshed_at = self._clock()
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            await self.refresh()
+
+    @property
+    def is_fresh(self) -> bool:
+        return (
+            self._refreshed_at is not None
+            and self._clock() - self._refreshed_at <= self.stale_after
+        )
+
+    async def healthz(self, request: web.Request) -> web.Response:
+        alive = self._refresher is not None and not self._refresher.done()
+        return web.Response(
+            body=b'{"alive": true}' if alive else b'{"alive": false}',
+            status=200 if alive else 503,
+            content_type=_JSON,
+        )
+
+    async def readyz(self, request: web.Request) -> web.Response:
+        if not self.is_fresh:
+            return web.Response(
+                body=b'{"ready": false, "status": "stale"}',
+                status=503,
+                content_type=_JSON,
+            )
+        return web.Response(
+            body=self._ready_body,
+            status=200 if self._ready else 503,
+            content_type=_JSON,
+        )
+
+    async def status(self, request: web.Request) -> web.Response:
+        return web.Response(body=self._status_body, content_type=_JSON)
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST}
+        )
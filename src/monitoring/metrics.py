@@ -0,0 +1,97 @@
+import logging
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+logger = logging.getLogger(__name__)
+
+# Exponential buckets wide enough for one-coin pages and million-row backfills
+ROWS_PER_SECOND_BUCKETS = (10, 50, 100, 500, 1e3, 5e3, 1e4, 5e4, 1e5, 5e5, 1e6)
+SECONDS_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "crypto_pipeline_http_request_seconds",
+    "CoinGecko request latency, one observation per attempt",
+    ["endpoint", "status"],
+    buckets=SECONDS_BUCKETS,
+)
+HTTP_RATE_LIMITED = Counter(
+    "crypto_pipeline_http_rate_limited_total",
+    "CoinGecko responses with HTTP 429",
+)
+HTTP_RETRIES = Counter(
+    "crypto_pipeline_http_retries_total",
+    "CoinGecko requests retried after an error or 429",
+    ["endpoint"],
+)
+STAGE_SECONDS = Histogram(
+    "crypto_pipeline_stage_seconds",
+    "Duration of each pipeline run stage",
+    ["stage", "status"],
+    buckets=SECONDS_BUCKETS,
+)
+ROWS_PER_SECOND = Histogram(
+    "crypto_pipeline_rows_per_second",
+    "Throughput of each successful pipeline run stage",
+    ["stage"],
+    buckets=ROWS_PER_SECOND_BUCKETS,
+)
+DB_FLUSH_SECONDS = Histogram(
+    "crypto_pipeline_db_flush_seconds",
+    "Time to write one price batch to the warehouse, quarantine included",
+    ["load_method"],
+    buckets=SECONDS_BUCKETS,
+)
+DB_FLUSH_ROWS = Counter(
+    "crypto_pipeline_db_rows_written_total",
+    "Price rows written to the warehouse",
+    ["load_method"],
+)
+QUEUE_DEPTH = Histogram(
+    "crypto_pipeline_queue_depth",
+    "Batches waiting in an extract-to-load queue, sampled on every put",
+    ["queue"],
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64),
+)
+ROLLUP_ROWS_SKIPPED = Counter(
+    "crypto_pipeline_rollup_rows_skipped_total",
+    "Price rows left out of a rollup bucket because they were at or before "
+    "its close, counted once per hourly or daily bucket",
+)
+ROWS_DEDUPED = Counter(
+    "crypto_pipeline_rows_deduped_total",
+    "Coin snapshots skipped because they had not changed",
+)
+PIPELINE_RUNS = Counter(
+    "crypto_pipeline_runs_total",
+    "Finished extraction runs",
+    ["status"],
+)
+SCHEDULE_LAG_SECONDS = Gauge(
+    "crypto_pipeline_schedule_lag_seconds",
+    "How late the latest run of each scheduled task started after its due time",
+    ["task"],
+)
+SCHEDULE_OVERLAPS = Counter(
+    "crypto_pipeline_schedule_overlaps_total",
+    "Scheduled runs that came due while the previous run was still in flight",
+    ["task", "action"],
+)
+SCHEDULER_LEADER = Gauge(
+    "crypto_pipeline_scheduler_leader",
+    "1 while this replica holds the scheduler leader lock",
+)
+SCHEDULE_MISSED_RUNS = Counter(
+    "crypto_pipeline_schedule_missed_runs_total",
+    "Deadlines that passed before the scheduler could act on them",
+    ["task", "action"],
+)
+
+
+def start_metrics_server(port: int) -> Optional[int]:
+    """Serve /metrics on ``port`` from a daemon thread; 0 disables it."""
+    if not port:
+        return None
+    start_http_server(port)
+    logger.info(f"📈 Serving Prometheus metrics on :{port}/metrics")
+    return port
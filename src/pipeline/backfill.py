@@ -0,0 +1,241 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config.settings import PipelineConfig
+from src.extractors.crypto_extractor import CryptoDataExtractor
+from src.loaders.sinks import Loader, call_loader
+from src.models.batch import PriceBatch
+from src.monitoring.metrics import QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BackfillWindow:
+    coin_id: str
+    start: datetime
+    end: datetime
+
+
+@dataclass
+class WindowResult:
+    window: BackfillWindow
+    batch: PriceBatch = field(default_factory=PriceBatch.empty)
+    error: Optional[str] = None
+
+
+def plan_windows(
+    coin_id: str, start: datetime, end: datetime, window: timedelta
+) -> List[BackfillWindow]:
+    """Split [start, end) into consecutive API-sized windows."""
+    windows = []
+    cursor = start
+    while cursor < end:
+        window_end = min(cursor + window, end)
+        windows.append(BackfillWindow(coin_id, cursor, window_end))
+        cursor = window_end
+    return windows
+
+
+def chart_to_batch(
+    chart: Dict[str, List[List[float]]],
+    window: BackfillWindow,
+    symbol: str,
+    name: str,
+) -> PriceBatch:
+    """Turn a market_chart/range payload into a columnar price batch."""
+    prices = np.asarray(chart.get("prices") or [], dtype=np.float64).reshape(-1, 2)
+    timestamps = prices[:, 0].astype(np.int64).astype("datetime64[ms]")
+    extracted_at = timestamps.astype("datetime64[us]")
+
+    # The API range is inclusive at both ends; keep windows half-open
+    keep = (extracted_at >= np.datetime64(window.start)) & (
+        extracted_at < np.datetime64(window.end)
+    )
+    prices, extracted_at = prices[keep], extracted_at[keep]
+
+    def aligned(series_name: str) -> np.ndarray:
+        # Market caps and volumes share the price timestamps in practice,
+        # but look them up by timestamp rather than trusting positions.
+        values = {int(ts): value for ts, value in chart.get(series_name) or []}
+        return np.array([values.get(int(ts)) for ts in prices[:, 0]], dtype=np.float64)
+
+    return PriceBatch.from_arrays(
+        len(prices),
+        {
+            "symbol": symbol.upper(),
+            "name": name,
+            "current_price": prices[:, 1],
+            "market_cap": aligned("market_caps"),
+            "total_volume": aligned("total_volumes"),
+        },
+        extracted_at,
+    )
+
+
+class BackfillEngine:
+    """Fetches historical windows concurrently and streams them to the loader.
+
+    Fetch workers pull windows from a work queue and push results onto a
+    bounded queue, so at most ``backfill_queue_size`` windows are held in
+    memory while the loader catches up. Windows are checkpointed only after
+    their rows have been committed, which makes a rerun resume where an
+    interrupted backfill stopped.
+    """
+
+    def __init__(
+        self,
+        config: PipelineConfig,
+        loader: Loader,
+        extractor: CryptoDataExtractor,
+    ):
+        self.config = config
+        self.loader = loader
+        self.extractor = extractor
+
+    async def run(
+        self, coin_ids: List[str], start: datetime, end: datetime
+    ) -> Dict[str, Any]:
+        window_size = timedelta(days=self.config.backfill_window_days)
+        await call_loader(self.loader.create_tables)
+
+        coins = {c["id"]: c for c in await self.extractor.fetch_coin_list()}
+        pending: List[BackfillWindow] = []
+        skipped = 0
+        for coin_id in coin_ids:
+            if coin_id not in coins:
+                logger.warning(f"Unknown coin id '{coin_id}', skipping backfill")
+                continue
+            completed = await call_loader(
+                self.loader.get_completed_backfill_windows, coin_id
+            )
+            for window in plan_windows(coin_id, start, end, window_size):
+                if (window.start, window.end) in completed:
+                    skipped += 1
+                else:
+                    pending.append(window)
+
+        logger.info(
+            f"Backfilling {len(pending)} windows for {len(coin_ids)} coins "
+            f"({skipped} already complete)"
+        )
+
+        work: asyncio.Queue = asyncio.Queue()
+        for window in pending:
+            work.put_nowait(window)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.config.backfill_queue_size)
+
+        workers = [
+            asyncio.create_task(self._fetch_worker(work, results, coins))
+            for _ in range(min(self.config.max_concurrent_requests, len(pending)))
+        ]
+        consumer = asyncio.create_task(self._load_results(results, len(pending)))
+
+        try:
+            *_, summary = await asyncio.gather(*workers, consumer)
+        except BaseException:
+            for task in [*workers, consumer]:
+                task.cancel()
+            raise
+
+        summary["windows_skipped"] = skipped
+        logger.info(f"Backfill finished: {summary}")
+        return summary
+
+    async def _fetch_worker(
+        self,
+        work: asyncio.Queue,
+        results: asyncio.Queue,
+        coins: Dict[str, Dict],
+    ) -> None:
+        while True:
+            try:
+                window = work.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            coin = coins[window.coin_id]
+            try:
+                chart = await self.extractor.fetch_market_chart_range(
+                    window.coin_id, window.start, window.end
+                )
+                batch = chart_to_batch(chart, window, coin["symbol"], coin["name"])
+                await results.put(WindowResult(window, batch))
+                QUEUE_DEPTH.labels("backfill").observe(results.qsize())
+            except Exception as e:
+                logger.error(
+                    f"Backfill window {window.coin_id} "
+                    f"[{window.start} - {window.end}) failed: {e}"
+                )
+                await results.put(WindowResult(window, error=str(e)))
+
+    async def _load_results(
+        self, results: asyncio.Queue, expected: int
+    ) -> Dict[str, Any]:
+        buffer: List[WindowResult] = []
+        buffered_rows = 0
+        summary = {"windows_loaded": 0, "windows_failed": 0, "records_loaded": 0}
+
+        for _ in range(expected):
+            result = await results.get()
+            if result.error is not None:
+                summary["windows_failed"] += 1
+                await call_loader(
+                    self.loader.mark_backfill_windows,
+                    [self._checkpoint(result, "failed")],
+                )
+                continue
+
+            buffer.append(result)
+            buffered_rows += len(result.batch)
+            if buffered_rows >= self.config.backfill_flush_rows:
+                await self._flush(buffer, summary)
+                buffer, buffered_rows = [], 0
+
+        if buffer:
+            await self._flush(buffer, summary)
+        return summary
+
+    async def _flush(self, buffer: List[WindowResult], summary: Dict) -> None:
+        batch = PriceBatch.concat([result.batch for result in buffer])
+        if len(batch):
+            # Loads never block the loop, so fetches keep flowing meanwhile
+            await call_loader(self.loader.bulk_insert_crypto_prices, batch)
+        await call_loader(
+            self.loader.mark_backfill_windows,
+            [self._checkpoint(result, "success") for result in buffer],
+        )
+        summary["windows_loaded"] += len(buffer)
+        summary["records_loaded"] += len(batch)
+
+    @staticmethod
+    def _checkpoint(result: WindowResult, status: str) -> Dict[str, Any]:
+        return {
+            "coin_id": result.window.coin_id,
+            "window_start": result.window.start,
+            "window_end": result.window.end,
+            "status": status,
+            "records_loaded": len(result.batch),
+            "error_message": result.error,
+        }
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    # crypto_prices_raw stores naive UTC timestamps
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_window_bounds(start: str, end: Optional[str]) -> Tuple[datetime, datetime]:
+    """Parse ISO dates from the command line; ``end`` defaults to now."""
+    start_dt = _to_naive_utc(datetime.fromisoformat(start))
+    end_dt = _to_naive_utc(datetime.fromisoformat(end)) if end else datetime.utcnow()
+    if start_dt >= end_dt:
+        raise ValueError("Backfill start must be before end")
+    return start_dt, end_dt
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import redis.asyncio as aioredis
+
+from src.config.settings import PipelineConfig
+from src.models.batch import FLOAT_COLUMNS, INTEGER_COLUMNS, PriceBatch
+from src.monitoring.metrics import ROWS_DEDUPED
+
+logger = logging.getLogger(__name__)
+
+# Everything except extracted_at, which changes on every poll by definition
+FINGERPRINT_COLUMNS = ("name",) + FLOAT_COLUMNS + INTEGER_COLUMNS
+
+# (last_updated, fingerprint) as last written for a symbol
+Snapshot = Tuple[Optional[str], str]
+
+
+def fingerprint_rows(batch: PriceBatch) -> List[str]:
+    """Return a short content hash per row."""
+    columns = [batch[c].tolist() for c in FINGERPRINT_COLUMNS]
+    return [
+        hashlib.blake2b(
+            repr(tuple(column[i] for column in columns)).encode(), digest_size=8
+        ).hexdigest()
+        for i in range(len(batch))
+    ]
+
+
+class InMemorySnapshotIndex:
+    """Last-seen snapshot per symbol, kept for the life of the process."""
+
+    def __init__(self) -> None:
+        self._snapshots: Dict[str, Snapshot] = {}
+
+    async def get_many(self, symbols: List[str]) -> Dict[str, Snapshot]:
+        return {s: self._snapshots[s] for s in symbols if s in self._snapshots}
+
+    async def put_many(self, snapshots: Dict[str, Snapshot]) -> None:
+        self._snapshots.update(snapshots)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisSnapshotIndex(InMemorySnapshotIndex):
+    """Snapshot index stored in a Redis hash so it survives restarts and can
+    be shared between worker processes."""
+
+    def __init__(self, redis_url: str, key: str = "crypto_pipeline:snapshots"):
+        super().__init__()
+        self.redis_url = redis_url
+        self.key = key
+        self._client: Any = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> Any:
+        # redis.asyncio connections are bound to the loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+            self._client_loop = loop
+        return self._client
+
+    async def get_many(self, symbols: List[str]) -> Dict[str, Snapshot]:
+        if not symbols:
+            return {}
+        values = await self._get_client().hmget(self.key, symbols)
+        snapshots: Dict[str, Snapshot] = {}
+        for symbol, value in zip(symbols, values):
+            if value is None:
+                continue
+            last_updated, _, fingerprint = value.rpartition("|")
+            snapshots[symbol] = (last_updated or None, fingerprint)
+        return snapshots
+
+    async def put_many(self, snapshots: Dict[str, Snapshot]) -> None:
+        if not snapshots:
+            return
+        mapping = {
+            symbol: f"{last_updated or ''}|{fingerprint}"
+            for symbol, (last_updated, fingerprint) in snapshots.items()
+        }
+        await self._get_client().hset(self.key, mapping=mapping)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+class ChangeDetector:
+    """Drops coin snapshots identical to the last one written for the symbol.
+
+    ``filter`` only reads the index; call ``commit`` with the rows that were
+    actually loaded so a failed load is retried in full on the next run.
+    """
+
+    def __init__(self, index: InMemorySnapshotIndex):
+        self.index = index
+
+    async def filter(
+        self, data: Union[PriceBatch, Sequence[Dict]]
+    ) -> Tuple[PriceBatch, int]:
+        batch = PriceBatch.coerce(data)
+        if not len(batch):
+            return batch, 0
+
+        symbols = batch["symbol"].tolist()
+        last_updated = batch["last_updated"].tolist()
+        fingerprints = fingerprint_rows(batch)
+        try:
+            previous = await self.index.get_many(symbols)
+        except Exception as e:
+            # Writing a duplicate is cheaper than failing the run
+            logger.warning(f"Snapshot index unavailable, loading all rows: {e}")
+            return batch, 0
+
+        keep = np.array(
+            [
+                previous.get(symbol) != (updated, fingerprint)
+                for symbol, updated, fingerprint in zip(
+                    symbols, last_updated, fingerprints
+                )
+            ],
+            dtype=bool,
+        )
+        dropped = int(len(batch) - keep.sum())
+        if dropped:
+            ROWS_DEDUPED.inc(dropped)
+            logger.info(f"Skipping {dropped} unchanged coin snapshots")
+        return (batch if dropped == 0 else batch.take(keep)), dropped
+
+    async def commit(self, data: Union[PriceBatch, Sequence[Dict]]) -> None:
+        batch = PriceBatch.coerce(data)
+        if not len(batch):
+            return
+        snapshots = {
+            symbol: (updated, fingerprint)
+            for symbol, updated, fingerprint in zip(
+                batch["symbol"].tolist(),
+                batch["last_updated"].tolist(),
+                fingerprint_rows(batch),
+            )
+        }
+        try:
+            await self.index.put_many(snapshots)
+        except Exception as e:
+            logger.warning(f"Failed to update snapshot index: {e}")
+
+    async def close(self) -> None:
+        await self.index.close()
+
+
+def build_change_detector(config: PipelineConfig) -> Optional[ChangeDetector]:
+    """Create the change detector selected by DEDUP_ENABLED/DEDUP_BACKEND."""
+    if not config.dedup_enabled:
+        return None
+    if config.dedup_backend == "redis":
+        return ChangeDetector(RedisSnapshotIndex(config.redis_url))
+    return ChangeDetector(InMemorySnapshotIndex())
@@ -1,22 +1,71 @@
+import asyncio
 import logging
 import uuid
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncContextManager, Dict, Optional, Tuple
 
 from src.config.settings import DatabaseConfig, PipelineConfig
 from src.extractors.crypto_extractor import CryptoDataExtractor
-from src.loaders.warehouse_loader import WarehouseLoader
-from src.models.schemas import PipelineRun
+from src.extractors.rate_limiter import build_rate_limiter
+from src.loaders.sinks import build_loader, call_loader, close_loader
+from src.loaders.write_behind import WriteBehindBuffer
+from src.models.batch import PriceBatch
+from src.monitoring.metrics import PIPELINE_RUNS, QUEUE_DEPTH
+from src.pipeline.change_detector import build_change_detector
+from src.pipeline.polling import PollPlan
+from src.pipeline.run_ledger import RunLedger
+from src.pipeline.sharding import ShardAssignment, ShardCoordinator
+from src.pipeline.transformer import DbtTransformer
 
 logger = logging.getLogger(__name__)
 
 
 class CryptoPipelineOrchestrator:
-    def __init__(self, config: PipelineConfig, db_config: DatabaseConfig):
+    def __init__(
+        self,
+        config: PipelineConfig,
+        db_config: DatabaseConfig,
+        extractor: Optional[CryptoDataExtractor] = None,
+    ):
         self.config = config
         self.db_config = db_config
-        logger.info("Initializing WarehouseLoader...")
-        self.loader = WarehouseLoader(db_config)
+        self.loader = build_loader(db_config)
+        logger.info(f"Initialized {type(self.loader).__name__}")
+        # One limiter for the life of the orchestrator so pacing carries over
+        self.rate_limiter = build_rate_limiter(config)
+        # A long-lived extractor keeps its HTTP session (and warm keep-alive
+        # connections) across runs instead of reconnecting every cycle.
+        if extractor is None and config.persistent_runtime:
+            extractor = CryptoDataExtractor(config, rate_limiter=self.rate_limiter)
+        self.extractor = extractor
+        self.change_detector = build_change_detector(config)
+        self.write_behind: Optional[WriteBehindBuffer] = None
+        if config.write_behind_enabled:
+            self.write_behind = WriteBehindBuffer(
+                self.loader,
+                config.spool_dir,
+                config.write_behind_flush_rows,
+                config.write_behind_flush_seconds,
+                on_flush=self._flushed_between_runs,
+            )
+        self.shards: Optional[ShardCoordinator] = None
+        if config.sharding_enabled:
+            if "warehouse" not in db_config.load_sinks:
+                raise ValueError(
+                    "SHARDING_ENABLED needs the warehouse sink for worker leases"
+                )
+            self.shards = ShardCoordinator(
+                self.loader, config.worker_id, config.worker_lease_seconds
+            )
+        self.transformer: Optional[DbtTransformer] = None
+        if config.transform_enabled:
+            self.transformer = DbtTransformer(
+                self.loader,
+                config.dbt_project_dir,
+                config.dbt_profiles_dir,
+                config.transform_debounce_seconds,
+            )
         logger.info(
             f"Pipeline configured with intervals: {config.extraction_interval_minutes} minutes"
         )
@@ -24,74 +73,315 @@ class CryptoPipelineOrchestrator:
             f"Monitoring cryptocurrencies: {', '.join(config.cryptocurrencies)}"
         )
 
-    async def run_extraction_pipeline(self) -> Dict[str, Any]:
-        """Run the complete extraction and loading pipeline"""
-        run_id = f"crypto_extract_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
-        start_time = datetime.utcnow()
+    async def _extract(
+        self, shard: Optional[ShardAssignment], plan: Optional[PollPlan]
+    ) -> Tuple[PriceBatch, Dict[str, int]]:
+        """Fetch prices, plus the request attempts and bytes they took."""
+        if self.extractor is not None:
+            await self.extractor.open()
+            return await self._fetch(self.extractor, shard, plan)
 
-        logger.info(f"Starting pipeline run: {run_id}")
+        async with CryptoDataExtractor(
+            self.config, rate_limiter=self.rate_limiter
+        ) as extractor:
+            return await self._fetch(extractor, shard, plan)
+
+    @staticmethod
+    async def _fetch(
+        extractor: CryptoDataExtractor,
+        shard: Optional[ShardAssignment],
+        plan: Optional[PollPlan],
+    ) -> Tuple[PriceBatch, Dict[str, int]]:
+        attempts = int(extractor.request_attempts)
+        received = int(extractor.bytes_fetched)
+        batch = await extractor.fetch_crypto_prices(shard=shard, plan=plan)
+        return batch, {
+            "attempts": int(extractor.request_attempts) - attempts,
+            "bytes_fetched": int(extractor.bytes_fetched) - received,
+        }
+
+    async def _log_run(self, ledger: RunLedger) -> None:
+        try:
+            await ledger.flush(self.loader)
+        except Exception as e:
+            # With rows safe in the spool, a database outage must not stop
+            # extraction, so run logs become best-effort.
+            if self.write_behind is None:
+                raise
+            logger.warning(f"Could not log pipeline run: {e}")
+
+    def _hold_shard(self) -> AsyncContextManager[Optional[ShardAssignment]]:
+        if self.shards is None:
+            return nullcontext()
+        return self.shards.hold()
+
+    async def renew_lease(self) -> None:
+        """Keep this worker's shards between runs; never raises."""
+        if self.shards is None:
+            return
+        try:
+            await self.shards.renew()
+        except Exception as e:
+            logger.warning(f"Could not renew worker lease: {e}")
+
+    async def open(self) -> None:
+        """Open the long-lived HTTP session ahead of the first run, and
+        replay rows a previous process left in the write-behind spool."""
+        if self.extractor is not None:
+            await self.extractor.open()
+        if self.write_behind is not None:
+            await self.write_behind.open()
+
+    async def close(self) -> None:
+        """Flush buffered rows and release sessions, limiters and pools."""
+        if self.write_behind is not None:
+            await self.write_behind.close()
+        if self.transformer is not None:
+            await self.transformer.close()
+        if self.shards is not None:
+            try:
+                await self.shards.release()
+            except Exception as e:
+                # The lease still expires on its own
+                logger.warning(f"Could not release worker lease: {e}")
+        if self.extractor is not None:
+            await self.extractor.close()
+        await self.rate_limiter.close()
+        if self.change_detector is not None:
+            await self.change_detector.close()
+        await close_loader(self.loader)
+
+    def _flushed_between_runs(self, written: int) -> None:
+        """Rebuild the marts over rows the write-behind buffer loaded on its
+        own, which no run triggers a transform for."""
+        if self.transformer is not None:
+            flush_id = f"write_behind_flush_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+            self.transformer.trigger(flush_id, {"crypto_prices_raw"})
+
+    async def maintain_partitions(self) -> Dict[str, Any]:
+        """Keep price partitions ahead of the data; never raises."""
+        try:
+            return await call_loader(self.loader.maintain_partitions)
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {e}")
+            return {"error": str(e)}
+
+    async def _load(self, batch: PriceBatch, run_id: str) -> int:
+        if self.write_behind is not None:
+            return await self.write_behind.add(batch)
+        return await call_loader(
+            self.loader.bulk_insert_crypto_prices, batch, run_id=run_id
+        )
+
+    async def _run_in_sequence(
+        self,
+        ledger: RunLedger,
+        run_id: str,
+        shard: Optional[ShardAssignment],
+        plan: Optional[PollPlan],
+    ) -> Dict[str, int]:
+        """Extract every page, then load them as one batch."""
+        # Extract data
+        logger.info("Starting data extraction from CoinGecko API")
+        ledger.start("extract")
+        crypto_data, fetch_metrics = await self._extract(shard, plan)
+        ledger.finish("extract", len(crypto_data), **fetch_metrics)
         logger.info(
-            f"Extracting data for cryptocurrencies: {self.config.cryptocurrencies}"
+            f"Successfully extracted {len(crypto_data)} records from CoinGecko API"
         )
 
-        try:
-            # Log extract → running
-            self.loader.log_pipeline_run(
-                run_id=run_id,
-                stage="extract",
-                status="running",
-                records_processed=0,
-                started_at=start_time,
+        # Drop snapshots that have not changed since the last write
+        records_extracted = len(crypto_data)
+        records_skipped = 0
+        if self.change_detector is not None:
+            crypto_data, records_skipped = await self.change_detector.filter(
+                crypto_data
             )
 
-            # Extract data
-            logger.info("Starting data extraction from CoinGecko API")
-            async with CryptoDataExtractor(self.config) as extractor:
-                crypto_data = await extractor.fetch_crypto_prices()
+        # Load data
+        logger.info(f"Starting data loading for {len(crypto_data)} records")
+        ledger.start("load")
+        records_loaded = await self._load(crypto_data, run_id)
+        if self.write_behind is not None:
             logger.info(
-                f"Successfully extracted {len(crypto_data)} records from CoinGecko API"
+                f"Wrote {records_loaded} records; "
+                f"{self.write_behind.pending_rows} buffered for a later flush"
             )
+        else:
+            logger.info(f"Successfully loaded {records_loaded} records into database")
+        if self.change_detector is not None:
+            await self.change_detector.commit(crypto_data)
 
-            # Log extract → success
-            self.loader.log_pipeline_run(
-                run_id=run_id,
-                stage="extract",
-                status="success",
-                records_processed=len(crypto_data),
-                started_at=start_time,
-                completed_at=datetime.utcnow(),
-            )
+        ledger.finish("load", records_loaded)
+        return {
+            "records_extracted": records_extracted,
+            "records_skipped": records_skipped,
+            "records_loaded": records_loaded,
+        }
 
-            # Log load → running
-            self.loader.log_pipeline_run(
-                run_id=run_id,
-                stage="load",
-                status="running",
-                records_processed=0,
-                started_at=datetime.utcnow(),
-            )
+    async def _stream(
+        self,
+        ledger: RunLedger,
+        run_id: str,
+        shard: Optional[ShardAssignment],
+        plan: Optional[PollPlan],
+    ) -> Dict[str, int]:
+        if self.extractor is not None:
+            await self.extractor.open()
+            return await self._stream_pages(self.extractor, ledger, run_id, shard, plan)
 
-            # Load data
-            logger.info(f"Starting data loading for {len(crypto_data)} records")
-            records_loaded = self.loader.bulk_insert_crypto_prices(crypto_data)
-            logger.info(f"Successfully loaded {records_loaded} records into database")
+        async with CryptoDataExtractor(
+            self.config, rate_limiter=self.rate_limiter
+        ) as extractor:
+            return await self._stream_pages(extractor, ledger, run_id, shard, plan)
+
+    async def _stream_pages(
+        self,
+        extractor: CryptoDataExtractor,
+        ledger: RunLedger,
+        run_id: str,
+        shard: Optional[ShardAssignment],
+        plan: Optional[PollPlan],
+    ) -> Dict[str, int]:
+        """Load pages while later pages are still being fetched.
+
+        The extractor feeds a queue of STREAM_QUEUE_SIZE pages drained by
+        STREAM_LOAD_WORKERS loaders; once it is full, fetching waits, so the
+        database sets the pace and memory stays bounded. Both stages run
+        side by side; every PROGRESS_FLUSH_SECONDS their running totals are
+        written to the ledger, so a long run is visible while it lasts.
+        """
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.config.stream_queue_size)
+        # The write-behind buffer takes one batch at a time
+        workers = 1 if self.write_behind else self.config.stream_load_workers
+        counts = {"records_extracted": 0, "records_skipped": 0, "records_loaded": 0}
+        running = {"extract", "load"}
+        done = asyncio.Event()
+        attempts = int(extractor.request_attempts)
+        received = int(extractor.bytes_fetched)
+
+        def fetch_metrics() -> Dict[str, int]:
+            return {
+                "attempts": int(extractor.request_attempts) - attempts,
+                "bytes_fetched": int(extractor.bytes_fetched) - received,
+            }
+
+        async def extract() -> None:
+            async for batch in extractor.stream_crypto_prices(shard=shard, plan=plan):
+                counts["records_extracted"] += len(batch)
+                await pages.put(batch)
+                QUEUE_DEPTH.labels("stream").observe(pages.qsize())
+            running.discard("extract")
+            ledger.finish("extract", counts["records_extracted"], **fetch_metrics())
+            for _ in range(workers):
+                await pages.put(None)
+
+        async def load() -> None:
+            while True:
+                batch = await pages.get()
+                if batch is None:
+                    return
+                if self.change_detector is not None:
+                    batch, skipped = await self.change_detector.filter(batch)
+                    counts["records_skipped"] += skipped
+                # Await before updating: ``+= await`` would read the total
+                # before the await and lose other workers' rows
+                loaded = await self._load(batch, run_id)
+                counts["records_loaded"] += loaded
+                if self.change_detector is not None:
+                    await self.change_detector.commit(batch)
+
+        async def report_progress() -> None:
+            # Stopped with ``done`` rather than cancelled, so a flush in
+            # flight completes before the run's final flush starts
+            while True:
+                try:
+                    await asyncio.wait_for(
+                        done.wait(), self.config.progress_flush_seconds
+                    )
+                    return
+                except asyncio.TimeoutError:
+                    pass
+                if "extract" in running:
+                    ledger.progress(
+                        "extract", counts["records_extracted"], **fetch_metrics()
+                    )
+                if "load" in running:
+                    ledger.progress("load", counts["records_loaded"])
+                try:
+                    await ledger.flush(self.loader)
+                except Exception as e:
+                    # Left buffered for the run's final flush
+                    logger.warning(f"Could not log pipeline progress: {e}")
+
+        logger.info(f"Streaming pages into {workers} loader workers")
+        ledger.start("extract")
+        ledger.start("load")
+        reporter = asyncio.create_task(report_progress())
+        tasks = [asyncio.create_task(extract())]
+        tasks += [asyncio.create_task(load()) for _ in range(workers)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            done.set()
+            await reporter
 
-            # Log load → success
-            self.loader.log_pipeline_run(
-                run_id=run_id,
-                stage="load",
-                status="success",
-                records_processed=records_loaded,
-                completed_at=datetime.utcnow(),
+        ledger.finish("load", counts["records_loaded"])
+        logger.info(
+            f"Streamed {counts['records_extracted']} records, "
+            f"loaded {counts['records_loaded']}"
+        )
+        return counts
+
+    async def run_extraction_pipeline(
+        self, plan: Optional[PollPlan] = None
+    ) -> Dict[str, Any]:
+        """Run the complete extraction and loading pipeline, for the polling
+        tiers of ``plan`` when one is given"""
+        run_id = f"crypto_extract_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+        logger.info(f"Starting pipeline run: {run_id}")
+        if plan is not None:
+            logger.info(f"Polling tiers: {plan}")
+        else:
+            logger.info(
+                f"Extracting data for cryptocurrencies: {self.config.cryptocurrencies}"
             )
 
+        ledger = RunLedger(run_id)
+        try:
+            # With sharding, only this worker's part of the universe
+            async with self._hold_shard() as shard:
+                if self.config.streaming_enabled:
+                    counts = await self._stream(ledger, run_id, shard, plan)
+                else:
+                    counts = await self._run_in_sequence(ledger, run_id, shard, plan)
+
+            # One transaction for every stage event of the run
+            await self._log_run(ledger)
+
+            # Rebuild the marts over what this run loaded, in the background;
+            # a run that wrote no rows leaves them as they are
+            if self.transformer is not None and counts["records_loaded"]:
+                self.transformer.trigger(run_id, {"crypto_prices_raw", "pipeline_runs"})
+
             result = {
                 "run_id": run_id,
                 "status": "success",
-                "records_processed": records_loaded,
+                "records_processed": counts["records_loaded"],
+                "records_extracted": counts["records_extracted"],
+                "records_skipped": counts["records_skipped"],
+                "records_buffered": (
+                    self.write_behind.pending_rows if self.write_behind else 0
+                ),
                 "timestamp": datetime.utcnow().isoformat(),
             }
 
+            PIPELINE_RUNS.labels("success").inc()
             logger.info(f"Pipeline run {run_id} completed successfully")
             return result
 
@@ -99,15 +389,10 @@ class CryptoPipelineOrchestrator:
             error_msg = str(e)
             logger.error(f"Pipeline run {run_id} failed: {error_msg}")
 
-            # Log extract → failed (regardless of where it failed)
-            self.loader.log_pipeline_run(
-                run_id=run_id,
-                stage="extract",
-                status="failed",
-                records_processed=0,
-                error_message=error_msg,
-                completed_at=datetime.utcnow(),
-            )
+            # Fail the stages that were in progress
+            ledger.fail(error_msg)
+            await self._log_run(ledger)
+            PIPELINE_RUNS.labels("failed").inc()
 
             result = {
                 "run_id": run_id,
@@ -0,0 +1,170 @@
+import heapq
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable, List, Tuple
+
+from src.config.settings import PollingTier
+from src.monitoring.metrics import SCHEDULE_LAG_SECONDS, SCHEDULE_MISSED_RUNS
+
+logger = logging.getLogger(__name__)
+
+
+def _merge_ranges(ranges: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+@dataclass
+class PollPlan:
+    """The coins one tiered poll fetches: the union of its tiers' market-cap
+    rank ranges and coin ids, packed into as few /coins/markets requests as
+    the page size allows."""
+
+    tiers: List[PollingTier] = field(default_factory=list)
+
+    @property
+    def ranks(self) -> List[Tuple[int, int]]:
+        return _merge_ranges(t.ranks for t in self.tiers if t.ranks is not None)
+
+    @property
+    def ids(self) -> List[str]:
+        return list(dict.fromkeys(c for t in self.tiers for c in t.coins))
+
+    def wants_rank(self, rank: int) -> bool:
+        return any(first <= rank <= last for first, last in self.ranks)
+
+    def rank_pages(self, page_size: int) -> List[Tuple[int, int]]:
+        """(per_page, page) requests covering every planned rank.
+
+        Ranks within the first page come from one request just large enough
+        to reach the last of them; deeper ranks from full pages.
+        """
+        ranks = self.ranks
+        if not ranks:
+            return []
+        if ranks[-1][1] <= page_size:
+            return [(ranks[-1][1], 1)]
+        pages = sorted(
+            {
+                page
+                for first, last in ranks
+                for page in range(-(-first // page_size), -(-last // page_size) + 1)
+            }
+        )
+        return [(page_size, page) for page in pages]
+
+    def id_chunks(self, page_size: int) -> List[List[str]]:
+        ids = self.ids
+        return [ids[i : i + page_size] for i in range(0, len(ids), page_size)]
+
+    def request_count(self, page_size: int) -> int:
+        return len(self.rank_pages(page_size)) + len(self.id_chunks(page_size))
+
+    def with_tier(self, tier: PollingTier) -> "PollPlan":
+        return PollPlan(self.tiers + [tier])
+
+    def __str__(self) -> str:
+        return ", ".join(t.name for t in self.tiers)
+
+
+class TierQueue:
+    """Polling tiers ordered by their next deadline on the monotonic clock.
+
+    ``take`` pops every due tier and packs them into one PollPlan, most
+    urgent ``priority`` first. Tiers that would push the plan past
+    ``max_requests`` wait for the next poll; tiers due within
+    ``pack_ahead_seconds`` ride along when they add no request. Deadlines
+    are fixed-rate per tier, and ones that pass while a tier waits collapse
+    into its next poll.
+    """
+
+    def __init__(
+        self,
+        tiers: Iterable[PollingTier],
+        page_size: int,
+        now: float,
+        max_requests: int = 0,
+        pack_ahead_seconds: float = 0.0,
+    ):
+        self.page_size = page_size
+        self.max_requests = max_requests
+        self.pack_ahead_seconds = pack_ahead_seconds
+        self._order = itertools.count()
+        self._heap: List[Tuple[float, int, int, PollingTier]] = []
+        for tier in tiers:
+            self._push(now, tier)
+
+    def _push(self, deadline: float, tier: PollingTier) -> None:
+        heapq.heappush(self._heap, (deadline, tier.priority, next(self._order), tier))
+
+    def _pop_until(self, limit: float) -> List[Tuple[float, PollingTier]]:
+        popped = []
+        while self._heap and self._heap[0][0] <= limit:
+            deadline, _, _, tier = heapq.heappop(self._heap)
+            popped.append((deadline, tier))
+        return popped
+
+    def next_deadline(self) -> float:
+        return self._heap[0][0]
+
+    def take(self, now: float) -> PollPlan:
+        """Pack the tiers due at ``now`` into a plan and schedule their next
+        polls."""
+        due = sorted(self._pop_until(now), key=lambda item: (item[1].priority, item[0]))
+        plan = PollPlan()
+        served, deferred = [], []
+        for deadline, tier in due:
+            packed = plan.with_tier(tier)
+            over_budget = (
+                self.max_requests
+                and packed.request_count(self.page_size) > self.max_requests
+            )
+            # The most urgent tier always goes out, whatever its size
+            if over_budget and plan.tiers:
+                deferred.append((deadline, tier))
+            else:
+                plan = packed
+                served.append((deadline, tier))
+
+        riders = []
+        for deadline, tier in self._pop_until(now + self.pack_ahead_seconds):
+            packed = plan.with_tier(tier)
+            if plan.tiers and packed.request_count(
+                self.page_size
+            ) == plan.request_count(self.page_size):
+                plan = packed
+                riders.append(tier)
+            else:
+                deferred.append((deadline, tier))
+
+        late = [tier.name for deadline, tier in deferred if deadline <= now]
+        if late:
+            logger.info(
+                f"Polling {plan}; {', '.join(late)} wait for the next poll "
+                f"to stay within {self.max_requests} requests"
+            )
+        for deadline, tier in deferred:
+            if deadline <= now:
+                SCHEDULE_MISSED_RUNS.labels(f"tier:{tier.name}", "deferred").inc()
+            self._push(deadline, tier)
+        for deadline, tier in served:
+            SCHEDULE_LAG_SECONDS.labels(f"tier:{tier.name}").set(now - deadline)
+            self._push(self._following(deadline, tier, now), tier)
+        for tier in riders:
+            SCHEDULE_LAG_SECONDS.labels(f"tier:{tier.name}").set(0.0)
+            self._push(now + tier.interval_seconds, tier)
+        return plan
+
+    def _following(self, deadline: float, tier: PollingTier, now: float) -> float:
+        following = deadline + tier.interval_seconds
+        if following <= now:
+            missed = int((now - following) // tier.interval_seconds) + 1
+            SCHEDULE_MISSED_RUNS.labels(f"tier:{tier.name}", "skipped").inc(missed)
+            following += missed * tier.interval_seconds
+        return following
@@ -0,0 +1,101 @@
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.loaders.sinks import Loader, call_loader
+from src.loaders.warehouse_loader import pipeline_run_event
+from src.monitoring.metrics import ROWS_PER_SECOND, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class RunLedger:
+    """Buffers one pipeline run's stage events and writes them together.
+
+    Stages are timed in memory with ``start``/``progress``/``finish``/``fail``
+    and may overlap; nothing touches the database until ``flush``, which
+    appends every event in a single transaction. Events stay buffered if the
+    flush fails, so a later flush retries them.
+    """
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.events: List[Dict[str, Any]] = []
+        # Stages in progress, in start order
+        self._started: Dict[str, Tuple[datetime, float]] = {}
+        self._last: Optional[str] = None
+
+    def start(self, stage: str) -> None:
+        self._started[stage] = (datetime.utcnow(), time.monotonic())
+        self._last = stage
+
+    def _record(
+        self,
+        stage: str,
+        status: str,
+        records_processed: int,
+        finished: bool = True,
+        **metrics,
+    ):
+        now = (datetime.utcnow(), time.monotonic())
+        if finished:
+            started_at, started = self._started.pop(stage, now)
+            duration = now[1] - started
+            STAGE_SECONDS.labels(stage, status).observe(duration)
+            if status == "success" and duration > 0:
+                ROWS_PER_SECOND.labels(stage).observe(records_processed / duration)
+        else:
+            started_at, started = self._started.get(stage, now)
+        self.events.append(
+            pipeline_run_event(
+                self.run_id,
+                stage,
+                status,
+                records_processed,
+                started_at=started_at,
+                completed_at=now[0],
+                duration_seconds=now[1] - started,
+                **metrics,
+            )
+        )
+
+    def progress(self, stage: str, records_processed: int, **metrics) -> None:
+        """Record a running stage's cumulative progress; ``completed_at`` is
+        the time of the snapshot."""
+        self._record(stage, "running", records_processed, finished=False, **metrics)
+
+    def finish(
+        self,
+        stage: str,
+        records_processed: int,
+        attempts: int = 1,
+        bytes_fetched: Optional[int] = None,
+    ) -> None:
+        self._record(
+            stage,
+            "success",
+            records_processed,
+            attempts=attempts,
+            bytes_fetched=bytes_fetched,
+        )
+
+    def fail(self, error_message: str, stage: Optional[str] = None) -> None:
+        """Fail ``stage``; by default every stage in progress, else the last
+        one started (a failure after every stage finished is a logging
+        failure)."""
+        if stage is not None:
+            stages = [stage]
+        else:
+            stages = list(self._started) or [self._last or "extract"]
+        for failed in stages:
+            self._record(failed, "failed", 0, error_message=error_message)
+
+    async def flush(self, loader: Loader) -> int:
+        """Write the buffered events in one transaction; returns the count."""
+        if not self.events:
+            return 0
+        events = list(self.events)
+        await call_loader(loader.record_pipeline_events, events)
+        del self.events[: len(events)]
+        return len(events)
@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import logging
+from collections import Counter
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Sequence, Tuple
+
+from src.loaders.sinks import Loader, call_loader
+
+logger = logging.getLogger(__name__)
+
+
+def _weight(worker_id: str, key: str) -> int:
+    digest = hashlib.blake2b(f"{worker_id}/{key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def assign_shards(keys: Sequence[str], workers: Sequence[str]) -> Dict[str, str]:
+    """Map each key to a worker by rendezvous hashing with bounded loads.
+
+    A key goes to the worker with the highest hash weight for it unless
+    that worker already holds its fair share, ceil(keys / workers), and
+    then to the next best. Weights don't depend on the other workers, so a
+    worker joining or leaving moves few keys, while the cap keeps the
+    slowest worker close to 1/N of the work on small key sets such as
+    market-cap pages. Every worker computes the same map from the same
+    inputs.
+    """
+    capacity = -(-len(keys) // len(workers))
+    load: Counter = Counter()
+    owners = {}
+    for key in sorted(keys):
+        ranked = sorted(workers, key=lambda worker_id: _weight(worker_id, key))
+        owner = next(w for w in reversed(ranked) if load[w] < capacity)
+        owners[key] = owner
+        load[owner] += 1
+    return owners
+
+
+@dataclass(frozen=True)
+class ShardAssignment:
+    """The live workers as one worker saw them at the start of a run."""
+
+    worker_id: str
+    workers: Tuple[str, ...]
+
+    def owned(self, keys: Sequence[str]) -> List[str]:
+        """The keys this worker fetches, in their original order."""
+        owners = assign_shards(keys, self.workers)
+        return [key for key in keys if owners[key] == self.worker_id]
+
+
+class ShardCoordinator:
+    """Keeps this worker's lease in pipeline_workers and hands out the
+    shard assignment for each run.
+
+    A worker that stops renewing (crash, network split) drops out once its
+    lease expires, and the others pick up its keys on their next run. A
+    clean shutdown releases the lease so that happens at once.
+    """
+
+    def __init__(self, loader: Loader, worker_id: str, lease_seconds: float):
+        self.loader = loader
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self._workers: Tuple[str, ...] = ()
+
+    async def renew(self) -> ShardAssignment:
+        workers = await call_loader(
+            self.loader.renew_worker_lease, self.worker_id, self.lease_seconds
+        )
+        workers = tuple(sorted(set(workers) | {self.worker_id}))
+        if workers != self._workers:
+            logger.info(f"🧩 {len(workers)} live workers: {', '.join(workers)}")
+            self._workers = workers
+        return ShardAssignment(self.worker_id, workers)
+
+    async def _keep_alive(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.renew()
+            except Exception as e:
+                logger.warning(f"Could not renew worker lease: {e}")
+
+    @asynccontextmanager
+    async def hold(self) -> AsyncIterator[ShardAssignment]:
+        """Renew the lease for a run and keep renewing it until the run
+        ends, so a run longer than the lease does not lose its shards."""
+        assignment = await self.renew()
+        keep_alive = asyncio.create_task(self._keep_alive())
+        try:
+            yield assignment
+        finally:
+            keep_alive.cancel()
+            with suppress(asyncio.CancelledError):
+                await keep_alive
+
+    async def release(self) -> None:
+        await call_loader(self.loader.release_worker_lease, self.worker_id)
+        self._workers = ()
+        logger.info(f"Released worker lease for {self.worker_id}")
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, List, Optional, Set, Tuple
+
+from src.loaders.sinks import Loader, call_loader
+from src.loaders.warehouse_loader import pipeline_run_event
+from src.monitoring.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# dbt nodes that read each relation the pipeline writes, as a ref() target
+# or a source; the trailing + adds every model downstream of them
+DBT_SELECTORS = {
+    "crypto_prices_raw": ("crypto_prices_raw+", "source:raw.crypto_prices_raw+"),
+    "pipeline_runs": ("pipeline_runs+", "source:raw.pipeline_runs+"),
+}
+
+
+class DbtTransformer:
+    """Runs only the dbt models downstream of the tables a load changed.
+
+    ``trigger`` returns at once. A background task waits
+    TRANSFORM_DEBOUNCE_SECONDS, then runs dbt in-process through dbtRunner
+    for everything triggered so far. Triggers that arrive during the wait
+    or while dbt runs are folded into the next invocation, so dbt never
+    queues up behind fast loads. Each invocation is recorded as a
+    ``transform`` stage of every run it covered.
+    """
+
+    def __init__(
+        self,
+        loader: Loader,
+        project_dir: str,
+        profiles_dir: str,
+        debounce_seconds: float,
+        runner: Optional[Any] = None,
+    ):
+        if runner is None:
+            try:
+                from dbt.cli.main import dbtRunner
+            except ImportError as e:
+                raise RuntimeError(
+                    "TRANSFORM_ENABLED needs dbt-core and dbt-postgres installed"
+                ) from e
+            runner = dbtRunner()
+        self.loader = loader
+        self.runner = runner
+        self.project_dir = project_dir
+        self.profiles_dir = profiles_dir
+        self.debounce_seconds = debounce_seconds
+        self._run_ids: List[str] = []
+        self._tables: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Future] = None
+        self._closing = False
+
+    def trigger(self, run_id: str, tables: Set[str]) -> None:
+        """Schedule the models downstream of ``tables`` on behalf of a run."""
+        self._run_ids.append(run_id)
+        self._tables |= tables & DBT_SELECTORS.keys()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while self._run_ids:
+            if self.debounce_seconds and not self._closing:
+                self._wake = asyncio.get_running_loop().create_future()
+                await asyncio.wait({self._wake}, timeout=self.debounce_seconds)
+                self._wake = None
+            run_ids, tables = self._run_ids, self._tables
+            self._run_ids, self._tables = [], set()
+            if tables:
+                await self._transform(run_ids, tables)
+
+    def _invoke(self, selectors: List[str]) -> Tuple[int, Optional[str]]:
+        """Run dbt; return the models built and the error, if any."""
+        result = self.runner.invoke(
+            [
+                "run",
+                "--select",
+                *selectors,
+                "--project-dir",
+                self.project_dir,
+                "--profiles-dir",
+                self.profiles_dir,
+            ]
+        )
+        nodes = list(getattr(result.result, "results", None) or [])
+        statuses = [str(getattr(n.status, "value", n.status)) for n in nodes]
+        built = statuses.count("success")
+        if result.success:
+            return built, None
+        if result.exception is not None:
+            return built, str(result.exception)
+        failed = [
+            n.node.name for n, s in zip(nodes, statuses) if s in ("error", "fail")
+        ]
+        return built, f"dbt models failed: {', '.join(failed) or 'unknown'}"
+
+    async def _transform(self, run_ids: List[str], tables: Set[str]) -> None:
+        selectors = sorted({s for table in tables for s in DBT_SELECTORS[table]})
+        logger.info(
+            f"🔄 Running dbt downstream of {', '.join(sorted(tables))} "
+            f"for {len(run_ids)} runs"
+        )
+        started_at, started = datetime.utcnow(), time.monotonic()
+        try:
+            built, error = await asyncio.to_thread(self._invoke, selectors)
+        except Exception as e:
+            built, error = 0, str(e)
+        duration = time.monotonic() - started
+        status = "failed" if error else "success"
+        STAGE_SECONDS.labels("transform", status).observe(duration)
+        if error:
+            logger.error(f"❌ dbt transform failed: {error}")
+        else:
+            logger.info(f"✅ dbt built {built} models in {duration:.1f}s")
+
+        completed_at = datetime.utcnow()
+        events = [
+            pipeline_run_event(
+                run_id,
+                "transform",
+                status,
+                built,
+                error,
+                started_at,
+                completed_at,
+                duration,
+            )
+            for run_id in run_ids
+        ]
+        try:
+            await call_loader(self.loader.record_pipeline_events, events)
+        except Exception as e:
+            logger.warning(f"Could not record transform stage: {e}")
+
+    async def wait(self) -> None:
+        """Return once every triggered transform has run."""
+        if self._task is not None:
+            await self._task
+
+    async def close(self) -> None:
+        """Run anything still pending without waiting out the debounce."""
+        self._closing = True
+        if self._wake is not None and not self._wake.done():
+            self._wake.set_result(None)
+        await self.wait()
@@ -1,60 +1,391 @@
 import asyncio
 import json
 import logging
+import random
 import time
-from datetime import datetime
-
-import schedule
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Union
 
+from src.config.settings import PipelineConfig
+from src.monitoring.health_monitor import PipelineHealthMonitor
+from src.monitoring.health_server import HealthServer
+from src.monitoring.metrics import (
+    SCHEDULE_LAG_SECONDS,
+    SCHEDULE_MISSED_RUNS,
+    SCHEDULE_OVERLAPS,
+)
 from src.pipeline.orchestrator import CryptoPipelineOrchestrator
+from src.pipeline.polling import PollPlan, TierQueue
+from src.scheduler.leader import LeaderElector
+from src.scheduler.triggers import IntervalTrigger, build_trigger, due_deadlines
 
 logger = logging.getLogger(__name__)
 
+MAINTENANCE_INTERVAL_SECONDS = 24 * 60 * 60
+
+
+class ScheduledTask:
+    """Runs ``func`` at the deadlines of ``trigger``, never two at once.
+
+    Each deadline is pushed back by up to ``jitter_seconds``. A deadline
+    reached while the previous run is in flight is dropped (``overlap``
+    "skip") or started as soon as that run ends ("queue"). Deadlines that
+    passed without the scheduler waking, after a stall or a suspend, are
+    dropped but for the latest (``missed`` "skip") or run back to back, the
+    latest ``max_catchup`` of them ("catchup").
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[object]],
+        trigger,
+        jitter_seconds: float = 0.0,
+        overlap: str = "skip",
+        missed: str = "skip",
+        max_catchup: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.jitter_seconds = jitter_seconds
+        self.overlap = overlap
+        self.missed = missed
+        self.max_catchup = max_catchup if missed == "catchup" else 1
+        self._clock = clock
+        self._pending: Deque[float] = deque()
+        self._ticker: Optional[asyncio.Task] = None
+        self._runner: Optional[asyncio.Task] = None
+
+    @property
+    def in_flight(self) -> bool:
+        return self._runner is not None and not self._runner.done()
+
+    def start(self, first_deadline: Optional[float] = None) -> None:
+        if first_deadline is None:
+            first_deadline = self.trigger.next_deadline(self._clock())
+        self._ticker = asyncio.create_task(self._tick(first_deadline))
+
+    async def stop(self) -> None:
+        """Stop scheduling and let a run in flight finish."""
+        self._pending.clear()
+        if self._ticker is not None:
+            self._ticker.cancel()
+            await asyncio.gather(self._ticker, return_exceptions=True)
+        if self._runner is not None:
+            await asyncio.gather(self._runner, return_exceptions=True)
+
+    async def _tick(self, deadline: float) -> None:
+        while True:
+            due_at = deadline + random.uniform(0, self.jitter_seconds)
+            await asyncio.sleep(max(due_at - self._clock(), 0.0))
+            due, deadline = due_deadlines(self.trigger, deadline, self._clock())
+            self._dispatch([due_at] + due[1:])
+
+    def _dispatch(self, due: List[float]) -> None:
+        keep = due[-self.max_catchup :]
+        if len(due) > len(keep):
+            SCHEDULE_MISSED_RUNS.labels(self.name, "skipped").inc(len(due) - len(keep))
+        if len(keep) > 1:
+            SCHEDULE_MISSED_RUNS.labels(self.name, "caught_up").inc(len(keep) - 1)
+        if len(due) > 1:
+            logger.warning(
+                f"Missed {len(due) - 1} {self.name} deadline(s), "
+                f"running {len(keep)} of them"
+            )
+
+        if self.in_flight:
+            room = 0
+            if self.overlap == "queue":
+                room = min(max(self.max_catchup - len(self._pending), 0), len(keep))
+            queued = keep[len(keep) - room :] if room else []
+            self._pending.extend(queued)
+            if queued:
+                SCHEDULE_OVERLAPS.labels(self.name, "queued").inc(len(queued))
+            if len(keep) > len(queued):
+                SCHEDULE_OVERLAPS.labels(self.name, "skipped").inc(
+                    len(keep) - len(queued)
+                )
+            logger.warning(
+                f"Previous {self.name} run still in flight: "
+                f"queued {len(queued)}, skipped {len(keep) - len(queued)}"
+            )
+            return
+
+        self._pending.extend(keep)
+        self._runner = asyncio.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while self._pending:
+            due_at = self._pending.popleft()
+            SCHEDULE_LAG_SECONDS.labels(self.name).set(max(self._clock() - due_at, 0.0))
+            try:
+                await self.func()
+            except Exception as e:
+                logger.error(f"Scheduled {self.name} run failed: {e}", exc_info=True)
+
+
+class TieredPollTask:
+    """Polls the tiers of a TierQueue as they come due, one poll at a time.
+
+    Each poll packs every due tier into shared requests; tiers that came
+    due while a poll was in flight go out together in the next one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[PollPlan], Awaitable[object]],
+        queue_factory: Callable[[float], TierQueue],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.func = func
+        self.queue_factory = queue_factory
+        self.queue: Optional[TierQueue] = None
+        self._clock = clock
+        self._ticker: Optional[asyncio.Task] = None
+        self._runner: Optional[asyncio.Task] = None
+
+    @property
+    def in_flight(self) -> bool:
+        return self._runner is not None and not self._runner.done()
+
+    def start(self, first_deadline: Optional[float] = None) -> None:
+        self.queue = self.queue_factory(
+            self._clock() if first_deadline is None else first_deadline
+        )
+        self._ticker = asyncio.create_task(self._tick())
+
+    async def stop(self) -> None:
+        """Stop polling and let a poll in flight finish."""
+        if self._ticker is not None:
+            self._ticker.cancel()
+            await asyncio.gather(self._ticker, return_exceptions=True)
+        if self._runner is not None:
+            await asyncio.gather(self._runner, return_exceptions=True)
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(max(self.queue.next_deadline() - self._clock(), 0.0))
+            plan = self.queue.take(self._clock())
+            self._runner = asyncio.create_task(self._poll(plan))
+            # Waiting without awaiting the task itself lets stop() cancel
+            # the ticker while the poll runs to completion
+            await asyncio.wait([self._runner])
+
+    async def _poll(self, plan: PollPlan) -> None:
+        try:
+            await self.func(plan)
+        except Exception as e:
+            logger.error(f"Scheduled {self.name} poll failed: {e}", exc_info=True)
+
 
 class PipelineScheduler:
+    """Fires the pipeline and its upkeep jobs on one event loop.
+
+    With LEADER_ELECTION, every replica runs a scheduler but only the one
+    holding the leader lock fires jobs; the others stand by with config
+    loaded and sessions open, and start firing once they win the lock.
+    A ``health_server`` set before start() serves every replica's probes.
+    """
+
     def __init__(
-        self, orchestrator: CryptoPipelineOrchestrator, interval_minutes: int = 60
+        self,
+        orchestrator: CryptoPipelineOrchestrator,
+        config: PipelineConfig,
+        clock: Callable[[], float] = time.monotonic,
+        elector: Optional[LeaderElector] = None,
     ):
         self.orchestrator = orchestrator
-        self.interval_minutes = interval_minutes
+        self.config = config
         self.is_running = False
+        self.tasks: List[Union[ScheduledTask, TieredPollTask]] = []
+        self._clock = clock
+        self._stopped: Optional[asyncio.Event] = None
+        if elector is None and config.leader_election:
+            elector = LeaderElector(
+                orchestrator.db_config,
+                config.leader_lock_name,
+                config.worker_id,
+                config.leader_poll_seconds,
+            )
+        self.elector = elector
+        self._leading = False
+        # Serves health_snapshot() while the scheduler runs, when set
+        self.health_server: Optional[HealthServer] = None
+        self._monitor = PipelineHealthMonitor(orchestrator.loader)
 
     def schedule_pipeline(self):
-        """Schedule the pipeline to run at specified intervals"""
-        schedule.every(self.interval_minutes).minutes.do(self._run_pipeline_job)
-        logger.info(f"Pipeline scheduled to run every {self.interval_minutes} minutes")
+        """Schedule the pipeline, daily maintenance and the lease heartbeat"""
+        config = self.config
+        if config.polling_tiers:
+            pipeline = self._tiered_pipeline()
+        else:
+            trigger = build_trigger(
+                config.schedule_interval_seconds, config.schedule_cron
+            )
+            pipeline = ScheduledTask(
+                "pipeline",
+                self._as_leader(self._run_pipeline_job),
+                trigger,
+                jitter_seconds=config.schedule_jitter_seconds,
+                overlap=config.schedule_overlap_policy,
+                missed=config.schedule_missed_policy,
+                max_catchup=config.schedule_max_catchup,
+                clock=self._clock,
+            )
+            logger.info(f"Pipeline scheduled {trigger}")
+        self.tasks = [
+            pipeline,
+            ScheduledTask(
+                "maintenance",
+                self._as_leader(self._run_maintenance_job),
+                IntervalTrigger(MAINTENANCE_INTERVAL_SECONDS),
+                clock=self._clock,
+            ),
+        ]
+        if self.orchestrator.shards is not None:
+            # Renew the worker lease between runs, well inside its expiry
+            self.tasks.append(
+                ScheduledTask(
+                    "heartbeat",
+                    self.orchestrator.renew_lease,
+                    IntervalTrigger(self._heartbeat_seconds),
+                    clock=self._clock,
+                )
+            )
 
-    def _run_pipeline_job(self):
-        """Wrapper to run async pipeline in sync scheduler"""
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(
-                self.orchestrator.run_extraction_pipeline()
+    def _tiered_pipeline(self) -> TieredPollTask:
+        config = self.config
+
+        def queue_factory(now: float) -> TierQueue:
+            return TierQueue(
+                config.polling_tiers,
+                config.page_size,
+                now,
+                max_requests=config.polling_max_requests,
+                pack_ahead_seconds=config.polling_pack_ahead_seconds,
             )
+
+        for tier in sorted(config.polling_tiers, key=lambda t: t.priority):
+            if tier.ranks:
+                coins = f"ranks {tier.ranks[0]}-{tier.ranks[1]}"
+            else:
+                coins = f"{len(tier.coins)} coins"
             logger.info(
-                f"Scheduled pipeline run completed: {json.dumps(result, indent=2)}"
+                f"Polling tier {tier.name}: {coins} every "
+                f"{tier.interval_seconds:g}s, priority {tier.priority}"
             )
-        except Exception as e:
-            logger.error(f"Scheduled pipeline run failed: {e}", exc_info=True)
-        finally:
-            loop.close()
+        return TieredPollTask(
+            "pipeline",
+            self._as_leader(self._run_tiered_job),
+            queue_factory,
+            clock=self._clock,
+        )
+
+    def _as_leader(self, job: Callable[..., Awaitable[None]]):
+        """``job``, skipped unless leadership is confirmed just before it
+        runs, so a leader that stalled past its lock never fires late."""
+        if self.elector is None:
+            return job
+
+        async def run(*args) -> None:
+            if await self.elector.poll():
+                await job(*args)
+            else:
+                logger.warning("Skipping scheduled job: not the leader")
+
+        return run
+
+    @property
+    def _heartbeat_seconds(self) -> int:
+        return min(60, max(1, self.orchestrator.shards.lease_seconds // 3))
+
+    async def _run_pipeline_job(self):
+        result = await self.orchestrator.run_extraction_pipeline()
+        logger.info(f"Scheduled pipeline run completed: {json.dumps(result, indent=2)}")
+
+    async def _run_tiered_job(self, plan: PollPlan):
+        result = await self.orchestrator.run_extraction_pipeline(plan)
+        logger.info(
+            f"Tiered poll of {plan} finished {result['status']}: "
+            f"{result.get('records_processed', 0)} records"
+        )
 
-    def start(self):
-        """Start the scheduler"""
+    async def _run_maintenance_job(self):
+        """Daily partition pre-creation and retention"""
+        result = await self.orchestrator.maintain_partitions()
+        logger.info(f"Partition maintenance completed: {result}")
+
+    async def health_snapshot(self) -> Dict[str, Any]:
+        """Pipeline health plus this replica's scheduler state"""
+        health = await self._monitor.check_pipeline_health_async()
+        health["scheduler"] = {
+            "worker_id": self.config.worker_id,
+            "running": self.is_running,
+            "leader": None if self.elector is None else self.elector.is_leader,
+            "in_flight": [task.name for task in self.tasks if task.in_flight],
+        }
+        return health
+
+    async def start(self):
+        """Run maintenance and the pipeline now, then on schedule until stop()"""
         self.is_running = True
+        self._stopped = asyncio.Event()
         logger.info("Starting pipeline scheduler...")
-        logger.info(f"Pipeline will run every {self.interval_minutes} minutes")
 
-        # Run once immediately
-        self._run_pipeline_job()
+        try:
+            # Replays the write-behind spool, and on a standby keeps the
+            # session as warm as the leader's for when it takes over
+            await self.orchestrator.open()
+            if self.health_server is not None:
+                await self.health_server.start()
+            if self.elector is None:
+                await self._lead()
+                await self._stopped.wait()
+            else:
+                await self._elect()
+        finally:
+            await self._stand_by()
+            if self.health_server is not None:
+                await self.health_server.stop()
+            if self.elector is not None:
+                await self.elector.close()
+            await self.orchestrator.close()
+            self.is_running = False
+            logger.info("Pipeline scheduler stopped")
+
+    async def _lead(self):
+        self._leading = True
+        await self._run_maintenance_job()
+        now = self._clock()
+        for task in self.tasks:
+            task.start(now if task.name == "pipeline" else None)
+
+    async def _stand_by(self):
+        if self._leading:
+            self._leading = False
+            for task in self.tasks:
+                await task.stop()
 
-        # Then run on schedule
-        while self.is_running:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+    async def _elect(self):
+        """Poll the leader lock until stop(): fire jobs while holding it"""
+        logger.info(f"Worker {self.config.worker_id} standing by for leadership")
+        while not self._stopped.is_set():
+            leading = await self.elector.poll()
+            if leading and not self._leading:
+                await self._lead()
+            elif not leading and self._leading:
+                await self._stand_by()
+            try:
+                await asyncio.wait_for(self._stopped.wait(), self.elector.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
 
     def stop(self):
-        """Stop the scheduler"""
+        """Stop the scheduler once runs in flight finish"""
         self.is_running = False
-        logger.info("Pipeline scheduler stopped")
+        if self._stopped is not None:
+            self._stopped.set()
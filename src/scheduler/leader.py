@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.config.settings import DatabaseConfig
+from src.monitoring.metrics import SCHEDULER_LEADER
+
+logger = logging.getLogger(__name__)
+
+# A session missing this many heartbeats is ended by the server, releasing
+# the lock of a leader that hung without dropping its connection
+IDLE_HEARTBEATS = 3
+
+
+def lock_key(name: str) -> int:
+    """Signed 64-bit advisory lock key for ``name``."""
+    digest = hashlib.blake2b(name.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class LeaderElector:
+    """Scheduler leadership as a session-level Postgres advisory lock.
+
+    The lock lives exactly as long as the elector's dedicated connection, so
+    a leader that exits, crashes or loses its connection releases it, and
+    a standby retrying every ``poll_seconds`` takes over on its next try.
+    The connection sets idle_session_timeout to IDLE_HEARTBEATS polls, so
+    the server also frees the lock of a leader that stops heartbeating.
+    """
+
+    def __init__(
+        self,
+        db_config: DatabaseConfig,
+        name: str,
+        worker_id: str,
+        poll_seconds: float,
+    ):
+        self.db_config = db_config
+        self.name = name
+        self.key = lock_key(name)
+        self.worker_id = worker_id
+        self.poll_seconds = poll_seconds
+        self.is_leader = False
+        self._engine: Optional[AsyncEngine] = None
+        self._conn: Optional[AsyncConnection] = None
+        # asyncpg runs one statement at a time per connection
+        self._lock = asyncio.Lock()
+
+    def _get_engine(self) -> AsyncEngine:
+        if self._engine is None:
+            idle_ms = int(self.poll_seconds * IDLE_HEARTBEATS * 1000)
+            self._engine = create_async_engine(
+                self.db_config.async_connection_string,
+                poolclass=NullPool,
+                connect_args={
+                    "timeout": self.poll_seconds,
+                    "server_settings": {
+                        "application_name": f"crypto-pipeline:{self.worker_id}",
+                        "idle_session_timeout": str(idle_ms),
+                    },
+                },
+            )
+        return self._engine
+
+    async def _connection(self) -> AsyncConnection:
+        if self._conn is None or self._conn.closed:
+            conn = await self._get_engine().connect()
+            # No transaction stays open between heartbeats
+            self._conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        return self._conn
+
+    async def _scalar(self, statement: str, **params) -> object:
+        async with self._lock:
+            try:
+                conn = await self._connection()
+                result = await asyncio.wait_for(
+                    conn.execute(text(statement), params), self.poll_seconds
+                )
+                return result.scalar()
+            except BaseException:
+                await self._disconnect()
+                raise
+
+    async def _disconnect(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception:
+                # The connection is gone either way, and the lock with it
+                pass
+
+    def _set_leader(self, leading: bool) -> bool:
+        if leading != self.is_leader:
+            logger.info(
+                f"Worker {self.worker_id} "
+                f"{'is now' if leading else 'is no longer'} the {self.name} leader"
+            )
+        self.is_leader = leading
+        SCHEDULER_LEADER.set(1 if leading else 0)
+        return leading
+
+    async def poll(self) -> bool:
+        """Try to take the lock as a standby, or confirm it as the leader.
+        Database errors count as not leading; never raises."""
+        try:
+            if self.is_leader:
+                # The lock holds for as long as the session that took it
+                await self._scalar("SELECT 1")
+                return self._set_leader(True)
+            acquired = await self._scalar(
+                "SELECT pg_try_advisory_lock(:key)", key=self.key
+            )
+            return self._set_leader(bool(acquired))
+        except Exception as e:
+            if self.is_leader:
+                logger.warning(f"Lost the {self.name} leader session: {e}")
+            else:
+                logger.debug(f"Leader election attempt failed: {e}")
+            return self._set_leader(False)
+
+    async def close(self) -> None:
+        """Release the lock, if held, and the connection."""
+        async with self._lock:
+            await self._disconnect()
+        self._set_leader(False)
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
@@ -0,0 +1,133 @@
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple, Union
+
+# Field bounds of a five-field cron expression, in order
+CRON_FIELDS: Tuple[Tuple[str, int, int], ...] = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day of month", 1, 31),
+    ("month", 1, 12),
+    ("day of week", 0, 7),
+)
+# Give up on expressions that never match, such as "0 0 30 2 *"
+CRON_SEARCH_YEARS = 5
+
+
+class IntervalTrigger:
+    """Fixed-rate deadlines ``seconds`` apart on the monotonic clock, so a
+    slow run or a late wake-up never pushes later runs back."""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("Schedule interval must be positive")
+        self.seconds = seconds
+
+    def next_deadline(self, after: float) -> float:
+        return after + self.seconds
+
+    def __str__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+def _parse_cron_field(text: str, name: str, low: int, high: int) -> frozenset:
+    values = set()
+    for part in text.split(","):
+        spec, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(v) for v in spec.split("-", 1))
+        else:
+            start = int(spec)
+            end = high if step_text else start
+        if step <= 0 or not (low <= start <= end <= high):
+            raise ValueError(f"Invalid cron {name} field: {text!r}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronTrigger:
+    """Deadlines at the local wall-clock minutes matching a five-field cron
+    expression (minute hour day-of-month month day-of-week, Sunday 0 or 7).
+
+    Matches are found on the wall clock and converted to monotonic
+    deadlines, so clock steps between two runs shift one wait rather than
+    the whole schedule. As in cron, a restricted day of month and day of
+    week match when either does.
+    """
+
+    def __init__(self, expression: str, wall_clock=time.time, clock=time.monotonic):
+        fields = expression.split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        try:
+            parsed = [
+                _parse_cron_field(text, name, low, high)
+                for text, (name, low, high) in zip(fields, CRON_FIELDS)
+            ]
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression {expression!r}: {e}") from e
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # cron counts Sunday as 0 (or 7), datetime.weekday() as 6
+        self.weekdays = frozenset((d - 1) % 7 for d in weekdays)
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+        self.expression = expression
+        self._wall_clock = wall_clock
+        self._clock = clock
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_month = moment.day in self.days
+        in_week = moment.weekday() in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_match(self, after: datetime) -> datetime:
+        """The first matching minute strictly after ``after``."""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * CRON_SEARCH_YEARS)
+        while moment < limit:
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(
+                    year=moment.year + year, month=month + 1, day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+    def next_deadline(self, after: float) -> float:
+        offset = self._wall_clock() - self._clock()
+        match = self.next_match(datetime.fromtimestamp(after + offset))
+        return match.timestamp() - offset
+
+    def __str__(self) -> str:
+        return f"cron {self.expression!r}"
+
+
+def build_trigger(
+    interval_seconds: float, cron: Optional[str] = None
+) -> Union[IntervalTrigger, CronTrigger]:
+    """A cron trigger when ``cron`` is set, else a fixed interval."""
+    if cron:
+        return CronTrigger(cron)
+    return IntervalTrigger(interval_seconds)
+
+
+def due_deadlines(trigger, deadline: float, now: float) -> Tuple[List[float], float]:
+    """Deadlines from ``deadline`` up to ``now`` and the first one after it."""
+    due = [deadline]
+    following = trigger.next_deadline(deadline)
+    while following <= now:
+        due.append(following)
+        following = trigger.next_deadline(following)
+    return due, following
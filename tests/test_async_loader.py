@@ -0,0 +1,112 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from config.settings import DatabaseConfig
+from loaders.async_warehouse_loader import AsyncWarehouseLoader
+from src.models.batch import PriceBatch
+
+
+def make_loader(**overrides):
+    loader = AsyncWarehouseLoader(DatabaseConfig(**overrides))
+    connection = AsyncMock()
+    payloads = []
+
+    async def copy_to_table(table, source, columns, **kwargs):
+        async for payload in source:
+            payloads.append(payload)
+
+    connection.copy_to_table.side_effect = copy_to_table
+    connection.payloads = payloads
+
+    @asynccontextmanager
+    async def driver_connection():
+        yield connection
+
+    loader._driver_connection = driver_connection
+    loader.update_health_summary = AsyncMock()
+    loader.coins.remember([("BTC", 1, "Bitcoin")])
+    return loader, connection
+
+
+def sample_batch(rows: int = 3) -> PriceBatch:
+    return PriceBatch.from_arrays(
+        rows,
+        {"symbol": "BTC", "name": "Bitcoin", "current_price": 50000.0},
+        datetime(2024, 1, 1),
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_bulk_insert_empty():
+    loader, connection = make_loader()
+    assert await loader.bulk_insert_crypto_prices([]) == 0
+    connection.copy_to_table.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_async_copy_streams_chunks():
+    loader, connection = make_loader(load_method="copy", copy_chunk_rows=2)
+
+    assert await loader.bulk_insert_crypto_prices(sample_batch(5)) == 5
+
+    call = connection.copy_to_table.call_args
+    assert call.args[0] == "crypto_price_facts"
+    assert call.kwargs["columns"][0] == "coin_id"
+    assert call.kwargs["null"] == "\\N"
+    assert len(connection.payloads) == 3
+    assert b"".join(connection.payloads).count(b"\n") == 5
+
+
+@pytest.mark.asyncio
+async def test_async_upsert_returns_rows_written():
+    loader, connection = make_loader(load_method="upsert")
+    connection.execute.side_effect = ["CREATE TABLE", "INSERT 0 2"]
+
+    assert await loader.bulk_insert_crypto_prices(sample_batch(3)) == 2
+
+    assert connection.copy_to_table.call_args.args[0] == "crypto_prices_stage"
+    merge_sql = connection.execute.call_args_list[1].args[0]
+    assert "ON CONFLICT (coin_id, extracted_at) DO NOTHING" in merge_sql
+
+
+@pytest.mark.asyncio
+async def test_async_insert_sends_python_scalars():
+    loader, _ = make_loader(load_method="insert", batch_size=2)
+    session = AsyncMock()
+
+    @asynccontextmanager
+    async def get_session():
+        yield session
+
+    loader.get_session = get_session
+
+    assert await loader.bulk_insert_crypto_prices(sample_batch(3)) == 3
+
+    assert session.execute.await_count == 2
+    record = session.execute.call_args_list[0].args[1][0]
+    assert type(record["coin_id"]) is int
+    assert record["market_cap"] is None
+    assert record["market_cap_rank"] is None
+
+
+def test_async_loader_refuses_a_second_event_loop_until_closed():
+    loader = AsyncWarehouseLoader(DatabaseConfig())
+
+    async def use():
+        loader._get_engine()
+
+    async def use_and_close():
+        loader._get_engine()
+        await loader.close()
+
+    asyncio.run(use_and_close())
+    asyncio.run(use_and_close())
+
+    asyncio.run(use())
+    # The first loop's pool would leak if it were silently replaced
+    with pytest.raises(RuntimeError, match="another event loop"):
+        asyncio.run(use())
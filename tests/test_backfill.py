@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+import pytest
+
+from config.settings import PipelineConfig
+from pipeline.backfill import (
+    BackfillEngine,
+    BackfillWindow,
+    chart_to_batch,
+    plan_windows,
+)
+
+
+def test_plan_windows_covers_range_without_overlap():
+    start = datetime(2024, 1, 1)
+    end = datetime(2024, 1, 10)
+    windows = plan_windows("bitcoin", start, end, timedelta(days=4))
+    assert [(w.start.day, w.end.day) for w in windows] == [(1, 5), (5, 9), (9, 10)]
+
+
+def test_chart_to_batch_keeps_window_half_open():
+    window = BackfillWindow("bitcoin", datetime(2024, 1, 1), datetime(2024, 1, 2))
+    start_ms = 1704067200000  # 2024-01-01T00:00:00Z
+    end_ms = 1704153600000  # 2024-01-02T00:00:00Z
+    chart = {
+        "prices": [[start_ms, 42000.0], [end_ms, 43000.0]],
+        "market_caps": [[start_ms, 8.2e11], [end_ms, 8.4e11]],
+        "total_volumes": [[start_ms, 1.5e10], [end_ms, 1.6e10]],
+    }
+    batch = chart_to_batch(chart, window, "btc", "Bitcoin")
+    assert len(batch) == 1
+    assert batch["symbol"][0] == "BTC"
+    assert batch["market_cap"][0] == 8.2e11
+    assert batch["extracted_at"][0] == np.datetime64("2024-01-01T00:00:00")
+
+
+@pytest.mark.asyncio
+async def test_backfill_skips_checkpointed_windows():
+    config = PipelineConfig(backfill_window_days=1)
+    start, end = datetime(2024, 1, 1), datetime(2024, 1, 3)
+
+    loader = Mock()
+    loader.get_completed_backfill_windows.return_value = {
+        (datetime(2024, 1, 1), datetime(2024, 1, 2))
+    }
+    extractor = AsyncMock()
+    extractor.fetch_coin_list.return_value = [
+        {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"}
+    ]
+    extractor.fetch_market_chart_range.return_value = {
+        "prices": [[1704182400000, 44000.0]]  # 2024-01-02T08:00:00Z
+    }
+
+    summary = await BackfillEngine(config, loader, extractor).run(
+        ["bitcoin"], start, end
+    )
+
+    extractor.fetch_market_chart_range.assert_awaited_once_with(
+        "bitcoin", datetime(2024, 1, 2), datetime(2024, 1, 3)
+    )
+    assert summary["windows_skipped"] == 1
+    assert summary["windows_loaded"] == 1
+    assert summary["records_loaded"] == 1
+    checkpoints = loader.mark_backfill_windows.call_args.args[0]
+    assert checkpoints[0]["status"] == "success"
@@ -0,0 +1,75 @@
+import json
+from datetime import datetime
+
+import numpy as np
+
+from src.models.batch import PriceBatch
+
+
+def test_price_batch_from_api_builds_columns():
+    extracted_at = datetime(2024, 1, 1, 12)
+    batch = PriceBatch.from_api(
+        [
+            {
+                "symbol": "btc",
+                "name": "Bitcoin",
+                "current_price": 42000.0,
+                "market_cap_rank": 1,
+                "price_change_percentage_1h_in_currency": 0.5,
+            },
+            {"symbol": "eth", "name": "Ethereum", "current_price": None},
+        ],
+        extracted_at,
+    )
+    assert len(batch) == 2
+    assert batch["symbol"].tolist() == ["BTC", "ETH"]
+    assert batch["price_change_percentage_1h"][0] == 0.5
+    assert np.isnan(batch["current_price"][1])
+    assert batch.extracted_at == extracted_at
+
+
+def test_price_batch_concat_and_take():
+    first = PriceBatch.from_api([{"symbol": "btc"}], datetime(2024, 1, 1))
+    second = PriceBatch.from_api([{"symbol": "eth"}], datetime(2024, 1, 2))
+    merged = PriceBatch.concat([first, second])
+    assert merged["symbol"].tolist() == ["BTC", "ETH"]
+    assert merged["extracted_at"][1] == np.datetime64("2024-01-02")
+
+    only_eth = merged.take(merged["symbol"] == "ETH")
+    assert len(only_eth) == 1
+    assert only_eth["extracted_at"][0] == np.datetime64("2024-01-02")
+
+
+def test_price_batch_to_fact_frame_uses_coin_ids_and_typed_timestamps():
+    batch = PriceBatch.from_api(
+        [
+            {
+                "symbol": "btc",
+                "market_cap_rank": 1,
+                "last_updated": "2024-01-01T00:00:00.000Z",
+            },
+            {"symbol": "eth", "last_updated": "not a timestamp"},
+        ],
+        datetime(2024, 1, 1),
+    )
+    frame = batch.to_fact_frame(np.array([1, 2], dtype=np.int16))
+    assert list(frame.columns[:2]) == ["coin_id", "current_price"]
+    assert {"symbol", "name", "created_at"}.isdisjoint(frame.columns)
+    assert frame["coin_id"].tolist() == [1, 2]
+    assert frame["market_cap_rank"].dtype.name == "Int64"
+    assert str(frame["last_updated"].dt.tz) == "UTC"
+    assert frame["last_updated"].isna().tolist() == [False, True]
+    assert batch.to_records()[0]["market_cap_rank"] == 1
+
+
+def test_price_batch_payload_round_trip():
+    extracted_at = np.array(["2024-01-01", "2024-01-02"], dtype="datetime64[us]")
+    batch = PriceBatch.from_arrays(
+        2,
+        {"symbol": ["BTC", "ETH"], "name": "Coin", "current_price": [1.0, np.nan]},
+        extracted_at,
+    )
+    restored = PriceBatch.from_payload(json.loads(json.dumps(batch.to_payload())))
+    assert restored["symbol"].tolist() == ["BTC", "ETH"]
+    assert np.isnan(restored["current_price"][1])
+    assert (restored["extracted_at"] == extracted_at).all()
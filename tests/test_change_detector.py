@@ -0,0 +1,47 @@
+from datetime import datetime
+
+import pytest
+
+from pipeline.change_detector import ChangeDetector, InMemorySnapshotIndex
+from src.models.batch import PriceBatch
+
+
+def make_batch(price, last_updated="2024-01-01T00:00:00.000Z"):
+    return PriceBatch.from_api(
+        [
+            {"symbol": "btc", "current_price": price, "last_updated": last_updated},
+            {"symbol": "eth", "current_price": 2500.0, "last_updated": last_updated},
+        ],
+        datetime.utcnow(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_change_detector_drops_unchanged_snapshots():
+    detector = ChangeDetector(InMemorySnapshotIndex())
+
+    first, dropped = await detector.filter(make_batch(42000.0))
+    assert (len(first), dropped) == (2, 0)
+    await detector.commit(first)
+
+    repeat, dropped = await detector.filter(make_batch(42000.0))
+    assert (len(repeat), dropped) == (0, 2)
+
+
+@pytest.mark.asyncio
+async def test_change_detector_keeps_changed_content():
+    detector = ChangeDetector(InMemorySnapshotIndex())
+    await detector.commit(make_batch(42000.0))
+
+    changed, dropped = await detector.filter(make_batch(42100.0))
+    assert changed["symbol"].tolist() == ["BTC"]
+    assert dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_change_detector_only_remembers_committed_rows():
+    detector = ChangeDetector(InMemorySnapshotIndex())
+    await detector.filter(make_batch(42000.0))
+
+    retry, dropped = await detector.filter(make_batch(42000.0))
+    assert (len(retry), dropped) == (2, 0)
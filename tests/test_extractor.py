@@ -1,3 +1,5 @@
+import asyncio
+from datetime import datetime
 from unittest.mock import AsyncMock, patch
 
 import pytest
@@ -12,13 +14,17 @@ async def test_extractor_fetches_data():
     with patch("aiohttp.ClientSession.get") as mock_get:
         mock_response = AsyncMock()
         mock_response.json.return_value = [{"symbol": "BTC", "price": 10000}]
+        mock_response.read.return_value = b'[{"symbol": "BTC", "price": 10000}]'
         mock_response.status = 200
+        mock_response.headers = {}
         mock_get.return_value.__aenter__.return_value = mock_response
 
         async with CryptoDataExtractor(config) as extractor:
             data = await extractor.fetch_crypto_prices()
-            assert isinstance(data, list)
-            assert "symbol" in data[0]
+            assert len(data) == 1
+            assert data["symbol"][0] == "BTC"
+            assert extractor.request_attempts == 1
+            assert extractor.bytes_fetched == 35
 
 
 @pytest.mark.asyncio
@@ -28,11 +34,11 @@ async def test_extractor_handles_empty_response():
         mock_response = AsyncMock()
         mock_response.json.return_value = []
         mock_response.status = 200
+        mock_response.headers = {}
         mock_get.return_value.__aenter__.return_value = mock_response
 
         async with CryptoDataExtractor(config) as extractor:
             data = await extractor.fetch_crypto_prices()
-            assert isinstance(data, list)
             assert len(data) == 0
 
 
@@ -43,8 +49,77 @@ async def test_extractor_handles_api_error():
         mock_response = AsyncMock()
         mock_response.text.return_value = "API Error"
         mock_response.status = 500
+        mock_response.headers = {}
         mock_get.return_value.__aenter__.return_value = mock_response
 
         async with CryptoDataExtractor(config) as extractor:
             with pytest.raises(Exception):
                 await extractor.fetch_crypto_prices()
+
+
+def test_extractor_splits_ids_into_pages(monkeypatch):
+    monkeypatch.delenv("CRYPTOCURRENCIES", raising=False)
+    config = PipelineConfig(
+        cryptocurrencies=["bitcoin", "ethereum", "cardano"], page_size=2
+    )
+    extractor = CryptoDataExtractor(config)
+    pages = extractor._build_page_params()
+    assert [p["ids"] for p in pages] == ["bitcoin,ethereum", "cardano"]
+    assert [p["per_page"] for p in pages] == [2, 1]
+
+
+def test_extractor_builds_top_n_pages():
+    config = PipelineConfig(top_n_coins=1000, page_size=250)
+    extractor = CryptoDataExtractor(config)
+    pages = extractor._build_page_params()
+    assert [p["page"] for p in pages] == [1, 2, 3, 4]
+    assert all("ids" not in p for p in pages)
+
+
+@pytest.mark.asyncio
+async def test_extractor_merges_pages_with_single_timestamp():
+    config = PipelineConfig(top_n_coins=3, page_size=2)
+    pages = [
+        [{"id": "bitcoin", "symbol": "btc"}, {"id": "ethereum", "symbol": "eth"}],
+        [{"id": "ethereum", "symbol": "eth"}, {"id": "tether", "symbol": "usdt"}],
+    ]
+    async with CryptoDataExtractor(config) as extractor:
+        with patch.object(
+            extractor, "_fetch_markets_page", AsyncMock(side_effect=pages)
+        ):
+            data = await extractor.fetch_crypto_prices()
+
+    assert data["symbol"].tolist() == ["BTC", "ETH", "USDT"]
+    assert isinstance(data.extracted_at, datetime)
+
+
+@pytest.mark.asyncio
+async def test_extractor_streams_pages_as_batches():
+    config = PipelineConfig(top_n_coins=3, page_size=2, max_concurrent_requests=1)
+    pages = [
+        [{"id": "bitcoin", "symbol": "btc"}, {"id": "ethereum", "symbol": "eth"}],
+        [{"id": "tether", "symbol": "usdt"}, {"id": "bnb", "symbol": "bnb"}],
+    ]
+    async with CryptoDataExtractor(config) as extractor:
+        with patch.object(
+            extractor, "_fetch_markets_page", AsyncMock(side_effect=pages)
+        ):
+            batches = [b async for b in extractor.stream_crypto_prices()]
+
+    # The last page is trimmed to TOP_N_COINS; every page shares a snapshot time
+    assert [b["symbol"].tolist() for b in batches] == [["BTC", "ETH"], ["USDT"]]
+    assert batches[0].extracted_at == batches[1].extracted_at
+
+
+@pytest.mark.asyncio
+async def test_extractor_stream_waits_for_consumer():
+    config = PipelineConfig(top_n_coins=10, page_size=2, max_concurrent_requests=2)
+    fetch = AsyncMock(return_value=[{"id": "bitcoin", "symbol": "btc"}])
+    async with CryptoDataExtractor(config) as extractor:
+        with patch.object(extractor, "_fetch_markets_page", fetch):
+            stream = extractor.stream_crypto_prices()
+            await stream.__anext__()
+            await asyncio.sleep(0)
+            # No new page is requested until the consumer asks for one
+            assert fetch.await_count == 2
+            await stream.aclose()
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from unittest.mock import MagicMock, Mock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
@@ -8,59 +8,92 @@ from monitoring.health_monitor import PipelineHealthMonitor
 
 @pytest.fixture
 def mock_loader():
-    loader = MagicMock()
-    session = MagicMock()
-    loader.get_session.return_value.__enter__.return_value = session
-    return loader, session
+    return MagicMock()
+
+
+def summary(latest_extraction, run_counts, **overrides):
+    fields = {
+        "latest_extraction": latest_extraction,
+        "symbols_last_24h": 2,
+        "records_last_24h": 1000,
+        "records_last_hour": 50,
+        "valid_prices_last_hour": 50,
+        "price_sum_last_hour": 2250000.0,
+        "run_counts": run_counts,
+        "last_stages": [],
+    }
+    fields.update(overrides)
+    return fields
 
 
 def test_health_monitor_healthy(mock_loader):
-    loader, session = mock_loader
-    session.execute.return_value.fetchall.return_value = [
-        Mock(stage="extract", status="success", count=5),
-        Mock(stage="load", status="success", count=5),
-    ]
     latest_time = datetime.utcnow() - timedelta(minutes=30)
-    session.execute.return_value.fetchone.side_effect = [
-        Mock(latest_extraction=latest_time, total_records=1000),
-        Mock(total_records=50, valid_prices=50, avg_price=45000.0),
-    ]
-    monitor = PipelineHealthMonitor(loader)
+    mock_loader.read_health_summary.return_value = summary(
+        latest_time, {"extract.success": 5, "load.success": 5}
+    )
+    monitor = PipelineHealthMonitor(mock_loader)
     health = monitor.check_pipeline_health()
     assert health["status"] == "healthy"
+    assert health["pipeline_runs"] == [
+        {"stage": "extract", "status": "success", "count": 5},
+        {"stage": "load", "status": "success", "count": 5},
+    ]
+    assert health["data_quality"]["average_price"] == 45000.0
+    # One read of the summary, whatever the ingest rate
+    mock_loader.read_health_summary.assert_called_once_with()
 
 
 def test_health_monitor_unhealthy_stale_data(mock_loader):
-    loader, session = mock_loader
-    session.execute.return_value.fetchall.return_value = [
-        Mock(stage="extract", status="success", count=5)
-    ]
     latest_time = datetime.utcnow() - timedelta(hours=3)
-    session.execute.return_value.fetchone.side_effect = [
-        Mock(latest_extraction=latest_time, total_records=0),
-        Mock(total_records=0, valid_prices=0, avg_price=0.0),
-    ]
-    monitor = PipelineHealthMonitor(loader)
+    mock_loader.read_health_summary.return_value = summary(
+        latest_time,
+        {"extract.success": 5},
+        records_last_24h=0,
+        records_last_hour=0,
+        valid_prices_last_hour=0,
+        price_sum_last_hour=None,
+    )
+    monitor = PipelineHealthMonitor(mock_loader)
     health = monitor.check_pipeline_health()
     assert health["status"] == "unhealthy"
+    assert health["data_quality"]["average_price"] == 0
 
 
 def test_health_monitor_no_pipeline_runs(mock_loader):
-    loader, session = mock_loader
-    session.execute.return_value.fetchall.return_value = []
     latest_time = datetime.utcnow() - timedelta(minutes=30)
-    session.execute.return_value.fetchone.side_effect = [
-        Mock(latest_extraction=latest_time, total_records=1000),
-        Mock(total_records=50, valid_prices=50, avg_price=45000.0),
-    ]
-    monitor = PipelineHealthMonitor(loader)
+    mock_loader.read_health_summary.return_value = summary(latest_time, {})
+    monitor = PipelineHealthMonitor(mock_loader)
     health = monitor.check_pipeline_health()
     assert health["status"] == "warning"
 
 
 def test_health_monitor_database_error(mock_loader):
-    loader, session = mock_loader
-    session.execute.side_effect = Exception("Database connection failed")
-    monitor = PipelineHealthMonitor(loader)
+    mock_loader.read_health_summary.side_effect = Exception(
+        "Database connection failed"
+    )
+    monitor = PipelineHealthMonitor(mock_loader)
     health = monitor.check_pipeline_health()
     assert health["status"] == "error"
+
+
+@pytest.mark.asyncio
+async def test_async_check_awaits_async_loaders():
+    loader = MagicMock()
+    loader.read_health_summary = AsyncMock(
+        return_value=summary(datetime.utcnow(), {"load.success": 1})
+    )
+    health = await PipelineHealthMonitor(loader).check_pipeline_health_async()
+    assert health["status"] == "healthy"
+
+
+@pytest.mark.asyncio
+async def test_health_monitor_without_a_warehouse_summary_stays_ready():
+    # A lake-only sink has no read_health_summary
+    monitor = PipelineHealthMonitor(object())
+
+    for health in (
+        monitor.check_pipeline_health(),
+        await monitor.check_pipeline_health_async(),
+    ):
+        assert health["status"] == "warning"
+        assert "No warehouse health summary" in health["issues"][0]
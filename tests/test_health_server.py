@@ -0,0 +1,107 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from monitoring.health_server import HealthServer
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def serve(server: HealthServer) -> TestClient:
+    client = TestClient(TestServer(server.build_app()))
+    await client.start_server()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_probes_answer_from_the_snapshot_without_checking_again():
+    check = AsyncMock(return_value={"status": "healthy", "pipeline_runs": []})
+    server = HealthServer(check, 0, refresh_seconds=60)
+    await server.refresh()
+    client = await serve(server)
+    try:
+        for _ in range(20):
+            assert (await client.get("/readyz")).status == 200
+        response = await client.get("/status")
+        assert (await response.json())["status"] == "healthy"
+        assert check.await_count == 1
+    finally:
+        await client.close()
+
+
+@pytest.mark.parametrize(
+    "snapshot, ready",
+    [({"status": "warning"}, 200), ({"status": "unhealthy"}, 503)],
+)
+@pytest.mark.asyncio
+async def test_readiness_follows_the_snapshot_status(snapshot, ready):
+    server = HealthServer(AsyncMock(return_value=snapshot), 0, refresh_seconds=60)
+    await server.refresh()
+    client = await serve(server)
+    try:
+        assert (await client.get("/readyz")).status == ready
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_or_slow_checks_become_error_snapshots():
+    async def hang():
+        await asyncio.sleep(1)
+
+    server = HealthServer(Mock(side_effect=hang), 0, refresh_seconds=0.01)
+    await server.refresh()
+    client = await serve(server)
+    try:
+        assert (await client.get("/readyz")).status == 503
+        body = await (await client.get("/status")).json()
+        assert body["status"] == "error" and body["error"] == "TimeoutError"
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshots_are_not_ready():
+    clock = Clock()
+    check = AsyncMock(return_value={"status": "healthy"})
+    server = HealthServer(check, 0, refresh_seconds=10, clock=clock)
+    await server.refresh()
+    client = await serve(server)
+    try:
+        assert (await client.get("/readyz")).status == 200
+        clock.now = server.stale_after + 1
+        response = await client.get("/readyz")
+        assert response.status == 503
+        assert (await response.json())["status"] == "stale"
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_server_refreshes_in_the_background_until_stopped():
+    check = AsyncMock(return_value={"status": "healthy"})
+    server = HealthServer(check, 0, refresh_seconds=0.02, host="127.0.0.1")
+    await server.start()
+    try:
+        await asyncio.sleep(0.1)
+        client = await serve(server)
+        try:
+            assert (await client.get("/healthz")).status == 200
+            metrics = await client.get("/metrics")
+            assert "# TYPE" in await metrics.text()
+        finally:
+            await client.close()
+    finally:
+        await server.stop()
+    refreshed = check.await_count
+    assert refreshed >= 3
+    await asyncio.sleep(0.05)
+    assert check.await_count == refreshed
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy.dialects import postgresql
+
+from loaders.health_summary import (
+    BUCKET_RETENTION,
+    bucket_start,
+    prune_buckets,
+    read_health,
+    summarize_prices,
+    summarize_run_events,
+)
+from loaders.warehouse_loader import pipeline_run_event
+from src.models.batch import PriceBatch
+
+NOW = datetime(2024, 1, 2, 12, 7, 30)
+
+
+def test_bucket_start_floors_to_five_minutes():
+    assert bucket_start(NOW) == datetime(2024, 1, 2, 12, 5)
+    assert bucket_start(datetime(2024, 1, 2, 12, 5)) == datetime(2024, 1, 2, 12, 5)
+
+
+def test_summarize_prices_binds_the_batch_and_health_window():
+    batch = PriceBatch.from_arrays(
+        2,
+        {"symbol": ["BTC", "ETH"], "name": "Coin", "current_price": [1, 2]},
+        np.array(["2024-01-02T12:00", "2024-01-02T12:01"], dtype="datetime64[us]"),
+    )
+    stmt = summarize_prices(batch, np.array([1, 2], dtype=np.int16), now=NOW)
+    params = stmt.compile().params
+
+    assert params["coin_ids"] == [1, 2]
+    assert (params["first_at"], params["last_at"]) == (
+        datetime(2024, 1, 2, 12),
+        datetime(2024, 1, 2, 12, 1),
+    )
+    assert params["since"] == datetime(2024, 1, 1, 12, 5)
+
+
+def test_summarize_run_events_counts_outcomes_and_keeps_latest_stage():
+    started = datetime(2024, 1, 2, 12, 1)
+    events = [
+        pipeline_run_event("run-1", "extract", "running", 10, started_at=started),
+        pipeline_run_event("run-1", "extract", "success", 20, started_at=started),
+        pipeline_run_event("run-1", "load", "failed", 0, "boom", started_at=started),
+    ]
+    buckets, stages = summarize_run_events(events)
+
+    compiled = buckets.compile(dialect=postgresql.dialect())
+    rows = compiled.params
+    counted = {rows[f"series_m{i}"]: rows[f"event_count_m{i}"] for i in range(2)}
+    assert counted == {"extract.success": 1, "load.failed": 1}
+    assert "ON CONFLICT (bucket_start, series)" in str(compiled)
+
+    rows = stages.compile(dialect=postgresql.dialect()).params
+    assert rows["status_m0"] == "success" and rows["records_processed_m0"] == 20
+    assert rows["status_m1"] == "failed" and rows["error_message_m1"] == "boom"
+
+
+def test_progress_only_flush_updates_stages_without_counting():
+    events = [pipeline_run_event("run-1", "extract", "running", 10)]
+    (stages,) = summarize_run_events(events)
+    assert stages.table.name == "pipeline_health_stages"
+
+
+def test_read_and_prune_bounds():
+    params = read_health(NOW).compile().params
+    assert params["since"] == datetime(2024, 1, 1, 12, 5)
+    assert params["hour_since"] == datetime(2024, 1, 2, 11, 5)
+    assert prune_buckets(NOW).compile().params["before"] == NOW - BUCKET_RETENTION
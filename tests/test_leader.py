@@ -0,0 +1,108 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from config.settings import PipelineConfig
+from scheduler.job_scheduler import PipelineScheduler
+from scheduler.leader import lock_key
+
+
+class FakeElector:
+    """One advisory lock shared by the electors of a test, in memory."""
+
+    holder = None
+
+    def __init__(self, worker_id: str, poll_seconds: float = 0.02):
+        self.worker_id = worker_id
+        self.poll_seconds = poll_seconds
+        self.is_leader = False
+        self.closed = False
+
+    async def poll(self) -> bool:
+        if FakeElector.holder in (None, self.worker_id):
+            FakeElector.holder = self.worker_id
+        self.is_leader = FakeElector.holder == self.worker_id
+        return self.is_leader
+
+    def crash(self) -> None:
+        # The server drops the session, and the lock with it
+        FakeElector.holder = None
+        self.is_leader = False
+        self.poll = AsyncMock(return_value=False)
+
+    async def close(self) -> None:
+        self.closed = True
+        if FakeElector.holder == self.worker_id:
+            FakeElector.holder = None
+
+
+def replica(worker_id: str):
+    orchestrator = Mock(shards=None)
+    orchestrator.run_extraction_pipeline = AsyncMock(return_value={"status": "ok"})
+    orchestrator.maintain_partitions = AsyncMock(return_value={})
+    orchestrator.open = AsyncMock()
+    orchestrator.close = AsyncMock()
+    config = PipelineConfig(schedule_interval_seconds=1, worker_id=worker_id)
+    scheduler = PipelineScheduler(orchestrator, config, elector=FakeElector(worker_id))
+    scheduler.schedule_pipeline()
+    return scheduler, orchestrator
+
+
+def test_lock_key_is_a_stable_signed_bigint():
+    assert lock_key("crypto-pipeline-scheduler") == lock_key(
+        "crypto-pipeline-scheduler"
+    )
+    assert lock_key("a") != lock_key("b")
+    assert -(2**63) <= lock_key("a") < 2**63
+
+
+def test_leader_election_is_built_from_config():
+    config = PipelineConfig(leader_election=True, worker_id="w1")
+    scheduler = PipelineScheduler(Mock(shards=None), config)
+    assert type(scheduler.elector).__name__ == "LeaderElector"
+    assert scheduler.elector.key == lock_key("crypto-pipeline-scheduler")
+
+    with pytest.raises(ValueError, match="LEADER_ELECTION"):
+        PipelineConfig(leader_election=True, sharding_enabled=True)
+
+
+@pytest.mark.asyncio
+async def test_only_the_leader_fires_and_a_standby_takes_over():
+    FakeElector.holder = None
+    leader, leader_jobs = replica("a")
+    standby, standby_jobs = replica("b")
+
+    running = [asyncio.create_task(leader.start())]
+    await asyncio.sleep(0.05)
+    running.append(asyncio.create_task(standby.start()))
+    await asyncio.sleep(0.1)
+
+    leader_jobs.run_extraction_pipeline.assert_awaited_once()
+    standby_jobs.run_extraction_pipeline.assert_not_awaited()
+    # The standby is warm: sessions open, waiting on the lock
+    standby_jobs.open.assert_awaited_once()
+
+    leader.elector.crash()
+    await asyncio.sleep(0.1)
+    assert standby.elector.is_leader
+    standby_jobs.maintain_partitions.assert_awaited_once()
+    standby_jobs.run_extraction_pipeline.assert_awaited_once()
+    assert not leader._leading
+
+    for scheduler in (leader, standby):
+        scheduler.stop()
+    await asyncio.gather(*running)
+    assert standby.elector.closed and FakeElector.holder is None
+    leader_jobs.run_extraction_pipeline.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_skipped_once_leadership_is_lost():
+    FakeElector.holder = "someone-else"
+    scheduler, orchestrator = replica("a")
+    job = scheduler.tasks[0].func
+
+    await job()
+
+    orchestrator.run_extraction_pipeline.assert_not_awaited()
@@ -1,9 +1,11 @@
+from datetime import datetime
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 
 from config.settings import DatabaseConfig
 from loaders.warehouse_loader import WarehouseLoader
+from src.models.batch import PriceBatch
 
 
 def test_warehouse_loader_initialization():
@@ -32,8 +34,10 @@ def test_warehouse_loader_bulk_insert_crypto_prices_empty():
 
 
 def test_warehouse_loader_bulk_insert_crypto_prices_success():
-    db_config = DatabaseConfig()
+    db_config = DatabaseConfig(load_method="insert")
     loader = WarehouseLoader(db_config)
+    loader.coins.remember([("BTC", 1, "")])
+    loader.update_health_summary = Mock()
     with patch("pandas.DataFrame") as mock_df:
         mock_df_instance = Mock()
         mock_df.return_value = mock_df_instance
@@ -43,8 +47,9 @@ def test_warehouse_loader_bulk_insert_crypto_prices_success():
 
 
 def test_warehouse_loader_bulk_insert_crypto_prices_error():
-    db_config = DatabaseConfig()
+    db_config = DatabaseConfig(load_method="insert")
     loader = WarehouseLoader(db_config)
+    loader.coins.remember([("BTC", 1, "")])
     with patch("pandas.DataFrame.to_sql", side_effect=Exception("Database error")):
         with pytest.raises(Exception, match="Database error"):
             loader.bulk_insert_crypto_prices(
@@ -64,4 +69,99 @@ def test_warehouse_loader_log_pipeline_run():
             mock_stmt
         )
         loader.log_pipeline_run("test_run", "extract", "success", 100)
-        mock_session.execute.assert_called_once()
+        # The event, then the health summary's bucket, stage and pruning
+        assert mock_session.execute.call_count == 4
+        (stmt, events), _ = mock_session.execute.call_args_list[0]
+        assert stmt.table.name == "pipeline_run_events"
+        assert events[0]["run_id"] == "test_run"
+
+
+def test_warehouse_loader_mark_backfill_windows():
+    db_config = DatabaseConfig()
+    loader = WarehouseLoader(db_config)
+    mock_session = MagicMock()
+    loader.get_session = MagicMock()
+    loader.get_session.return_value.__enter__.return_value = mock_session
+    loader.mark_backfill_windows(
+        [
+            {
+                "coin_id": "bitcoin",
+                "window_start": datetime(2024, 1, 1),
+                "window_end": datetime(2024, 1, 2),
+                "status": "success",
+                "records_loaded": 24,
+            }
+        ]
+    )
+    mock_session.execute.assert_called_once()
+
+
+def test_warehouse_loader_copy_crypto_prices():
+    db_config = DatabaseConfig(load_method="copy")
+    loader = WarehouseLoader(db_config)
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    copied = {}
+    cursor.copy_expert.side_effect = lambda sql, buf: copied.update(
+        sql=sql, payload=buf.read()
+    )
+    loader.engine = Mock(raw_connection=Mock(return_value=connection))
+    loader.coins.remember([("BTC", 7, "")])
+    loader.update_health_summary = Mock()
+
+    result = loader.bulk_insert_crypto_prices(
+        [{"symbol": "BTC", "name": "", "current_price": 50000.0}]
+    )
+
+    assert result == 1
+    assert copied["sql"].startswith("COPY crypto_price_facts (coin_id, current_price,")
+    assert copied["payload"].startswith("7,50000.0,\\N,")
+    connection.commit.assert_called_once()
+
+
+def test_warehouse_loader_upsert_crypto_prices():
+    db_config = DatabaseConfig(load_method="upsert", upsert_action="nothing")
+    loader = WarehouseLoader(db_config)
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.rowcount = 0
+    loader.engine = Mock(raw_connection=Mock(return_value=connection))
+    loader.coins.remember([("BTC", 1, "Bitcoin")])
+
+    result = loader.bulk_insert_crypto_prices(
+        [{"symbol": "BTC", "name": "Bitcoin", "current_price": 50000.0}]
+    )
+
+    assert result == 0
+    merge_sql = cursor.execute.call_args_list[-1].args[0]
+    assert "DISTINCT ON (coin_id, extracted_at)" in merge_sql
+    assert "ON CONFLICT (coin_id, extracted_at) DO NOTHING" in merge_sql
+    cursor.copy_expert.assert_called_once()
+    connection.commit.assert_called_once()
+
+
+def test_warehouse_loader_registers_only_new_or_renamed_coins():
+    loader = WarehouseLoader(DatabaseConfig())
+    connection = MagicMock()
+    connection.execute.side_effect = [
+        [("ETH", 2, "Ethereum")],
+        [("ETH", 2, "Ether"), ("SOL", 3, "Solana")],
+    ]
+    loader.engine = MagicMock()
+    loader.engine.begin.return_value.__enter__.return_value = connection
+    loader.coins.remember([("BTC", 1, "Bitcoin")])
+    batch = PriceBatch.from_api(
+        [
+            {"symbol": "btc", "name": "Bitcoin"},
+            {"symbol": "eth", "name": "Ether"},
+            {"symbol": "sol", "name": "Solana"},
+        ],
+        datetime(2024, 1, 1),
+    )
+
+    assert loader._coin_ids(batch).tolist() == [1, 2, 3]
+
+    lookup, upsert = [call.args[0] for call in connection.execute.call_args_list]
+    assert set(lookup.compile().params["symbol_1"]) == {"ETH", "SOL"}
+    assert sorted(upsert.compile().params.values()) == ["ETH", "Ether", "SOL", "Solana"]
+    assert loader.coins.stale(batch) == {}
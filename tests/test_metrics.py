@@ -0,0 +1,56 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from extractors.crypto_extractor import _endpoint
+from pipeline.run_ledger import RunLedger
+from scheduler.job_scheduler import ScheduledTask
+from scheduler.triggers import IntervalTrigger
+from src.monitoring.metrics import start_metrics_server
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_endpoint_label_folds_coin_ids():
+    assert _endpoint("/coins/markets") == "/coins/markets"
+    assert _endpoint("/coins/bitcoin/market_chart") == "/coins/{id}/market_chart"
+    assert _endpoint("/ping") == "/ping"
+
+
+def test_run_ledger_observes_stage_duration_and_throughput():
+    count = "crypto_pipeline_stage_seconds_count"
+    before = sample(count, stage="transform", status="success")
+    failed = sample(count, stage="transform", status="failed")
+
+    ledger = RunLedger("run-metrics")
+    ledger.start("transform")
+    ledger.finish("transform", 100)
+    ledger.start("transform")
+    ledger.fail("bad data", stage="transform")
+
+    assert sample(count, stage="transform", status="success") == before + 1
+    assert sample(count, stage="transform", status="failed") == failed + 1
+    assert sample("crypto_pipeline_rows_per_second_count", stage="transform") >= 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_records_lag_behind_due_time():
+    now = [1000.0]
+    task = ScheduledTask(
+        "lagging", AsyncMock(), IntervalTrigger(60), clock=lambda: now[0]
+    )
+
+    task._dispatch([970.0])
+    await task._runner
+    assert sample("crypto_pipeline_schedule_lag_seconds", task="lagging") == 30.0
+
+    task._dispatch([1060.0])
+    await task._runner
+    assert sample("crypto_pipeline_schedule_lag_seconds", task="lagging") == 0.0
+
+
+def test_metrics_server_disabled_on_port_zero():
+    assert start_metrics_server(0) is None
@@ -1,9 +1,13 @@
+import asyncio
+import time
+from datetime import datetime
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
 from config.settings import DatabaseConfig, PipelineConfig
 from pipeline.orchestrator import CryptoPipelineOrchestrator
+from src.models.batch import PriceBatch
 
 
 @pytest.mark.asyncio
@@ -76,3 +80,217 @@ async def test_orchestrator_handles_loading_error():
             orchestrator.loader = mock_loader_instance
             result = await orchestrator.run_extraction_pipeline()
             assert result["status"] == "failed"
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_reuses_injected_extractor():
+    extractor = AsyncMock()
+    extractor.fetch_crypto_prices.return_value = [{"symbol": "BTC", "price": 10000}]
+
+    with patch("pipeline.orchestrator.CryptoDataExtractor") as mock_extractor:
+        orchestrator = CryptoPipelineOrchestrator(
+            PipelineConfig(), DatabaseConfig(), extractor=extractor
+        )
+        orchestrator.loader = Mock()
+        orchestrator.loader.bulk_insert_crypto_prices.return_value = 1
+
+        for _ in range(2):
+            result = await orchestrator.run_extraction_pipeline()
+            assert result["status"] == "success"
+
+        mock_extractor.assert_not_called()
+        assert extractor.open.await_count == 2
+        extractor.close.assert_not_awaited()
+
+        await orchestrator.close()
+        extractor.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_buffers_through_database_outage(tmp_path):
+    extractor = AsyncMock()
+    extractor.fetch_crypto_prices.return_value = [{"symbol": "BTC", "price": 10000}]
+    config = PipelineConfig(
+        write_behind_enabled=True, spool_dir=str(tmp_path), dedup_enabled=False
+    )
+
+    orchestrator = CryptoPipelineOrchestrator(
+        config, DatabaseConfig(loader_backend="sync"), extractor=extractor
+    )
+    orchestrator.loader = Mock()
+    orchestrator.loader.record_pipeline_events.side_effect = Exception("database down")
+    orchestrator.write_behind.loader = orchestrator.loader
+
+    result = await orchestrator.run_extraction_pipeline()
+
+    assert result["status"] == "success"
+    assert result["records_buffered"] == 1
+    orchestrator.loader.bulk_insert_crypto_prices.assert_not_called()
+    assert len(list(tmp_path.glob("segment-*.jsonl"))) == 1
+    await orchestrator.close()
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_records_run_in_one_ledger_write():
+    extractor = AsyncMock()
+    extractor.request_attempts = 0
+    extractor.bytes_fetched = 0
+
+    async def fetch(shard=None, plan=None):
+        extractor.request_attempts += 2
+        extractor.bytes_fetched += 512
+        return [{"symbol": "BTC", "price": 10000}]
+
+    extractor.fetch_crypto_prices.side_effect = fetch
+    orchestrator = CryptoPipelineOrchestrator(
+        PipelineConfig(dedup_enabled=False),
+        DatabaseConfig(loader_backend="sync"),
+        extractor=extractor,
+    )
+    orchestrator.loader = Mock()
+    orchestrator.loader.bulk_insert_crypto_prices.return_value = 1
+
+    result = await orchestrator.run_extraction_pipeline()
+
+    assert result["status"] == "success"
+    orchestrator.loader.log_pipeline_run.assert_not_called()
+    orchestrator.loader.record_pipeline_events.assert_called_once()
+    extract, load = orchestrator.loader.record_pipeline_events.call_args.args[0]
+    assert (extract["stage"], extract["status"]) == ("extract", "success")
+    assert (extract["attempts"], extract["bytes_fetched"]) == (2, 512)
+    assert (load["stage"], load["records_processed"]) == ("load", 1)
+    assert load["duration_seconds"] >= 0
+
+
+class PagedExtractor:
+    """Fake extractor streaming ``pages`` one-row pages, ``delay`` apart."""
+
+    def __init__(self, pages: int, delay: float = 0.0):
+        self.pages = pages
+        self.delay = delay
+        self.fetched = 0
+        self.request_attempts = 0
+        self.bytes_fetched = 0
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def stream_crypto_prices(self, shard=None, plan=None):
+        for page in range(self.pages):
+            await asyncio.sleep(self.delay)
+            self.fetched += 1
+            self.request_attempts += 1
+            self.bytes_fetched += 100
+            yield PriceBatch.from_api(
+                [{"symbol": f"c{page}", "current_price": 1.0}], datetime(2024, 1, 1)
+            )
+
+
+class SlowLoader(Mock):
+    def __init__(self, delay: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def bulk_insert_crypto_prices(self, batch, run_id=None):
+        await self.release.wait()
+        await asyncio.sleep(self.delay)
+        return len(batch)
+
+
+def streaming_orchestrator(extractor, loader, **config):
+    orchestrator = CryptoPipelineOrchestrator(
+        PipelineConfig(streaming_enabled=True, dedup_enabled=False, **config),
+        DatabaseConfig(loader_backend="sync"),
+        extractor=extractor,
+    )
+    orchestrator.loader = loader
+    return orchestrator
+
+
+@pytest.mark.asyncio
+async def test_streaming_run_overlaps_extract_and_load():
+    extractor = PagedExtractor(pages=8, delay=0.05)
+    loader = SlowLoader(delay=0.05)
+    orchestrator = streaming_orchestrator(extractor, loader, stream_load_workers=1)
+
+    started = time.monotonic()
+    result = await orchestrator.run_extraction_pipeline()
+    elapsed = time.monotonic() - started
+
+    assert result["status"] == "success"
+    assert (result["records_extracted"], result["records_processed"]) == (8, 8)
+    # Sequential would take 8 x 0.05 for each stage; streaming ~ one stage
+    assert elapsed < 0.65
+
+    # Shorter than PROGRESS_FLUSH_SECONDS: one write with the final events
+    loader.record_pipeline_events.assert_called_once()
+    events = loader.record_pipeline_events.call_args.args[0]
+    final = {e["stage"]: e for e in events}
+    assert [e["status"] for e in events] == ["success", "success"]
+    assert final["extract"]["attempts"] == 8
+    assert final["extract"]["bytes_fetched"] == 800
+    assert final["load"]["records_processed"] == 8
+
+
+@pytest.mark.asyncio
+async def test_streaming_run_writes_progress_while_running():
+    extractor = PagedExtractor(pages=8, delay=0.05)
+    loader = SlowLoader(delay=0.05)
+    orchestrator = streaming_orchestrator(
+        extractor, loader, stream_load_workers=1, progress_flush_seconds=0.12
+    )
+
+    result = await orchestrator.run_extraction_pipeline()
+
+    assert result["status"] == "success"
+    writes = [c.args[0] for c in loader.record_pipeline_events.call_args_list]
+    assert len(writes) >= 3
+    # Each progress write holds one snapshot per running stage
+    first = writes[0]
+    assert {e["stage"] for e in first} == {"extract", "load"}
+    assert {e["status"] for e in first} == {"running"}
+    assert 0 < first[0]["records_processed"] < 8
+    # Every event is written exactly once, the final outcomes last
+    assert [(e["stage"], e["status"]) for e in writes[-1]][-1] == ("load", "success")
+    events = [e for write in writes for e in write]
+    assert [e["status"] for e in events].count("success") == 2
+
+
+@pytest.mark.asyncio
+async def test_streaming_run_throttles_extraction_on_slow_loads():
+    extractor = PagedExtractor(pages=20)
+    loader = SlowLoader()
+    loader.release.clear()
+    orchestrator = streaming_orchestrator(
+        extractor, loader, stream_queue_size=3, stream_load_workers=2
+    )
+
+    run = asyncio.create_task(orchestrator.run_extraction_pipeline())
+    await asyncio.sleep(0.05)
+    # Two pages held by the workers, three queued, one waiting to be queued
+    assert extractor.fetched == 6
+
+    loader.release.set()
+    result = await run
+    assert result["records_processed"] == 20
+
+
+@pytest.mark.asyncio
+async def test_streaming_run_fails_both_stages_on_load_error():
+    loader = SlowLoader()
+    loader.bulk_insert_crypto_prices = AsyncMock(side_effect=Exception("db down"))
+    orchestrator = streaming_orchestrator(
+        PagedExtractor(pages=20), loader, stream_queue_size=1
+    )
+
+    result = await orchestrator.run_extraction_pipeline()
+
+    assert result["status"] == "failed"
+    events = loader.record_pipeline_events.call_args.args[0]
+    failed = {e["stage"] for e in events if e["status"] == "failed"}
+    assert failed == {"extract", "load"}
@@ -0,0 +1,100 @@
+from datetime import date, datetime
+from unittest.mock import Mock
+
+import pyarrow.dataset as ds
+import pytest
+
+from config.settings import DatabaseConfig
+from loaders.parquet_sink import ParquetSink
+from loaders.sinks import FanOutLoader, build_loader
+from src.models.batch import PriceBatch
+
+
+def sample_batch(extracted_at: datetime, price: float = 1.0) -> PriceBatch:
+    return PriceBatch.from_api(
+        [
+            {"symbol": "btc", "name": "Bitcoin", "current_price": price},
+            {"symbol": "eth", "name": "Ethereum", "current_price": price * 2},
+        ],
+        extracted_at,
+    )
+
+
+def lake_files(sink: ParquetSink):
+    return sorted(p.relative_to(sink.root).as_posix() for p in sink.root.rglob("*"))
+
+
+def test_parquet_sink_writes_hive_partitions(tmp_path):
+    sink = ParquetSink(tmp_path, compression="snappy")
+
+    assert sink.bulk_insert_crypto_prices(sample_batch(datetime(2024, 1, 1, 9))) == 2
+    assert sink.bulk_insert_crypto_prices([]) == 0
+
+    files = [f for f in lake_files(sink) if f.endswith(".parquet")]
+    assert len(files) == 2
+    assert files[0].startswith("date=2024-01-01/symbol=BTC/part-")
+
+    table = sink.dataset().to_table(filter=ds.field("symbol") == "ETH")
+    assert table.column("current_price").to_pylist() == [2.0]
+    assert table.column("date").to_pylist() == ["2024-01-01"]
+
+
+def test_parquet_sink_compacts_closed_days_only(tmp_path):
+    sink = ParquetSink(tmp_path)
+    for hour in (1, 2, 3):
+        sink.bulk_insert_crypto_prices(sample_batch(datetime(2024, 1, 1, hour), hour))
+    sink.bulk_insert_crypto_prices(sample_batch(datetime(2024, 1, 2, 1)))
+
+    assert sink.compact(before=date(2024, 1, 2)) == {"days": 1, "files_merged": 6}
+
+    assert [f for f in lake_files(sink) if f.startswith("date=2024-01-01/")] == [
+        "date=2024-01-01/symbol=BTC",
+        "date=2024-01-01/symbol=BTC/day.parquet",
+        "date=2024-01-01/symbol=ETH",
+        "date=2024-01-01/symbol=ETH/day.parquet",
+    ]
+    day = sink.dataset().to_table(filter=ds.field("date") == "2024-01-01")
+    assert day.num_rows == 6
+    btc = day.filter(ds.field("symbol") == "BTC")
+    assert btc.column("current_price").to_pylist() == [1.0, 2.0, 3.0]
+
+    # Nothing left to do until late rows arrive for a compacted day
+    assert sink.compact(before=date(2024, 1, 2)) == {"days": 0, "files_merged": 0}
+    sink.bulk_insert_crypto_prices(sample_batch(datetime(2024, 1, 1, 4), 4))
+    sink.bulk_insert_crypto_prices(sample_batch(datetime(2024, 1, 1, 4), 4))
+    assert sink.compact(before=date(2024, 1, 2))["files_merged"] == 6
+    assert sink.dataset().count_rows(filter=ds.field("date") == "2024-01-01") == 8
+
+
+def test_build_loader_selects_sinks(tmp_path):
+    lake_only = build_loader(DatabaseConfig(load_sinks=["parquet"], lake_dir=tmp_path))
+    assert type(lake_only).__name__ == "ParquetSink"
+
+    both = build_loader(
+        DatabaseConfig(load_sinks=["warehouse", "parquet"], loader_backend="sync")
+    )
+    assert isinstance(both, FanOutLoader)
+    assert type(both.primary).__name__ == "WarehouseLoader"
+
+    with pytest.raises(ValueError, match="LOAD_SINKS"):
+        DatabaseConfig(load_sinks=["s3"])
+    with pytest.raises(ValueError, match="PARQUET_COMPRESSION"):
+        DatabaseConfig(parquet_compression="xz")
+
+
+@pytest.mark.asyncio
+async def test_fan_out_loader_keeps_warehouse_result_when_sink_fails():
+    warehouse, lake = Mock(), Mock()
+    warehouse.bulk_insert_crypto_prices.return_value = 2
+    lake.bulk_insert_crypto_prices.side_effect = OSError("disk full")
+    loader = FanOutLoader(warehouse, [lake])
+
+    assert (
+        await loader.bulk_insert_crypto_prices(sample_batch(datetime(2024, 1, 1))) == 2
+    )
+    lake.bulk_insert_crypto_prices.assert_called_once()
+
+    # Everything but price loads goes to the warehouse
+    loader.record_pipeline_events([{"run_id": "r"}])
+    warehouse.record_pipeline_events.assert_called_once()
+    lake.record_pipeline_events.assert_not_called()
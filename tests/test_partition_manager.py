@@ -0,0 +1,93 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from config.settings import DatabaseConfig
+from loaders.partition_manager import (
+    PartitionManager,
+    next_period,
+    parse_partition_name,
+    partition_for,
+)
+
+
+def executed_sql(connection):
+    return [str(call.args[0]) for call in connection.execute.call_args_list]
+
+
+def test_partition_bounds_and_names_round_trip():
+    december = partition_for(datetime(2024, 12, 1), "month")
+    assert december.name == "crypto_price_facts_p202412"
+    assert december.end == datetime(2025, 1, 1)
+    assert parse_partition_name(december.name) == december
+
+    day = partition_for(datetime(2024, 2, 28), "day")
+    assert day.name == "crypto_price_facts_p20240228"
+    assert next_period(day.start, "day") == datetime(2024, 2, 29)
+    assert parse_partition_name(day.name) == day
+
+    assert parse_partition_name("crypto_price_facts_default") is None
+
+
+def test_ensure_partitions_creates_missing_periods_only():
+    manager = PartitionManager("month", premake=2)
+    manager.existing = MagicMock(
+        return_value=[partition_for(datetime(2024, 5, 1), "month")]
+    )
+    connection = MagicMock()
+
+    created = manager.ensure_partitions(
+        connection, since=datetime(2024, 4, 10), now=datetime(2024, 5, 20)
+    )
+
+    assert created == [
+        "crypto_price_facts_p202404",
+        "crypto_price_facts_p202406",
+        "crypto_price_facts_p202407",
+    ]
+    sql = executed_sql(connection)
+    assert "PARTITION OF crypto_price_facts DEFAULT" in sql[0]
+    assert any(
+        "ATTACH PARTITION crypto_price_facts_p202404 "
+        "FOR VALUES FROM ('2024-04-01T00:00:00') TO ('2024-05-01T00:00:00')" in s
+        for s in sql
+    )
+
+
+def test_ensure_partitions_skips_days_covered_by_a_month():
+    manager = PartitionManager("day", premake=1)
+    manager.existing = MagicMock(
+        return_value=[partition_for(datetime(2024, 5, 1), "month")]
+    )
+    created = manager.ensure_partitions(MagicMock(), now=datetime(2024, 5, 31))
+    assert created == ["crypto_price_facts_p20240601"]
+
+
+def test_apply_retention_detaches_or_drops_expired_partitions():
+    partitions = [
+        partition_for(datetime(2024, month, 1), "month") for month in (1, 2, 3)
+    ]
+    now = datetime(2024, 4, 15)
+
+    detach = PartitionManager("month", retention_days=60)
+    detach.existing = MagicMock(return_value=partitions)
+    connection = MagicMock()
+    assert detach.apply_retention(connection, now=now) == ["crypto_price_facts_p202401"]
+    assert not any("DROP TABLE" in s for s in executed_sql(connection))
+
+    drop = PartitionManager("month", retention_days=60, retention_action="drop")
+    drop.existing = MagicMock(return_value=partitions)
+    connection = MagicMock()
+    drop.apply_retention(connection, now=now)
+    assert "DROP TABLE crypto_price_facts_p202401" in executed_sql(connection)
+
+    keep_forever = PartitionManager("month", retention_days=0)
+    assert keep_forever.apply_retention(MagicMock(), now=now) == []
+
+
+def test_partition_settings_are_validated():
+    with pytest.raises(ValueError, match="PARTITION_INTERVAL"):
+        DatabaseConfig(partition_interval="week")
+    with pytest.raises(ValueError, match="PARTITION_RETENTION_ACTION"):
+        DatabaseConfig(partition_retention_action="archive")
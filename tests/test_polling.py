@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from config.settings import PipelineConfig, PollingTier, parse_polling_tiers
+from extractors.crypto_extractor import CryptoDataExtractor
+from pipeline.polling import PollPlan, TierQueue
+from pipeline.sharding import ShardAssignment
+from scheduler.job_scheduler import TieredPollTask
+
+TOP = PollingTier("top", 15, priority=0, ranks=(1, 10))
+TAIL = PollingTier("tail", 900, priority=2, ranks=(11, 250))
+WATCH = PollingTier("watch", 60, priority=1, coins=("cardano", "polkadot"))
+
+
+def test_parse_polling_tiers():
+    tiers = parse_polling_tiers(
+        "top:ranks=1-10:every=15s; tail:ranks=11-250:every=15m:priority=2;"
+        "watch:coins=cardano, polkadot:every=1m:priority=1"
+    )
+    assert [(t.name, t.interval_seconds, t.priority) for t in tiers] == [
+        ("top", 15, 0),
+        ("tail", 900, 2),
+        ("watch", 60, 1),
+    ]
+    assert (tiers[0].ranks, tiers[2].coins) == ((1, 10), ("cardano", "polkadot"))
+    assert parse_polling_tiers("") == []
+
+    for bad in (
+        "top:ranks=1-10",
+        "top:ranks=1-10:coins=bitcoin:every=1m",
+        "top:ranks=10-1:every=1m",
+        "top:rank=1-10:every=1m",
+        "a:ranks=1-5:every=1m;a:ranks=6-9:every=1m",
+    ):
+        with pytest.raises(ValueError):
+            parse_polling_tiers(bad)
+
+
+def test_plan_packs_tiers_into_shared_requests():
+    assert PollPlan([TOP]).rank_pages(250) == [(10, 1)]
+    assert PollPlan([TOP, TAIL]).rank_pages(250) == [(250, 1)]
+    deep = PollingTier("deep", 60, ranks=(400, 600))
+    assert PollPlan([TOP, deep]).rank_pages(250) == [(250, 1), (250, 2), (250, 3)]
+
+    plan = PollPlan([WATCH, PollingTier("majors", 60, coins=("bitcoin", "cardano"))])
+    assert plan.id_chunks(2) == [["cardano", "polkadot"], ["bitcoin"]]
+    assert plan.request_count(2) == 2
+    assert plan.wants_rank(5) is False
+
+
+def test_queue_serves_due_tiers_by_priority_within_the_request_budget():
+    queue = TierQueue([TAIL, WATCH, TOP], 250, now=0.0, max_requests=1)
+
+    first = queue.take(0.0)
+    # top and tail share page 1; watch needs its own request, so it waits
+    assert [t.name for t in first.tiers] == ["top", "tail"]
+    assert queue.next_deadline() == 0.0
+    assert [t.name for t in queue.take(1.0).tiers] == ["watch"]
+    assert queue.next_deadline() == 15.0
+
+    # A poll far behind collapses the missed deadlines into one
+    assert [t.name for t in queue.take(50.0).tiers] == ["top"]
+    assert queue.next_deadline() == 60.0
+
+
+def test_queue_packs_tiers_due_soon_when_they_add_no_request():
+    queue = TierQueue([TOP, TAIL], 250, now=0.0, pack_ahead_seconds=15)
+    queue.take(0.0)
+    for now in range(15, 885, 15):
+        assert [t.name for t in queue.take(now).tiers] == ["top"]
+
+    # The tail is due at 900: it rides along with top's 885 poll for free
+    assert [t.name for t in queue.take(885).tiers] == ["top", "tail"]
+    assert queue.take(900).rank_pages(250) == [(10, 1)]
+
+
+def test_tiers_cost_fewer_requests_than_polling_everything_at_top_speed():
+    queue = TierQueue([TOP, TAIL, WATCH], 250, now=0.0, pack_ahead_seconds=15)
+    requests, now = 0, 0.0
+    while now < 3600:
+        requests += queue.take(now).request_count(250)
+        now = queue.next_deadline()
+
+    # top every 15s and watch every 60s; the tail always rides along with top
+    assert requests == 240 + 60
+    flat = PollPlan([TOP, TAIL, WATCH]).request_count(250) * (3600 // 15)
+    assert flat == 480
+
+
+def test_extractor_builds_and_trims_plan_pages():
+    config = PipelineConfig(page_size=250)
+    extractor = CryptoDataExtractor(config)
+    plan = PollPlan([TOP, WATCH])
+
+    pages = extractor._build_page_params(plan=plan)
+    assert [(p["per_page"], p["page"], p.get("ids")) for p in pages] == [
+        (10, 1, None),
+        (2, 1, "cardano,polkadot"),
+    ]
+
+    coins = [{"id": f"coin-{rank}"} for rank in range(1, 251)]
+    narrow = PollPlan([PollingTier("mid", 60, ranks=(3, 4))])
+    full_page = {"page": 1, "per_page": 250}
+    assert extractor._within_universe(full_page, coins, narrow) == coins[2:4]
+    assert extractor._within_universe(pages[1], coins[:2], plan) == coins[:2]
+
+    shard = ShardAssignment("w1", ["w1", "w2"])
+    owned = extractor._build_page_params(shard=shard, plan=plan)
+    assert [p.get("ids", "") for p in owned if "ids" in p] in (
+        [],
+        [",".join(shard.owned(["cardano", "polkadot"]))],
+    )
+
+
+@pytest.mark.asyncio
+async def test_tiered_task_polls_each_tier_on_its_cadence():
+    fast = PollingTier("fast", 0.05, ranks=(1, 10))
+    slow = PollingTier("slow", 0.2, coins=("bitcoin",))
+    plans, in_flight = [], []
+
+    async def poll(plan):
+        in_flight.append(plan)
+        assert len(in_flight) == 1
+        plans.append(plan)
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+
+    task = TieredPollTask(
+        "pipeline", poll, lambda now: TierQueue([fast, slow], 250, now)
+    )
+    task.start()
+    await asyncio.sleep(0.33)
+    await task.stop()
+
+    fast_polls = sum("fast" in str(plan) for plan in plans)
+    slow_polls = sum("slow" in str(plan) for plan in plans)
+    assert 5 <= fast_polls <= 8
+    assert slow_polls == 2
+    assert "fast, slow" in str(plans[0]) or "slow, fast" in str(plans[0])
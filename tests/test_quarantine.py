@@ -0,0 +1,124 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from config.settings import DatabaseConfig
+from loaders.async_warehouse_loader import AsyncWarehouseLoader
+from loaders.quarantine import (
+    bisect_load,
+    error_text,
+    is_row_error,
+    quarantine_rows,
+    sqlstate,
+)
+from loaders.warehouse_loader import WarehouseLoader
+from src.models.batch import PriceBatch
+
+
+class DriverError(Exception):
+    def __init__(self, message: str, pgcode: str):
+        super().__init__(message)
+        self.pgcode = pgcode
+
+
+def priced_batch(prices) -> PriceBatch:
+    return PriceBatch.from_arrays(
+        len(prices),
+        {
+            "symbol": [f"C{i}" for i in range(len(prices))],
+            "name": "Coin",
+            "current_price": prices,
+        },
+        datetime(2024, 1, 1),
+    )
+
+
+def not_null_price(batch: PriceBatch) -> int:
+    if np.isnan(batch["current_price"]).any():
+        raise IntegrityError(
+            "INSERT ...",
+            {},
+            DriverError('null value in column "current_price"', "23502"),
+        )
+    return len(batch)
+
+
+def test_bisect_load_isolates_bad_rows_in_log_calls():
+    prices = np.arange(1024, dtype=float)
+    prices[[100, 700]] = np.nan
+    load = Mock(side_effect=not_null_price)
+
+    written, rejected = bisect_load(load, priced_batch(prices))
+
+    assert written == 1022
+    assert [row["symbol"][0] for row, _ in rejected] == ["C100", "C700"]
+    # The failed batch, then a failed and a clean half per level for each row
+    assert load.call_count <= 1 + 2 * 2 * 10
+
+    rows = quarantine_rows(rejected, "run-1")
+    assert rows[0]["run_id"] == "run-1"
+    assert rows[0]["error_code"] == "23502"
+    assert rows[0]["error_message"] == 'null value in column "current_price"'
+    assert rows[0]["payload"]["symbol"] == "C100"
+    assert rows[0]["payload"]["current_price"] is None
+    assert rows[0]["payload"]["extracted_at"] == "2024-01-01T00:00:00"
+
+
+def test_bisect_load_raises_errors_not_caused_by_rows():
+    down = OperationalError("COPY ...", {}, DriverError("connection lost", "08006"))
+    load = Mock(side_effect=down)
+
+    with pytest.raises(OperationalError):
+        bisect_load(load, priced_batch([1.0, 2.0]))
+    load.assert_called_once()
+
+
+def test_sqlstate_follows_wrapped_and_chained_errors():
+    try:
+        try:
+            raise DriverError("value too long", "22001")
+        except DriverError as driver_error:
+            raise RuntimeError("adapter: value too long") from driver_error
+    except RuntimeError as adapted:
+        chained = adapted
+
+    assert sqlstate(chained) == "22001"
+    assert error_text(chained) == "value too long"
+    assert is_row_error(chained)
+    assert sqlstate(ValueError("bad")) is None
+    assert not is_row_error(ValueError("bad"))
+
+
+def test_warehouse_loader_quarantines_bad_rows_with_run_id():
+    loader = WarehouseLoader(DatabaseConfig(load_method="copy"))
+    loader._load_crypto_prices = Mock(side_effect=not_null_price)
+    loader.quarantine_prices = Mock()
+    loader.update_health_summary = Mock()
+
+    written = loader.bulk_insert_crypto_prices(
+        priced_batch([1.0, np.nan, 3.0, 4.0]), run_id="run-2"
+    )
+
+    assert written == 3
+    (rows,) = loader.quarantine_prices.call_args.args
+    assert [(r["run_id"], r["payload"]["symbol"]) for r in rows] == [("run-2", "C1")]
+
+
+@pytest.mark.asyncio
+async def test_async_loader_quarantines_bad_rows():
+    loader = AsyncWarehouseLoader(DatabaseConfig(load_method="copy"))
+
+    async def load(batch):
+        return not_null_price(batch)
+
+    loader._load_crypto_prices = load
+    loader.quarantine_prices = AsyncMock()
+    loader.update_health_summary = AsyncMock()
+
+    assert await loader.bulk_insert_crypto_prices(priced_batch([np.nan, 2.0])) == 1
+    (rows,) = loader.quarantine_prices.await_args.args
+    assert rows[0]["run_id"] is None
+    assert rows[0]["payload"]["symbol"] == "C0"
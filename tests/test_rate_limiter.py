@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from extractors.rate_limiter import (
+    TokenBucketRateLimiter,
+    cooldown_from_headers,
+    parse_retry_after,
+)
+
+
+def test_parse_retry_after_seconds_and_date():
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after(None) is None
+
+
+def test_cooldown_from_rate_limit_headers():
+    assert cooldown_from_headers(200, {"x-ratelimit-remaining": "5"}) == 0.0
+    assert (
+        cooldown_from_headers(
+            200, {"x-ratelimit-remaining": "0", "x-ratelimit-reset": "7"}
+        )
+        == 7.0
+    )
+    assert cooldown_from_headers(429, {"Retry-After": "30"}) == 30.0
+
+
+@pytest.mark.asyncio
+async def test_limiter_allows_burst_then_throttles():
+    limiter = TokenBucketRateLimiter(requests_per_minute=60, burst=2)
+    assert await limiter._take() == 0.0
+    assert await limiter._take() == 0.0
+    wait = await limiter._take()
+    assert 0.0 < wait <= 1.0
+
+
+@pytest.mark.asyncio
+async def test_limiter_backs_off_on_429_and_recovers():
+    limiter = TokenBucketRateLimiter(requests_per_minute=60, burst=1)
+    await limiter.on_response(429, {"Retry-After": "5"})
+    assert limiter.rate == pytest.approx(limiter.max_rate / 2)
+    assert limiter._paused_until > time.monotonic() + 4
+    assert await limiter._take() > 4
+
+    for _ in range(20):
+        await limiter.on_response(200, {})
+    assert limiter.rate == pytest.approx(limiter.max_rate)
@@ -0,0 +1,94 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock, Mock
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy.exc import OperationalError
+
+from config.settings import DatabaseConfig
+from loaders.async_warehouse_loader import AsyncWarehouseLoader
+from loaders.rollups import rebuild_rollups, rollup_batch
+from loaders.warehouse_loader import WarehouseLoader
+from src.models.batch import PriceBatch
+
+
+def history_batch() -> PriceBatch:
+    return PriceBatch.from_arrays(
+        3,
+        {"symbol": ["BTC", "BTC", "ETH"], "name": "Coin", "current_price": [1, 2, 3]},
+        np.array(
+            ["2024-01-01T10:05", "2024-01-01T09:55", "2024-01-02T00:00"],
+            dtype="datetime64[us]",
+        ),
+    )
+
+
+def test_rollup_batch_binds_the_batch_keys_and_time_bounds():
+    stmt = rollup_batch(history_batch(), np.array([1, 1, 2], dtype=np.int16))
+    params = stmt.compile().params
+
+    assert params["coin_ids"] == [1, 1, 2]
+    assert params["extracted_at"][1] == datetime(2024, 1, 1, 9, 55)
+    assert (params["first_at"], params["last_at"]) == (
+        datetime(2024, 1, 1, 9, 55),
+        datetime(2024, 1, 2),
+    )
+    assert "ON CONFLICT (coin_id, grain, bucket_start) DO UPDATE" in stmt.text
+
+
+def test_rebuild_rollups_covers_whole_days():
+    delete_stmt, insert_stmt = rebuild_rollups(date(2024, 1, 1), date(2024, 1, 3))
+    for stmt in (delete_stmt, insert_stmt):
+        params = stmt.compile().params
+        assert (params["start"], params["end"]) == (
+            datetime(2024, 1, 1),
+            datetime(2024, 1, 3),
+        )
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_loader_rolls_up_written_batches_when_enabled(enabled):
+    loader = WarehouseLoader(DatabaseConfig(rollups_enabled=enabled))
+    loader._load_crypto_prices = Mock(side_effect=len)
+    loader.update_health_summary = Mock()
+    loader.roll_up_prices = Mock()
+
+    assert loader.bulk_insert_crypto_prices(history_batch()) == 3
+    assert loader.roll_up_prices.called is enabled
+
+
+def test_roll_up_failure_does_not_fail_the_load():
+    loader = WarehouseLoader(DatabaseConfig(rollups_enabled=True))
+    loader._load_crypto_prices = Mock(side_effect=len)
+    loader._coin_ids = Mock(return_value=np.array([1, 1, 2], dtype=np.int16))
+    loader.engine = Mock()
+    loader.engine.begin.side_effect = OperationalError(
+        "SELECT", {}, Exception("connection refused")
+    )
+
+    assert loader.bulk_insert_crypto_prices(history_batch()) == 3
+    assert loader.roll_up_prices(history_batch()) == 0
+
+
+def test_roll_up_counts_rows_left_out_of_closed_buckets():
+    loader = WarehouseLoader(DatabaseConfig(rollups_enabled=True))
+    loader._coin_ids = Mock(return_value=np.array([1, 1, 2], dtype=np.int16))
+    loader.engine = MagicMock()
+    connection = loader.engine.begin.return_value.__enter__.return_value
+    connection.execute.return_value.one.return_value = Mock(buckets=4, skipped=2)
+    before = REGISTRY.get_sample_value("crypto_pipeline_rollup_rows_skipped_total")
+
+    assert loader.roll_up_prices(history_batch()) == 4
+    after = REGISTRY.get_sample_value("crypto_pipeline_rollup_rows_skipped_total")
+    assert after - before == 2
+
+
+@pytest.mark.asyncio
+async def test_async_loader_skips_roll_up_when_nothing_was_written():
+    loader = AsyncWarehouseLoader(DatabaseConfig(rollups_enabled=True))
+    loader._load_crypto_prices = AsyncMock(return_value=0)
+    loader.roll_up_prices = AsyncMock()
+
+    assert await loader.bulk_insert_crypto_prices(history_batch()) == 0
+    loader.roll_up_prices.assert_not_awaited()
@@ -0,0 +1,64 @@
+from unittest.mock import Mock
+
+import pytest
+
+from pipeline.run_ledger import RunLedger
+
+
+@pytest.mark.asyncio
+async def test_run_ledger_buffers_events_until_flush():
+    ledger = RunLedger("run-1")
+    ledger.start("extract")
+    ledger.finish("extract", 10, attempts=3, bytes_fetched=2048)
+    ledger.start("load")
+    ledger.fail("database error")
+
+    extract, load = ledger.events
+    assert extract["status"] == "success"
+    assert extract["attempts"] == 3
+    assert extract["completed_at"] >= extract["started_at"]
+    assert (load["stage"], load["status"]) == ("load", "failed")
+    assert load["error_message"] == "database error"
+
+    loader = Mock()
+    assert await ledger.flush(loader) == 2
+    loader.record_pipeline_events.assert_called_once()
+    assert ledger.events == []
+    assert await ledger.flush(loader) == 0
+
+
+@pytest.mark.asyncio
+async def test_run_ledger_keeps_events_when_flush_fails():
+    ledger = RunLedger("run-2")
+    ledger.start("extract")
+    ledger.finish("extract", 1)
+
+    loader = Mock()
+    loader.record_pipeline_events.side_effect = Exception("database down")
+    with pytest.raises(Exception, match="database down"):
+        await ledger.flush(loader)
+    assert len(ledger.events) == 1
+
+    # A failure after every stage finished is pinned on the last stage
+    ledger.fail("database down")
+    assert ledger.events[-1]["stage"] == "extract"
+
+
+def test_run_ledger_tracks_overlapping_stages():
+    ledger = RunLedger("run-3")
+    ledger.start("extract")
+    ledger.start("load")
+    ledger.progress("extract", 250, attempts=1)
+    ledger.progress("extract", 500, attempts=2)
+    ledger.fail("page 3 failed")
+
+    statuses = [
+        (e["stage"], e["status"], e["records_processed"]) for e in ledger.events
+    ]
+    assert statuses == [
+        ("extract", "running", 250),
+        ("extract", "running", 500),
+        ("extract", "failed", 0),
+        ("load", "failed", 0),
+    ]
+    assert ledger.events[0]["started_at"] == ledger.events[2]["started_at"]
@@ -0,0 +1,215 @@
+import asyncio
+import time
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from config.settings import PipelineConfig
+from scheduler.job_scheduler import PipelineScheduler, ScheduledTask
+from scheduler.triggers import CronTrigger, IntervalTrigger, due_deadlines
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def counted(metric, task, action):
+    return sample(f"crypto_pipeline_schedule_{metric}_total", task=task, action=action)
+
+
+def test_interval_deadlines_keep_a_fixed_rate():
+    trigger = IntervalTrigger(0.5)
+    due, following = due_deadlines(trigger, 10.0, 11.2)
+    assert due == [10.0, 10.5, 11.0]
+    assert following == 11.5
+
+
+def test_cron_trigger_finds_next_matching_minute():
+    trigger = CronTrigger("*/15 9-17 * * 1-5")
+    # Friday 17:50 rolls over the weekend to Monday 09:00
+    assert trigger.next_match(datetime(2024, 3, 8, 17, 50)) == datetime(
+        2024, 3, 11, 9, 0
+    )
+    assert trigger.next_match(datetime(2024, 3, 11, 9, 0)) == datetime(
+        2024, 3, 11, 9, 15
+    )
+    # Restricted day of month and day of week match on either
+    either = CronTrigger("0 0 1 * 0")
+    assert either.next_match(datetime(2024, 3, 2)) == datetime(2024, 3, 3)
+    assert either.next_match(datetime(2024, 3, 31, 1)) == datetime(2024, 4, 1)
+    assert CronTrigger("30 4 29 2 *").next_match(datetime(2024, 3, 1)) == datetime(
+        2028, 2, 29, 4, 30
+    )
+
+    for bad in ("* * *", "60 * * * *", "*/0 * * * *", "0 0 30 2 *"):
+        with pytest.raises(ValueError):
+            CronTrigger(bad).next_match(datetime(2024, 1, 1))
+
+
+def test_cron_deadlines_are_monotonic_offsets_of_wall_matches():
+    wall = datetime(2024, 1, 1, 12, 0, 30).timestamp()
+    trigger = CronTrigger("* * * * *", wall_clock=lambda: wall, clock=lambda: 100.0)
+    assert trigger.next_deadline(100.0) == pytest.approx(130.0)
+    assert trigger.next_deadline(130.0) == pytest.approx(190.0)
+
+
+def slow_task(name, seconds, interval=0.05, **policy):
+    calls = []
+
+    async def run():
+        calls.append(time.monotonic())
+        await asyncio.sleep(seconds)
+
+    return ScheduledTask(name, run, IntervalTrigger(interval), **policy), calls
+
+
+@pytest.mark.asyncio
+async def test_runs_due_while_one_is_in_flight_are_skipped_by_default():
+    skipped = counted("overlaps", "overlap-skip", "skipped")
+    task, calls = slow_task("overlap-skip", 0.18)
+
+    task.start(time.monotonic())
+    await asyncio.sleep(0.3)
+    await task.stop()
+
+    assert len(calls) == 2
+    assert counted("overlaps", "overlap-skip", "skipped") - skipped >= 3
+
+
+@pytest.mark.asyncio
+async def test_queued_run_starts_when_the_previous_one_ends():
+    task, calls = slow_task("overlap-queue", 0.15, interval=0.1, overlap="queue")
+
+    task.start(time.monotonic())
+    await asyncio.sleep(0.25)
+    assert counted("overlaps", "overlap-queue", "queued") >= 1
+    await task.stop()
+
+    # Back to back, not two deadlines apart, and never concurrently
+    assert 0.15 <= calls[1] - calls[0] < 0.2
+
+
+@pytest.mark.asyncio
+async def test_missed_deadlines_are_caught_up_up_to_the_limit():
+    run = AsyncMock()
+    task = ScheduledTask(
+        "catchup", run, IntervalTrigger(1), missed="catchup", max_catchup=3
+    )
+    caught_up = counted("missed_runs", "catchup", "caught_up")
+    skipped = counted("missed_runs", "catchup", "skipped")
+
+    # Six deadlines passed while the process was suspended
+    task.start(time.monotonic() - 5.5)
+    await asyncio.sleep(0.05)
+    await task.stop()
+
+    assert run.await_count == 3
+    assert counted("missed_runs", "catchup", "caught_up") - caught_up == 2
+    assert counted("missed_runs", "catchup", "skipped") - skipped == 3
+
+
+@pytest.mark.asyncio
+async def test_missed_deadlines_collapse_into_one_run_when_skipped():
+    run = AsyncMock()
+    task = ScheduledTask("missed-skip", run, IntervalTrigger(1))
+
+    task.start(time.monotonic() - 5.5)
+    await asyncio.sleep(0.05)
+    await task.stop()
+
+    assert run.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_jitter_delays_each_run_within_its_bound():
+    run = AsyncMock()
+    task = ScheduledTask("jitter", run, IntervalTrigger(10), jitter_seconds=0.1)
+
+    started = time.monotonic()
+    task.start(started)
+    await asyncio.sleep(0.15)
+    await task.stop()
+
+    run.assert_awaited_once()
+    assert 0 <= sample("crypto_pipeline_schedule_lag_seconds", task="jitter") < 0.05
+
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_immediately_and_closes_on_stop():
+    orchestrator = Mock(shards=Mock(lease_seconds=30))
+    orchestrator.run_extraction_pipeline = AsyncMock(return_value={"status": "ok"})
+    orchestrator.maintain_partitions = AsyncMock(return_value={})
+    orchestrator.renew_lease = AsyncMock()
+    orchestrator.open = AsyncMock()
+    orchestrator.close = AsyncMock()
+    scheduler = PipelineScheduler(
+        orchestrator, PipelineConfig(schedule_interval_seconds=3600)
+    )
+    scheduler.schedule_pipeline()
+    assert [t.name for t in scheduler.tasks] == ["pipeline", "maintenance", "heartbeat"]
+    assert scheduler.tasks[2].trigger.seconds == 10
+
+    running = asyncio.create_task(scheduler.start())
+    await asyncio.sleep(0.05)
+    assert scheduler.is_running
+    scheduler.stop()
+    await running
+
+    orchestrator.maintain_partitions.assert_awaited_once()
+    orchestrator.run_extraction_pipeline.assert_awaited_once()
+    orchestrator.renew_lease.assert_not_awaited()
+    orchestrator.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_serves_health_while_running():
+    orchestrator = Mock(shards=None)
+    orchestrator.loader.read_health_summary = AsyncMock(
+        return_value={
+            "latest_extraction": datetime.utcnow(),
+            "symbols_last_24h": 1,
+            "records_last_24h": 1,
+            "records_last_hour": 1,
+            "valid_prices_last_hour": 1,
+            "price_sum_last_hour": 1.0,
+            "run_counts": {"load.success": 1},
+            "last_stages": [],
+        }
+    )
+    orchestrator.run_extraction_pipeline = AsyncMock(return_value={"status": "ok"})
+    orchestrator.maintain_partitions = AsyncMock(return_value={})
+    orchestrator.open = AsyncMock()
+    orchestrator.close = AsyncMock()
+    scheduler = PipelineScheduler(
+        orchestrator, PipelineConfig(schedule_interval_seconds=3600)
+    )
+    scheduler.schedule_pipeline()
+    scheduler.health_server = Mock(start=AsyncMock(), stop=AsyncMock())
+
+    running = asyncio.create_task(scheduler.start())
+    await asyncio.sleep(0.05)
+    snapshot = await scheduler.health_snapshot()
+    scheduler.stop()
+    await running
+
+    assert snapshot["status"] == "healthy"
+    assert snapshot["scheduler"]["running"] and snapshot["scheduler"]["leader"] is None
+    scheduler.health_server.start.assert_awaited_once()
+    scheduler.health_server.stop.assert_awaited_once()
+
+
+def test_schedule_config_validation():
+    config = PipelineConfig(extraction_interval_minutes=5)
+    assert config.schedule_interval_seconds == 300
+    assert PipelineConfig(schedule_interval_seconds=15).schedule_interval_seconds == 15
+
+    with pytest.raises(ValueError, match="SCHEDULE_OVERLAP_POLICY"):
+        PipelineConfig(schedule_overlap_policy="parallel")
+    with pytest.raises(ValueError, match="SCHEDULE_MISSED_POLICY"):
+        PipelineConfig(schedule_missed_policy="all")
+    with pytest.raises(ValueError, match="SCHEDULE_CRON"):
+        PipelineConfig(schedule_cron="*/5 * *")
+    with pytest.raises(ValueError, match="HEALTH_REFRESH_SECONDS"):
+        PipelineConfig(health_refresh_seconds=0)
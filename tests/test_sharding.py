@@ -0,0 +1,103 @@
+import asyncio
+from collections import Counter
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from config.settings import DatabaseConfig, PipelineConfig
+from extractors.crypto_extractor import CryptoDataExtractor
+from pipeline.orchestrator import CryptoPipelineOrchestrator
+from pipeline.sharding import ShardAssignment, ShardCoordinator, assign_shards
+
+WORKERS = ("worker-a", "worker-b", "worker-c")
+
+
+def test_assign_shards_balances_and_moves_few_keys():
+    keys = [f"page:{i}" for i in range(1, 41)]
+    before = assign_shards(keys, WORKERS)
+    after = assign_shards(keys, WORKERS[:2])
+
+    # No worker holds more than ceil(40 / workers) pages
+    assert max(Counter(before.values()).values()) == 14
+    assert sorted(Counter(after.values()).values()) == [20, 20]
+    # The departed worker's keys move, plus a few to even out the load
+    moved = [key for key in keys if before[key] != after[key]]
+    assert len(moved) < 20
+    assert all(after[key] == before[key] for key in keys if key not in moved)
+    assert {key for key in keys if before[key] == "worker-c"} <= set(moved)
+
+
+@pytest.mark.parametrize(
+    "settings, key",
+    [
+        ({"top_n_coins": 5000, "page_size": 250}, "page"),
+        ({"cryptocurrencies": [f"c{i}" for i in range(60)]}, "ids"),
+    ],
+)
+def test_workers_split_pages_without_overlap(monkeypatch, settings, key):
+    monkeypatch.delenv("CRYPTOCURRENCIES", raising=False)
+    config = PipelineConfig(**settings)
+    extractor = CryptoDataExtractor(config)
+    everything = extractor._build_page_params()
+
+    owned = [
+        extractor._build_page_params(ShardAssignment(worker, WORKERS))
+        for worker in WORKERS
+    ]
+
+    if key == "page":
+        split = [p["page"] for pages in owned for p in pages]
+        assert sorted(split) == [p["page"] for p in everything]
+    else:
+        split = [c for pages in owned for p in pages for c in p["ids"].split(",")]
+        assert sorted(split) == sorted(config.cryptocurrencies)
+    assert all(pages for pages in owned)
+
+
+@pytest.mark.asyncio
+async def test_coordinator_renews_lease_while_held():
+    loader = Mock()
+    loader.renew_worker_lease.return_value = ["worker-b"]
+    shards = ShardCoordinator(loader, "worker-a", lease_seconds=0.03)
+
+    async with shards.hold() as shard:
+        assert shard == ShardAssignment("worker-a", ("worker-a", "worker-b"))
+        await asyncio.sleep(0.05)
+    renewals = loader.renew_worker_lease.call_count
+    assert renewals >= 2
+    await asyncio.sleep(0.02)
+    assert loader.renew_worker_lease.call_count == renewals
+
+    await shards.release()
+    loader.release_worker_lease.assert_called_once_with("worker-a")
+
+
+@pytest.mark.asyncio
+async def test_sharded_orchestrator_extracts_its_shard_and_releases_lease():
+    extractor = AsyncMock()
+    extractor.fetch_crypto_prices.return_value = [{"symbol": "BTC"}]
+    orchestrator = CryptoPipelineOrchestrator(
+        PipelineConfig(sharding_enabled=True, worker_id="worker-a"),
+        DatabaseConfig(loader_backend="sync"),
+        extractor=extractor,
+    )
+    orchestrator.loader = orchestrator.shards.loader = Mock()
+    orchestrator.loader.renew_worker_lease.return_value = list(WORKERS)
+    orchestrator.loader.bulk_insert_crypto_prices.return_value = 1
+
+    result = await orchestrator.run_extraction_pipeline()
+
+    assert result["status"] == "success"
+    shard = extractor.fetch_crypto_prices.await_args.kwargs["shard"]
+    assert (shard.worker_id, shard.workers) == ("worker-a", WORKERS)
+
+    await orchestrator.close()
+    orchestrator.loader.release_worker_lease.assert_called_once_with("worker-a")
+
+
+def test_sharding_needs_the_warehouse_sink(tmp_path):
+    with pytest.raises(ValueError, match="SHARDING_ENABLED"):
+        CryptoPipelineOrchestrator(
+            PipelineConfig(sharding_enabled=True),
+            DatabaseConfig(load_sinks=["parquet"], lake_dir=tmp_path),
+        )
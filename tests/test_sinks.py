@@ -0,0 +1,29 @@
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from config.settings import DatabaseConfig
+from loaders.sinks import build_loader, call_loader
+
+
+def test_build_loader_selects_backend():
+    # src.* and bare imports load separate module objects, so compare names
+    sync_loader = build_loader(DatabaseConfig(loader_backend="sync"))
+    assert type(sync_loader).__name__ == "WarehouseLoader"
+    async_loader = build_loader(DatabaseConfig(loader_backend="async"))
+    assert type(async_loader).__name__ == "AsyncWarehouseLoader"
+    with pytest.raises(ValueError, match="LOADER_BACKEND"):
+        DatabaseConfig(loader_backend="threads")
+
+
+@pytest.mark.asyncio
+async def test_call_loader_awaits_coroutines_and_offloads_blocking_calls():
+    async def async_method(value):
+        return value * 2
+
+    sync_method = Mock(side_effect=lambda value: threading.get_ident())
+
+    assert await call_loader(async_method, 21) == 42
+    assert await call_loader(sync_method, 1) != threading.get_ident()
+    sync_method.assert_called_once_with(1)
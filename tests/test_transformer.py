@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from config.settings import DatabaseConfig, PipelineConfig
+from loaders.write_behind import SegmentSpool
+from pipeline.orchestrator import CryptoPipelineOrchestrator
+from pipeline.transformer import DbtTransformer
+from src.models.batch import PriceBatch
+
+
+class FakeRunner:
+    """dbtRunner stand-in building one model per selector."""
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = []
+        self.running = threading.Event()
+
+    def invoke(self, args):
+        self.running.set()
+        time.sleep(self.delay)
+        self.calls.append(args)
+        selectors = args[args.index("--select") + 1 : args.index("--project-dir")]
+        nodes = [
+            SimpleNamespace(status="success", node=SimpleNamespace(name=s))
+            for s in selectors
+        ]
+        return SimpleNamespace(
+            success=self.error is None,
+            exception=self.error,
+            result=SimpleNamespace(results=nodes),
+        )
+
+
+def transformer(runner, debounce=0.05):
+    return DbtTransformer(Mock(), "/dbt", "/profiles", debounce, runner=runner)
+
+
+def recorded(dbt: DbtTransformer):
+    return [
+        event
+        for call in dbt.loader.record_pipeline_events.call_args_list
+        for event in call.args[0]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_triggers_within_the_debounce_share_one_dbt_run():
+    runner = FakeRunner()
+    dbt = transformer(runner)
+
+    dbt.trigger("run-1", {"pipeline_runs"})
+    dbt.trigger("run-2", {"crypto_prices_raw", "pipeline_runs"})
+    dbt.trigger("run-3", {"pipeline_runs"})
+    await dbt.wait()
+
+    (args,) = runner.calls
+    assert args[:2] == ["run", "--select"]
+    assert "crypto_prices_raw+" in args and "source:raw.pipeline_runs+" in args
+    assert args[-4:] == ["--project-dir", "/dbt", "--profiles-dir", "/profiles"]
+
+    events = recorded(dbt)
+    assert [e["run_id"] for e in events] == ["run-1", "run-2", "run-3"]
+    assert {(e["stage"], e["status"], e["records_processed"]) for e in events} == {
+        ("transform", "success", 4)
+    }
+
+
+@pytest.mark.asyncio
+async def test_triggers_during_a_dbt_run_are_folded_into_the_next_one():
+    runner = FakeRunner(delay=0.1)
+    dbt = transformer(runner, debounce=0)
+
+    dbt.trigger("run-1", {"pipeline_runs"})
+    await asyncio.to_thread(runner.running.wait)
+    dbt.trigger("run-2", {"crypto_prices_raw"})
+    dbt.trigger("run-3", {"crypto_prices_raw"})
+    await dbt.wait()
+
+    assert len(runner.calls) == 2
+    assert "crypto_prices_raw+" not in runner.calls[0]
+    assert [e["run_id"] for e in recorded(dbt)] == ["run-1", "run-2", "run-3"]
+
+
+@pytest.mark.asyncio
+async def test_failed_dbt_run_is_recorded_and_close_skips_the_debounce():
+    dbt = transformer(FakeRunner(error=RuntimeError("relation missing")), 30)
+
+    dbt.trigger("run-1", {"pipeline_runs"})
+    started = time.monotonic()
+    await dbt.close()
+
+    assert time.monotonic() - started < 5
+    (event,) = recorded(dbt)
+    assert (event["status"], event["error_message"]) == ("failed", "relation missing")
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_triggers_models_for_the_tables_it_changed():
+    extractor = AsyncMock(request_attempts=0, bytes_fetched=0)
+    with patch("pipeline.orchestrator.DbtTransformer") as transformer_class:
+        orchestrator = CryptoPipelineOrchestrator(
+            PipelineConfig(transform_enabled=True, dedup_enabled=False),
+            DatabaseConfig(loader_backend="sync"),
+            extractor=extractor,
+        )
+    orchestrator.loader = Mock()
+    dbt = transformer_class.return_value
+
+    extractor.fetch_crypto_prices.return_value = [{"symbol": "BTC"}]
+    orchestrator.loader.bulk_insert_crypto_prices.return_value = 1
+    result = await orchestrator.run_extraction_pipeline()
+    run_id, tables = dbt.trigger.call_args.args
+    assert run_id == result["run_id"]
+    assert tables == {"pipeline_runs", "crypto_prices_raw"}
+
+    # A run that loaded nothing leaves the marts alone
+    dbt.trigger.reset_mock()
+    extractor.fetch_crypto_prices.return_value = []
+    orchestrator.loader.bulk_insert_crypto_prices.return_value = 0
+    await orchestrator.run_extraction_pipeline()
+    dbt.trigger.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_triggers_models_for_write_behind_flushes(tmp_path):
+    # A previous process left one batch in the spool
+    SegmentSpool(tmp_path).append(
+        PriceBatch.from_api(
+            [{"symbol": "BTC", "current_price": 1.0}], datetime(2024, 1, 1)
+        )
+    )
+    with patch("pipeline.orchestrator.DbtTransformer") as transformer_class:
+        orchestrator = CryptoPipelineOrchestrator(
+            PipelineConfig(
+                transform_enabled=True,
+                write_behind_enabled=True,
+                spool_dir=str(tmp_path),
+                dedup_enabled=False,
+            ),
+            DatabaseConfig(loader_backend="sync"),
+            extractor=AsyncMock(),
+        )
+    orchestrator.loader = Mock()
+    orchestrator.loader.bulk_insert_crypto_prices.side_effect = len
+    orchestrator.write_behind.loader = orchestrator.loader
+    dbt = transformer_class.return_value
+    dbt.close = AsyncMock()
+
+    # Replayed at startup, outside any run
+    await orchestrator.open()
+    flush_id, tables = dbt.trigger.call_args.args
+    assert flush_id.startswith("write_behind_flush_")
+    assert tables == {"crypto_prices_raw"}
+    await orchestrator.close()
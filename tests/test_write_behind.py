@@ -0,0 +1,130 @@
+import asyncio
+import time
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+
+from loaders.write_behind import SegmentSpool, WriteBehindBuffer
+from src.models.batch import PriceBatch
+
+
+def sample_batch(symbol: str, rows: int = 2) -> PriceBatch:
+    return PriceBatch.from_arrays(
+        rows,
+        {"symbol": symbol, "name": symbol.title(), "current_price": 1.0},
+        datetime(2024, 1, 1),
+    )
+
+
+def make_buffer(spool_dir, loader=None, flush_rows=5, flush_seconds=3600):
+    loader = loader or Mock()
+    loader.bulk_insert_crypto_prices.side_effect = lambda batch: len(batch)
+    return WriteBehindBuffer(loader, spool_dir, flush_rows, flush_seconds), loader
+
+
+@pytest.mark.asyncio
+async def test_write_behind_flushes_on_row_threshold(tmp_path):
+    buffer, loader = make_buffer(tmp_path)
+
+    assert await buffer.add(sample_batch("BTC")) == 0
+    assert await buffer.add(sample_batch("ETH")) == 0
+    assert buffer.pending_rows == 4
+    assert len(list(tmp_path.glob("segment-*.jsonl"))) == 1
+    loader.bulk_insert_crypto_prices.assert_not_called()
+
+    assert await buffer.add(sample_batch("ADA")) == 6
+    flushed = loader.bulk_insert_crypto_prices.call_args.args[0]
+    assert flushed["symbol"].tolist() == ["BTC", "BTC", "ETH", "ETH", "ADA", "ADA"]
+    assert buffer.pending_rows == 0
+    assert list(tmp_path.glob("segment-*.jsonl")) == []
+
+
+@pytest.mark.asyncio
+async def test_write_behind_flushes_on_age(tmp_path):
+    buffer, loader = make_buffer(tmp_path, flush_rows=1000, flush_seconds=0)
+    assert await buffer.add(sample_batch("BTC")) == 2
+    loader.bulk_insert_crypto_prices.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_timer_flushes_aged_rows_without_new_adds(tmp_path):
+    buffer, loader = make_buffer(tmp_path, flush_rows=1000, flush_seconds=0.2)
+    await buffer.open()
+    assert await buffer.add(sample_batch("BTC")) == 0
+
+    await asyncio.sleep(0.5)
+    loader.bulk_insert_crypto_prices.assert_called_once()
+    assert buffer.pending_rows == 0
+    assert list(tmp_path.glob("segment-*.jsonl")) == []
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_timer_flush_waits_for_an_append_in_progress(tmp_path):
+    buffer, loader = make_buffer(tmp_path, flush_rows=1000, flush_seconds=0.2)
+    await buffer.open()
+    await buffer.add(sample_batch("BTC"))
+
+    append = buffer.spool.append
+
+    def slow_append(batch):
+        # The timer comes due after the write but before add() buffers it
+        append(batch)
+        time.sleep(0.4)
+
+    buffer.spool.append = slow_append
+    await buffer.add(sample_batch("ETH"))
+    await asyncio.sleep(0.1)
+
+    loaded = [
+        symbol
+        for call in loader.bulk_insert_crypto_prices.call_args_list
+        for symbol in call.args[0]["symbol"].tolist()
+    ]
+    spooled = [
+        symbol
+        for segment in buffer.spool.segments()
+        for batch in buffer.spool.read(segment)
+        for symbol in batch["symbol"].tolist()
+    ]
+    # Every acknowledged batch is either in the warehouse or still on disk
+    assert sorted(loaded + spooled) == ["BTC", "BTC", "ETH", "ETH"]
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_keeps_spool_when_load_fails_and_replays(tmp_path):
+    failing = Mock()
+    buffer, _ = make_buffer(tmp_path, loader=failing, flush_rows=2)
+    failing.bulk_insert_crypto_prices.side_effect = Exception("database down")
+
+    assert await buffer.add(sample_batch("BTC")) == 0
+    assert buffer.pending_rows == 2
+    assert len(list(tmp_path.glob("segment-*.jsonl"))) == 1
+    await buffer.close()
+    assert len(list(tmp_path.glob("segment-*.jsonl"))) == 1
+
+    # A new process picks the spool up and loads it on open
+    restarted, loader = make_buffer(tmp_path)
+    assert await restarted.open() == 2
+    replayed = loader.bulk_insert_crypto_prices.call_args.args[0]
+    assert replayed["symbol"].tolist() == ["BTC", "BTC"]
+    assert replayed.extracted_at == datetime(2024, 1, 1)
+    assert list(tmp_path.glob("segment-*.jsonl")) == []
+    await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_skips_torn_trailing_line(tmp_path):
+    # The crashed process got as far as spooling one batch
+    spool = SegmentSpool(tmp_path)
+    spool.append(sample_batch("BTC"))
+    spool.seal()
+    segment = next(tmp_path.glob("segment-*.jsonl"))
+    with open(segment, "a") as f:
+        f.write('{"extracted_at": "2024-01-01T00:00:00", "colu')
+
+    restarted, loader = make_buffer(tmp_path)
+    assert await restarted.open() == 2
+    await restarted.close()